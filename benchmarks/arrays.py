@@ -0,0 +1,57 @@
+"""
+Compare a list[float] field with a NumpyArray[np.float64] field, on a
+generated document with many values: the time to validate the document, and
+the memory held by the validated model.
+
+    python benchmarks/arrays.py [--size N] [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from xml_to_pydantic import DocModel, NumpyArray, XpathField
+
+
+class ListSeries(DocModel):
+    readings: list[float] = XpathField("./v/text()")
+
+
+class ArraySeries(DocModel):
+    readings: NumpyArray[np.float64] = XpathField("./v/text()")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    doc = (
+        "<doc>" + "".join(f"<v>{i * 0.25}</v>" for i in range(args.size)) + "</doc>"
+    ).encode()
+    print(f"{args.size} values, best of {args.runs} runs")
+
+    classes: list[type[DocModel]] = [ListSeries, ArraySeries]
+    for cls in classes:
+        best = float("inf")
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            cls.model_validate_xml(doc)
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        model = cls.model_validate_xml(doc)
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del model
+
+        print(f"{cls.__name__:>12}: {best * 1000:6.1f} ms, model {held / 1e6:5.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
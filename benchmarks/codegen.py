@@ -0,0 +1,89 @@
+"""
+Compare the generated extraction functions (codegen=True) with the generic
+extraction, on the patents in the test data. The documents are parsed once
+beforehand, so that only the extraction (and validation) is timed.
+
+    python benchmarks/codegen.py [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+from lxml import etree
+
+from xml_to_pydantic import ConfigDict, DocModel, XpathField
+from xml_to_pydantic.model import _extract_document
+from xml_to_pydantic.stream import iter_documents
+
+DATA_FILE = (
+    Path(__file__).parent.parent / "tests" / "endtoend" / "data" / "ipg240109_head.xml"
+)
+
+
+class Applicant(DocModel):
+    model_config = ConfigDict(xpath_root="./addressbook")
+    last_name: str | None = XpathField("./last-name/text()", default=None)
+    first_name: str | None = XpathField("./first-name/text()", default=None)
+    country: str | None = XpathField("./address/country/text()", default=None)
+
+
+class Patent(DocModel):
+    model_config = ConfigDict(xpath_root="/us-patent-grant/us-bibliographic-data-grant")
+    title: str = XpathField("./invention-title/text()")
+    kind: str = XpathField("./publication-reference/document-id/kind/text()")
+    number: str = XpathField("./publication-reference/document-id/doc-number/text()")
+    date: str = XpathField("./publication-reference/document-id/date/text()")
+    claims: int = XpathField("./number-of-claims/text()")
+    applicants: list[Applicant] = XpathField(".//us-applicant", default=[])
+
+
+class GeneratedPatent(Patent):
+    model_config = ConfigDict(codegen=True)
+
+
+def extract(cls: type[DocModel], roots: list[etree._Element]) -> None:
+    for root in roots:
+        _extract_document(cls, "xml", root)
+
+
+def validate(cls: type[DocModel], roots: list[etree._Element]) -> None:
+    for root in roots:
+        cls.model_validate_xml(root)
+
+
+def best_time(function: Callable[[], object], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    docs = iter_documents([DATA_FILE])
+    roots = [etree.fromstring(doc.data) for doc in docs]  # noqa: S320
+    print(f"{len(roots)} documents, best of {args.runs} runs")
+
+    for cls in [Patent, GeneratedPatent]:
+        extract_time, validate_time = (
+            best_time(partial(function, cls, roots), args.runs)
+            for function in [extract, validate]
+        )
+        print(
+            f"{cls.__name__:>16}: extract {extract_time * 1000:6.1f} ms, "
+            f"extract and validate {validate_time * 1000:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare extracting flat, attribute heavy records with the inferred queries
+(@name, and ./name/text() for single values), which are answered without
+XPath, with the same queries written so that they go through XPath
+(attribute::name, and child::name/text()). The documents are parsed once
+beforehand, and are only extracted, not validated.
+
+    python benchmarks/direct.py [--docs N] [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from functools import partial
+from typing import Callable
+
+from lxml import etree
+
+from xml_to_pydantic import ConfigDict, DocModel, XpathField
+from xml_to_pydantic.model import _extract_document
+
+NAMES = ["id", "name", "kind", "country", "city", "status", "created", "owner"]
+
+
+class Direct(DocModel):
+    attr_id: str
+    attr_name: str
+    attr_kind: str
+    attr_country: str
+    attr_city: str
+    attr_status: str
+    attr_created: str
+    attr_owner: str
+    title: str
+    note: str
+
+
+class Xpath(DocModel):
+    attr_id: str = XpathField("attribute::id")
+    attr_name: str = XpathField("attribute::name")
+    attr_kind: str = XpathField("attribute::kind")
+    attr_country: str = XpathField("attribute::country")
+    attr_city: str = XpathField("attribute::city")
+    attr_status: str = XpathField("attribute::status")
+    attr_created: str = XpathField("attribute::created")
+    attr_owner: str = XpathField("attribute::owner")
+    title: str = XpathField("child::title/text()")
+    note: str = XpathField("child::note/text()")
+
+
+def make_doc(index: int) -> bytes:
+    attributes = " ".join(f'{name}="{name}{index}"' for name in NAMES)
+    return f"<record {attributes}><title>t</title><note>n</note></record>".encode()
+
+
+def extract(cls: type[DocModel], roots: list[etree._Element]) -> None:
+    for root in roots:
+        _extract_document(cls, "xml", root)
+
+
+def best_time(function: Callable[[], object], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    roots = [etree.fromstring(make_doc(i)) for i in range(args.docs)]  # noqa: S320
+    print(f"{args.docs} records, best of {args.runs} runs")
+    bases: list[type[DocModel]] = [Direct, Xpath]
+    for base in bases:
+        for codegen in [False, True]:
+            config = ConfigDict(codegen=codegen)
+            cls = type(base.__name__, (base,), {"model_config": config})
+            seconds = best_time(partial(extract, cls, roots), args.runs)
+            print(
+                f"{base.__name__:>6} (codegen={codegen!s:>5}): {seconds * 1000:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
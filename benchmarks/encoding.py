@@ -0,0 +1,78 @@
+"""
+Compare HTML inputs: bytes, bytes with an encoding hint, and str, on a large
+generated page and on many small ones. Also compares the cached parsers with
+creating a new parser for every page, as was done before.
+
+    python benchmarks/encoding.py [--paragraphs N] [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from functools import partial
+from typing import Callable
+
+from lxml import etree
+
+from xml_to_pydantic import CssField, DocModel, XpathField
+from xml_to_pydantic.docs import _parser
+
+
+class Page(DocModel):
+    title: str = CssField("title")
+    links: list[str] = XpathField("//a/@href")
+
+
+def validate(pages: list[str] | list[bytes], encoding: str | None) -> None:
+    for page in pages:
+        Page.model_validate_html(page, encoding=encoding)
+
+
+def parse(pages: list[bytes], new_parser: bool) -> None:
+    for page in pages:
+        parser = etree.HTMLParser(recover=True) if new_parser else _parser("html")
+        etree.fromstring(page, parser)  # noqa: S320
+
+
+def best_time(function: Callable[[], object], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def make_page(paragraphs: int) -> str:
+    body = "".join(
+        f"<div><p>paragraph {i} café</p><a href='/{i}'>link</a></div>"
+        for i in range(paragraphs)
+    )
+    return f"<html><head><title>page</title></head><body>{body}</body></html>"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paragraphs", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    large = make_page(args.paragraphs)
+    small = make_page(5)
+    for name, page, count in [("large", large, 1), ("small", small, 10_000)]:
+        print(f"{count} {name} page(s), {len(page.encode()) / 1e3:.1f} kB each")
+        cases: dict[str, Callable[[], object]] = {
+            "bytes": partial(validate, [page.encode()] * count, None),
+            "bytes, utf-8": partial(validate, [page.encode()] * count, "utf-8"),
+            "str": partial(validate, [page] * count, None),
+            "parse, new parser": partial(parse, [page.encode()] * count, True),
+            "parse, cached parser": partial(parse, [page.encode()] * count, False),
+        }
+        for case, function in cases.items():
+            seconds = best_time(function, args.runs)
+            print(f"{case:>22}: {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
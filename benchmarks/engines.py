@@ -0,0 +1,73 @@
+"""
+Compare the extraction engines on a generated document: the time taken, and
+the peak memory (maximum resident set size) of a fresh process for each.
+
+    python benchmarks/engines.py [--elements N] [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+
+SCRIPT = """
+import resource, sys, time
+from xml_to_pydantic import ConfigDict, DocModel, XpathField
+
+class Record(DocModel):
+    model_config = ConfigDict(engine=sys.argv[1])
+    title: str
+    attr_kind: str
+    values: list[int] = XpathField("./values/v/text()")
+
+doc = (
+    "<doc kind='k'><title>hello</title><values>"
+    + "".join(f"<v>{i}</v>" for i in range(100))
+    + "</values>"
+    + "<other><x>a</x><y>b</y></other>" * int(sys.argv[2])
+    + "</doc>"
+).encode()
+
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+best = float("inf")
+for _ in range(int(sys.argv[3])):
+    start = time.perf_counter()
+    Record.model_validate_xml(doc)
+    best = min(best, time.perf_counter() - start)
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(len(doc), best, after - before)
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for engine in ["tree", "target"]:
+        command = [
+            sys.executable,
+            "-c",
+            SCRIPT,
+            engine,
+            str(args.elements),
+            str(args.runs),
+        ]
+        proc = subprocess.run(
+            command,  # noqa: S603
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        size, seconds, max_rss_kb = proc.stdout.split()
+        print(
+            f"{engine:>6}: {float(seconds) * 1000:8.1f} ms "
+            f"({int(size) / 1e6 / float(seconds):.1f} MB/s), "
+            f"peak memory +{int(max_rss_kb) / 1024:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
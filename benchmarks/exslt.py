@@ -0,0 +1,83 @@
+"""
+Compare filtering a list field in Python (a field_validator keeping the
+values that match a regular expression) with filtering in the query, with
+EXSLT's re:test() or with XPath's own string functions, on a generated
+document where few values match.
+
+    python benchmarks/exslt.py [--refs N] [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from functools import partial
+from typing import Callable
+
+from pydantic import field_validator
+
+from xml_to_pydantic import DocModel, XpathField
+
+PATTERN = r"^US-\d+$"
+
+
+class Refs(DocModel):
+    refs: list[str]
+
+
+class PythonFiltered(Refs):
+    refs: list[str] = XpathField("//ref/text()")
+
+    @field_validator("refs")
+    @classmethod
+    def keep_us(cls, refs: list[str]) -> list[str]:
+        pattern = re.compile(PATTERN)
+        return [ref for ref in refs if pattern.match(ref)]
+
+
+class RegexFiltered(Refs):
+    refs: list[str] = XpathField(f"//ref/text()[re:test(., '{PATTERN}')]")
+
+
+class XpathFiltered(Refs):
+    refs: list[str] = XpathField("//ref/text()[starts-with(., 'US-')]")
+
+
+def make_doc(refs: int) -> bytes:
+    return (
+        b"<patent>"
+        + b"".join(
+            b"<ref>%s-%d</ref>" % (b"US" if i % 20 == 0 else b"EP", i)
+            for i in range(refs)
+        )
+        + b"</patent>"
+    )
+
+
+def best_time(function: Callable[[], object], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--refs", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    doc = make_doc(args.refs)
+    print(f"{args.refs} refs (1 in 20 matching), best of {args.runs} runs")
+    classes: list[type[Refs]] = [PythonFiltered, RegexFiltered, XpathFiltered]
+    for cls in classes:
+        seconds = best_time(partial(cls.model_validate_xml, doc), args.runs)
+        matches = len(cls.model_validate_xml(doc).refs)
+        print(f"{cls.__name__:>16}: {seconds * 1000:7.1f} ms ({matches} matches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare extracting single valued fields whose queries match many nodes in a
+large generated document, taking the first match (the default) and with
+strict_matches, where every match is returned (and here, the model is only
+extracted, as several matches would fail validation). Simple paths are
+found with ElementPath, and the other queries are evaluated as (query)[1].
+The document is parsed once beforehand.
+
+    python benchmarks/first_match.py [--elements N] [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from functools import partial
+from typing import Callable
+
+from lxml import etree
+
+from xml_to_pydantic import ConfigDict, DocModel, XpathField
+from xml_to_pydantic.model import _extract_document
+
+
+class SimplePaths(DocModel):
+    kind: str = XpathField("./item/@kind")
+    name: str = XpathField("./item/name/text()")
+
+
+class OtherQueries(DocModel):
+    kind: str = XpathField("//item/@kind")
+    title: str = XpathField("//title/text()")
+
+
+def make_doc(elements: int) -> bytes:
+    return (
+        b"<root><title>t</title>"
+        + b"".join(
+            b'<item kind="k%d"><name>n%d</name><title>x</title></item>' % (i, i)
+            for i in range(elements)
+        )
+        + b"</root>"
+    )
+
+
+def best_time(function: Callable[[], object], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    root = etree.fromstring(make_doc(args.elements))  # noqa: S320
+    print(f"{args.elements} elements, best of {args.runs} runs")
+    bases: list[type[DocModel]] = [SimplePaths, OtherQueries]
+    for base in bases:
+        for codegen in [False, True]:
+            times = []
+            for strict in [False, True]:
+                config = ConfigDict(codegen=codegen, strict_matches=strict)
+                cls = type(base.__name__, (base,), {"model_config": config})
+                function = partial(_extract_document, cls, "xml", root)
+                times.append(best_time(function, args.runs))
+            print(
+                f"{base.__name__:>12} (codegen={codegen!s:>5}): "
+                f"first {times[0] * 1000:8.3f} ms, strict {times[1] * 1000:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
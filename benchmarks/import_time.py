@@ -0,0 +1,56 @@
+"""
+Measure how long `import xml_to_pydantic` takes in a fresh interpreter.
+
+Runs `python -X importtime` several times and reports the best total, along
+with the modules that contributed the most (cumulative) time on that run.
+
+    python benchmarks/import_time.py [--runs N] [--top N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+
+
+def import_times() -> dict[str, int]:
+    """Cumulative import time (in microseconds) for each module imported"""
+    command = [sys.executable, "-X", "importtime", "-c", "import xml_to_pydantic"]
+    proc = subprocess.run(
+        command,  # noqa: S603
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    best = min(
+        (import_times() for _ in range(args.runs)),
+        key=lambda times: times["xml_to_pydantic"],
+    )
+
+    print(f"import xml_to_pydantic: {best['xml_to_pydantic'] / 1000:.1f} ms")
+    print(f"(best of {args.runs} runs, cumulative time per module)")
+    slowest = sorted(best.items(), key=lambda item: item[1], reverse=True)
+    for module, micros in slowest[1 : args.top + 1]:
+        print(f"  {micros / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compare a list[Row] field with an Iterable[Row] field, on a generated
+document with many rows: the time to sum a value over all the rows, and the
+peak memory (beyond the parsed tree) while doing so, and the time to read
+just the first row.
+
+    python benchmarks/lazy.py [--size N] [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from typing import Any, Iterable
+
+from lxml import etree
+
+from xml_to_pydantic import ConfigDict, DocModel, XpathField
+
+
+class Row(DocModel):
+    id: int = XpathField("./@id")
+    name: str
+    value: float
+
+
+class ListTable(DocModel):
+    row: list[Row]
+
+
+class LazyTable(DocModel):
+    row: Iterable[Row]
+
+
+class GeneratedListTable(ListTable):
+    model_config = ConfigDict(codegen=True)
+
+
+class GeneratedLazyTable(LazyTable):
+    model_config = ConfigDict(codegen=True)
+
+
+def total(cls: type[DocModel], root: etree._Element) -> float:
+    table: Any = cls.model_validate_xml(root)
+    result: float = sum(row.value for row in table.row)
+    return result
+
+
+def first(cls: type[DocModel], root: etree._Element) -> Row:
+    table: Any = cls.model_validate_xml(root)
+    row: Row = next(iter(table.row))
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    doc = (
+        "<table>"
+        + "".join(
+            f'<row id="{i}"><name>row {i}</name><value>{i * 0.25}</value></row>'
+            for i in range(args.size)
+        )
+        + "</table>"
+    ).encode()
+    root = etree.fromstring(doc)  # noqa: S320
+    print(f"{args.size} rows, best of {args.runs} runs")
+
+    classes: list[type[DocModel]] = [
+        ListTable,
+        LazyTable,
+        GeneratedListTable,
+        GeneratedLazyTable,
+    ]
+    for cls in classes:
+        sum_time = first_time = float("inf")
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            total(cls, root)
+            sum_time = min(sum_time, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            first(cls, root)
+            first_time = min(first_time, time.perf_counter() - start)
+
+        tracemalloc.start()
+        total(cls, root)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"{cls.__name__:>18}: sum {sum_time * 1000:6.1f} ms, "
+            f"peak {peak / 1e6:5.2f} MB, first row {first_time * 1000:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare sending pickled models back from worker processes (a plain
+Pool.imap over model_validate_xml) with BatchValidator.validate_parallel,
+which sends the JSON of each chunk, both with the models left as JSON and
+with every model accessed. The documents are small generated records, where
+the cost of sending the results matters most.
+
+    python benchmarks/parallel.py [--docs N] [--workers N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from multiprocessing import Pool
+from typing import Callable
+
+from xml_to_pydantic import BatchValidator, DocModel, XpathField
+
+
+class Item(DocModel):
+    sku: str = XpathField("./@sku")
+    price: float
+    tags: list[str] = XpathField("./tag/text()")
+
+
+class Order(DocModel):
+    id: int = XpathField("./@id")
+    customer: str
+    items: list[Item] = XpathField("./item")
+
+
+def make_docs(count: int) -> list[bytes]:
+    items = b"".join(
+        b'<item sku="s%d"><price>%d.5</price><tag>a</tag><tag>b</tag></item>' % (i, i)
+        for i in range(5)
+    )
+    return [
+        b'<order id="%d"><customer>c%d</customer>%s</order>' % (i, i, items)
+        for i in range(count)
+    ]
+
+
+def pickled(docs: list[bytes], workers: int) -> None:
+    with Pool(workers) as pool:
+        for _ in pool.imap(Order.model_validate_xml, docs, chunksize=64):
+            pass
+
+
+def json_lazy(docs: list[bytes], workers: int) -> None:
+    validator = BatchValidator(Order)
+    for _ in validator.validate_parallel(docs, workers=workers):
+        pass
+
+
+def json_accessed(docs: list[bytes], workers: int) -> None:
+    validator = BatchValidator(Order)
+    for chunk in validator.validate_parallel(docs, workers=workers):
+        for _ in chunk:
+            pass
+
+
+def serial(docs: list[bytes], workers: int) -> None:
+    for _ in BatchValidator(Order).validate(docs):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    docs = make_docs(args.docs)
+    print(f"{args.docs} documents, {args.workers} workers")
+    functions: list[tuple[str, Callable[[list[bytes], int], None]]] = [
+        ("serial", serial),
+        ("pickled models", pickled),
+        ("JSON, not accessed", json_lazy),
+        ("JSON, all accessed", json_accessed),
+    ]
+    for name, function in functions:
+        start = time.perf_counter()
+        function(docs, args.workers)
+        seconds = time.perf_counter() - start
+        print(f"{name:>20}: {seconds:6.2f}s, {args.docs / seconds:8.0f} docs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare the peak memory (maximum resident set size) of validating a large
+generated file read into bytes first, with passing the path, a file object
+or an mmap of the file. Each is run in a fresh process.
+
+    python benchmarks/sources.py [--elements N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPT = """
+import mmap, resource, sys, time
+from pathlib import Path
+from xml_to_pydantic import DocModel, XpathField
+
+class Record(DocModel):
+    title: str
+    values: list[int] = XpathField("./values/v/text()")
+
+path = Path(sys.argv[2])
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if sys.argv[1] == "bytes":
+    Record.model_validate_xml(path.read_bytes())
+elif sys.argv[1] == "path":
+    Record.model_validate_xml(path)
+elif sys.argv[1] == "file":
+    with path.open("rb") as file:
+        Record.model_validate_xml(file)
+else:
+    with path.open("rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            Record.model_validate_xml(mapped)
+seconds = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(seconds, after - before)
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "doc.xml"
+        with path.open("w") as file:
+            file.write("<doc><title>hello</title><values>")
+            file.write("".join(f"<v>{i}</v>" for i in range(100)))
+            file.write("</values>")
+            for _ in range(args.elements):
+                file.write("<other><x>a</x><y>b</y></other>")
+            file.write("</doc>")
+        print(f"{path.stat().st_size / 1e6:.1f} MB document")
+
+        for source in ["bytes", "path", "file", "mmap"]:
+            proc = subprocess.run(
+                [sys.executable, "-c", SCRIPT, source, str(path)],  # noqa: S603
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            seconds, max_rss_kb = proc.stdout.split()
+            print(
+                f"{source:>6}: {float(seconds) * 1000:8.1f} ms, "
+                f"peak memory +{int(max_rss_kb) / 1024:.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
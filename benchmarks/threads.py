@@ -0,0 +1,126 @@
+"""
+Validate the patents in the test data from several threads at once, with
+the generic and the generated extraction, and compare an XPath object shared
+between the threads with a _LocalXPath (compiled once per thread).
+
+Each thread validates every document, so with perfect scaling the time stays
+the same as threads are added. With the GIL, only the parts of lxml that
+release it (parsing, XPath evaluation) can overlap; on a free-threaded build
+of Python, the whole extraction can.
+
+    python benchmarks/threads.py [--runs N] [--threads 1 2 4 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+
+from lxml import etree
+
+from xml_to_pydantic import ConfigDict, DocModel, XpathField
+from xml_to_pydantic.docs import _LocalXPath
+from xml_to_pydantic.stream import iter_documents
+
+DATA_FILE = (
+    Path(__file__).parent.parent / "tests" / "endtoend" / "data" / "ipg240109_head.xml"
+)
+
+
+class Applicant(DocModel):
+    model_config = ConfigDict(xpath_root="./addressbook")
+    last_name: str | None = XpathField("./last-name/text()", default=None)
+    first_name: str | None = XpathField("./first-name/text()", default=None)
+    country: str | None = XpathField("./address/country/text()", default=None)
+
+
+class Patent(DocModel):
+    model_config = ConfigDict(xpath_root="/us-patent-grant/us-bibliographic-data-grant")
+    title: str = XpathField("./invention-title/text()")
+    number: str = XpathField("./publication-reference/document-id/doc-number/text()")
+    claims: int = XpathField("./number-of-claims/text()")
+    applicants: list[Applicant] = XpathField(".//us-applicant", default=[])
+
+
+class GeneratedPatent(Patent):
+    model_config = ConfigDict(codegen=True)
+
+
+def validate(cls: type[DocModel], docs: list[bytes]) -> None:
+    for doc in docs:
+        cls.model_validate_xml(doc)
+
+
+def evaluate(
+    xpath: Callable[[etree._Element], Any], roots: list[etree._Element]
+) -> None:
+    for root in roots:
+        xpath(root)
+
+
+def on_threads(function: Callable[[], object], threads: int) -> None:
+    barrier = threading.Barrier(threads)
+
+    def run() -> None:
+        barrier.wait()
+        function()
+
+    with ThreadPoolExecutor(threads) as executor:
+        for future in [executor.submit(run) for _ in range(threads)]:
+            future.result()
+
+
+def best_time(function: Callable[[], object], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    docs = [doc.data for doc in iter_documents([DATA_FILE])]
+    roots = [etree.fromstring(doc) for doc in docs]  # noqa: S320
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(
+        f"{len(docs)} documents per thread, best of {args.runs} runs, "
+        f"GIL {'enabled' if gil else 'disabled'}"
+    )
+
+    query = "count(//*[contains(text(), 'a')])"
+    shared = etree.XPath(query)
+    local = _LocalXPath(query)
+    cases: list[tuple[str, Callable[[], object]]] = [
+        ("generic", partial(validate, Patent, docs)),
+        ("codegen", partial(validate, GeneratedPatent, docs)),
+        ("shared XPath", partial(evaluate, shared, roots)),
+        ("_LocalXPath", partial(evaluate, local, roots)),
+    ]
+    for name, function in cases:
+        times = [
+            best_time(partial(on_threads, function, threads), args.runs)
+            for threads in args.threads
+        ]
+        print(
+            f"{name:>12}: "
+            + ", ".join(
+                f"{threads} threads {seconds * 1000:7.1f} ms"
+                for threads, seconds in zip(args.threads, times)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare validating every patent in the test data and then keeping those with
+a GB applicant, with filtering the documents by a where expression before
+they are extracted and validated.
+
+    python benchmarks/where.py [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+from xml_to_pydantic import BatchValidator, ConfigDict, DocModel, XpathField
+from xml_to_pydantic.stream import iter_documents
+
+DATA_FILE = (
+    Path(__file__).parent.parent / "tests" / "endtoend" / "data" / "ipg240109_head.xml"
+)
+
+
+class Applicant(DocModel):
+    model_config = ConfigDict(xpath_root="./addressbook")
+    last_name: str | None = XpathField("./last-name/text()", default=None)
+    first_name: str | None = XpathField("./first-name/text()", default=None)
+    country: str | None = XpathField("./address/country/text()", default=None)
+
+
+class Patent(DocModel):
+    model_config = ConfigDict(xpath_root="/us-patent-grant/us-bibliographic-data-grant")
+    title: str = XpathField("./invention-title/text()")
+    kind: str = XpathField("./publication-reference/document-id/kind/text()")
+    number: str = XpathField("./publication-reference/document-id/doc-number/text()")
+    date: str = XpathField("./publication-reference/document-id/date/text()")
+    claims: int = XpathField("./number-of-claims/text()")
+    applicants: list[Applicant] = XpathField(".//us-applicant", default=[])
+
+
+def filter_after(docs: list[bytes]) -> int:
+    patents = BatchValidator(Patent).validate(docs)
+    return sum(
+        any(applicant.country == "GB" for applicant in patent.applicants)
+        for patent in patents
+    )
+
+
+def filter_before(docs: list[bytes]) -> int:
+    validator = BatchValidator(Patent, where="//us-applicant//country = 'GB'")
+    return sum(1 for _ in validator.validate(docs))
+
+
+def best_time(function: Callable[[], object], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    docs = [doc.data for doc in iter_documents([DATA_FILE])]
+    print(f"{len(docs)} documents, best of {args.runs} runs")
+    for function in [filter_after, filter_before]:
+        matches = function(docs)
+        seconds = best_time(partial(function, docs), args.runs)
+        print(f"{function.__name__:>14}: {seconds * 1000:6.1f} ms ({matches} matches)")
+
+
+if __name__ == "__main__":
+    main()
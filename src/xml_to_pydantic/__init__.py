@@ -1,10 +1,21 @@
+from .adapter import DocAdapter
+from .arrays import NumpyArray
+from .batch import (
+    BatchStats,
+    BatchValidator,
+    Column,
+    DocError,
+    ModelChunk,
+    validate_columns,
+)
+from .cache import CacheStats, DirectoryStorage, MemoryStorage, ResultCache
+from .errors import DocLimitError, DocModelError, DocParsingError
+from .limits import DocLimits
 from .model import (
     ConfigDict,
     CssField,
     DocField,
     DocModel,
-    DocModelError,
-    DocParsingError,
     XpathField,
 )
 
@@ -12,11 +23,25 @@ __version__ = "0.2"
 
 __all__ = [
     "__version__",
+    "BatchStats",
+    "BatchValidator",
+    "CacheStats",
+    "Column",
     "ConfigDict",
     "CssField",
+    "DirectoryStorage",
+    "DocAdapter",
+    "DocError",
+    "DocLimitError",
+    "DocLimits",
     "DocModel",
     "DocField",
     "DocModelError",
     "DocParsingError",
+    "MemoryStorage",
+    "ModelChunk",
+    "NumpyArray",
+    "ResultCache",
     "XpathField",
+    "validate_columns",
 ]
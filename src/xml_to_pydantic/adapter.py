@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, Generic, Literal, TypeVar, overload
+
+from lxml import etree
+from pydantic import TypeAdapter
+from typing_extensions import get_origin
+
+from .docs import (
+    EXSLT_NAMESPACES,
+    DocSource,
+    FieldQuery,
+    HtmlDoc,
+    QueryReturn,
+    XmlDoc,
+    _css_to_xpath,
+    _first,
+    _LocalXPath,
+)
+from .errors import DocModelError, DocParsingError
+from .model import _extract_field, _result_as_list, _single_valued
+from .typing import _is_optional
+
+T = TypeVar("T")
+
+
+class DocAdapter(Generic[T]):
+    """
+    Validate documents against a type that isn't a DocModel, such as
+    list[Record] or Record | None, as pydantic's TypeAdapter does for Python
+    objects. The query selects the values for the type from the document:
+    by default, the root element. As for a model's fields, a type that takes
+    a single value gets the first result, unless strict_matches is set.
+
+    The query is compiled, and the pydantic validator built, once when the
+    adapter is created, so an adapter should be reused across documents. It
+    can be shared between threads.
+    """
+
+    @overload
+    def __init__(  # noqa: PLR0913
+        self,
+        type_: type[T],
+        query: str = ".",
+        *,
+        query_type: Literal["xpath", "css"] = "xpath",
+        intern: bool = False,
+        normalize_space: bool = False,
+        strip: bool = False,
+        drop_blank: bool = False,
+        strict_matches: bool = False,
+    ): ...  # pragma: no cover
+
+    # As for TypeAdapter, types that aren't classes (such as unions) need the
+    # type parameter to be given: DocAdapter[Record | None](Record | None)
+    @overload
+    def __init__(  # noqa: PLR0913
+        self,
+        type_: Any,
+        query: str = ".",
+        *,
+        query_type: Literal["xpath", "css"] = "xpath",
+        intern: bool = False,
+        normalize_space: bool = False,
+        strip: bool = False,
+        drop_blank: bool = False,
+        strict_matches: bool = False,
+    ): ...  # pragma: no cover
+
+    def __init__(  # noqa: PLR0913
+        self,
+        type_: Any,
+        query: str = ".",
+        *,
+        query_type: Literal["xpath", "css"] = "xpath",
+        intern: bool = False,
+        normalize_space: bool = False,
+        strip: bool = False,
+        drop_blank: bool = False,
+        strict_matches: bool = False,
+    ):
+        _, field_type = _is_optional(type_)
+        origin = get_origin(field_type) or field_type
+        if isinstance(origin, type) and issubclass(origin, Mapping):
+            raise DocModelError(
+                f"Unable to use type {type_} in a DocAdapter: mappings can't "
+                "be extracted from query results, use a list of models instead"
+            )
+
+        self.type = type_
+        self.query = FieldQuery(
+            query_type,
+            query,
+            intern=intern,
+            normalize_space=normalize_space,
+            strip=strip,
+            drop_blank=drop_blank,
+            first=not strict_matches and _single_valued(type_),
+        )
+        self.as_list = _result_as_list(origin)
+        self.adapter: TypeAdapter[T] = TypeAdapter(type_)
+
+        # CSS is translated differently for HTML
+        try:
+            if query_type == "xpath":
+                self.xml_query = self.html_query = self._compile(query)
+            else:
+                self.xml_query, self.html_query = (
+                    self._compile(_css_to_xpath(query, html)) for html in [False, True]
+                )
+        except etree.XPathSyntaxError as err:
+            raise DocModelError(f"Invalid query {query!r} for {type_}") from err
+
+    def _compile(self, xpath: str) -> _LocalXPath:
+        if self.query.stops_early:
+            xpath = _first(xpath)
+        return _LocalXPath(xpath, namespaces=EXSLT_NAMESPACES, smart_strings=False)
+
+    def __repr__(self) -> str:
+        return f"DocAdapter({self.type!r}, {self.query.query!r})"
+
+    def validate_xml(self, xml: DocSource, *, encoding: str | None = None) -> T:
+        doc = XmlDoc(xml, encoding)
+        return self.adapter.validate_python(self.extract(doc, False))
+
+    def validate_html(self, html: DocSource, *, encoding: str | None = None) -> T:
+        doc = HtmlDoc(html, encoding)
+        return self.adapter.validate_python(self.extract(doc, True))
+
+    def extract(self, doc: XmlDoc | HtmlDoc, html: bool) -> Any:
+        """The data for the type from a parsed document, before validation"""
+        try:
+            results = (self.html_query if html else self.xml_query)(doc.doc)
+            if not isinstance(results, list):
+                results = [results]
+            items: QueryReturn = [
+                XmlDoc(item) if isinstance(item, etree._Element) else item
+                for item in results
+            ]
+            if self.query.cleans:
+                items = self.query.clean(items)
+            if self.query.first:
+                items = items[:1]
+            if len(items) == 0:
+                return [] if self.as_list else None
+            return _extract_field(items, self.type)
+
+        except (AttributeError, etree.XPathError) as err:
+            raise DocParsingError(f"Error parsing {self!r}") from err
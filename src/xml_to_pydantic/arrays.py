@@ -0,0 +1,118 @@
+"""
+NumPy array fields, for documents with many numeric values per field.
+
+NumPy is an optional dependency: it is only imported when a NumpyArray
+annotation is created, which needs the NumPy scalar type anyway.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from pydantic import GetCoreSchemaHandler, GetJsonSchemaHandler
+from pydantic.json_schema import JsonSchemaValue
+from pydantic_core import core_schema
+from typing_extensions import Annotated
+
+__all__ = ["NumpyArray"]
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+    # For type checkers, the field is the array type (NumpyArray[np.float64]
+    # is NDArray[np.float64])
+    from numpy.typing import NDArray as NumpyArray
+
+
+class NumpyArray:  # type: ignore[no-redef]
+    """
+    A one dimensional NumPy array field, as NumpyArray[np.float64].
+
+    All the text results of the query are converted to the dtype in one go,
+    rather than being validated one by one, as for list[float]. The values
+    are stored as a single block of memory, rather than one Python object
+    each. Integer and float dtypes are supported.
+    """
+
+    def __class_getitem__(cls, dtype: Any) -> Any:
+        try:
+            import numpy as np
+        except ImportError as err:  # pragma: no cover
+            raise ImportError("NumpyArray requires NumPy to be installed") from err
+
+        np_dtype = np.dtype(dtype)
+        if np_dtype.kind not in "iuf":
+            raise TypeError(
+                f"NumpyArray only supports integer and float dtypes, not {np_dtype}"
+            )
+        # At runtime, the field's type is the ndarray class itself, so the
+        # field is always seen as taking a list of results. NDArray[dtype]
+        # isn't a class, and on Python 3.8 (with NumPy's own generic alias)
+        # get_origin doesn't give one for it either.
+        return Annotated[np.ndarray, _ArraySchema(np_dtype)]
+
+
+class _ArraySchema:
+    """The validation (and serialization) of a NumpyArray field"""
+
+    def __init__(self, dtype: np.dtype[Any]):
+        self.dtype = dtype
+
+    def __repr__(self) -> str:
+        return f"NumpyArray[{self.dtype}]"
+
+    def validate(self, value: Any) -> np.ndarray[Any, Any]:
+        if isinstance(value, (str, bytes)):
+            raise ValueError("Input should be a sequence of values, not a string")
+        # NumPy raises these for values out of range or of the wrong type,
+        # which pydantic would pass on rather than report as a ValidationError
+        try:
+            result = self._convert(value)
+        except (OverflowError, TypeError) as err:
+            raise ValueError(str(err)) from err
+        if result.ndim != 1:
+            raise ValueError(
+                f"Input should be one dimensional, not {result.ndim} dimensional"
+            )
+        return result
+
+    def _convert(self, value: Any) -> np.ndarray[Any, Any]:
+        import numpy as np
+
+        if self.dtype.kind == "f":
+            return np.asarray(value, dtype=self.dtype)
+
+        # Before NumPy 2, text out of an integer dtype's range is wrapped
+        # (as "-1" to 255 for uint8), rather than raising, so the values are
+        # converted to 64 bits and checked against the range first
+        info = np.iinfo(self.dtype)
+        out_of_range = ValueError(
+            f"Input should be between {info.min} and {info.max} for {self.dtype}"
+        )
+        if self.dtype == np.uint64:
+            # Too large for int64, so only the sign is checked first
+            signs = np.asarray(value, dtype=np.float64)
+            if signs.size > 0 and signs.min() < 0:
+                raise out_of_range
+            return np.asarray(value, dtype=np.uint64)
+
+        wide = np.asarray(value, dtype=np.int64)
+        if wide.size > 0 and (wide.min() < info.min or wide.max() > info.max):
+            raise out_of_range
+        return wide.astype(self.dtype, copy=False)
+
+    def __get_pydantic_core_schema__(
+        self, source: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            self.validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda array: array.tolist(), when_used="json"
+            ),
+        )
+
+    def __get_pydantic_json_schema__(
+        self, schema: core_schema.CoreSchema, handler: GetJsonSchemaHandler
+    ) -> JsonSchemaValue:
+        item_type = "number" if self.dtype.kind == "f" else "integer"
+        return {"type": "array", "items": {"type": item_type}}
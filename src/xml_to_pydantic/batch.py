@@ -0,0 +1,523 @@
+from __future__ import annotations
+
+import os
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+    overload,
+)
+from weakref import WeakKeyDictionary
+
+from lxml import etree
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import InitErrorDetails
+from typing_extensions import Annotated
+
+from .docs import EXSLT_NAMESPACES, DocSource, HtmlDoc, XmlDoc, _LocalXPath
+from .errors import DocModelError, DocParsingError
+from .model import (
+    ConfigDict,
+    DocModel,
+    _cached,
+    _extract_document,
+    _has_lazy_fields,
+    _moved_error,
+    _read_lazy,
+)
+from .stream import Document
+from .typing import _is_optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    from multiprocessing.pool import AsyncResult
+
+Model = TypeVar("Model", bound=DocModel)
+State = TypeVar("State")
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+OnError = Literal["raise", "collect", "skip"]
+
+# A chunk of documents sent to a worker, with their positions in the batch
+Chunk = List[Tuple[int, Union[DocSource, Document]]]
+
+# Numeric columns are returned in compact arrays, rather than lists of objects
+_ARRAY_TYPECODES = {bool: "b", int: "q", float: "d"}
+
+
+@dataclass
+class Column:
+    """
+    The values of one field across a batch of documents. Where a document
+    has no value (None), the mask is True. In arrays, those positions hold 0.
+    """
+
+    data: Sequence[Any]
+    mask: Sequence[bool]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+_ADAPTERS: WeakKeyDictionary[type[DocModel], dict[str, TypeAdapter[list[Any]]]] = (
+    WeakKeyDictionary()
+)
+
+
+def _column_adapters(cls: type[DocModel]) -> dict[str, TypeAdapter[list[Any]]]:
+    return _cached(_ADAPTERS, cls, _build_column_adapters)
+
+
+def _build_column_adapters(cls: type[DocModel]) -> dict[str, TypeAdapter[list[Any]]]:
+    adapters = {}
+    for name, info in cls.model_fields.items():
+        annotation = info.annotation
+        if info.metadata:
+            annotation = Annotated[(annotation, *info.metadata)]  # type: ignore
+        adapters[name] = TypeAdapter(List[annotation])  # type: ignore
+    return adapters
+
+
+def validate_columns(
+    cls: type[DocModel],
+    docs: Iterable[DocSource],
+    *,
+    doc_type: Literal["xml", "html"] = "xml",
+    numpy: bool = False,
+) -> dict[str, Column]:
+    """
+    Extract the fields of a model from many documents into columns, rather
+    than into one model instance per document.
+
+    Each column is validated in one go against the field's annotation (with
+    any constraints from the field definition). Validators defined on the
+    model itself (field_validator, model_validator) are not run.
+
+    Integer, float and bool columns are returned as array.array, or as NumPy
+    arrays (values and mask) when numpy=True. Other columns are lists.
+    """
+    fields = cls.model_fields
+    present: dict[str, list[Any]] = {name: [] for name in fields}
+    present_index: dict[str, list[int]] = {name: [] for name in fields}
+    count = 0
+    for index, doc in enumerate(docs):
+        extracted_data = _extract_document(cls, doc_type, doc)
+        for name, value in extracted_data.items():
+            present[name].append(value)
+            present_index[name].append(index)
+        count = index + 1
+
+    errors: list[InitErrorDetails] = []
+    columns = {}
+    for name, adapter in _column_adapters(cls).items():
+        info = fields[name]
+        values: list[Any] = [None] * count
+        is_present = [False] * count
+
+        try:
+            validated = adapter.validate_python(present[name])
+        except ValidationError as err:
+            for error in err.errors():
+                # The location starts with the position in the list of values
+                doc_index = present_index[name][int(error["loc"][0])]
+                errors.append(_moved_error(error, (doc_index, name, *error["loc"][1:])))
+            validated = []
+
+        for index, value in zip(present_index[name], validated):
+            values[index] = value
+            is_present[index] = True
+
+        if not all(is_present):
+            if info.is_required():
+                # Only for documents without a value, rather than those whose
+                # value failed validation
+                extracted = set(present_index[name])
+                errors.extend(
+                    InitErrorDetails(type="missing", loc=(index, name), input={})
+                    for index in range(count)
+                    if index not in extracted
+                )
+            else:
+                values = [
+                    (
+                        value
+                        if is_present[index]
+                        else info.get_default(call_default_factory=True)
+                    )
+                    for index, value in enumerate(values)
+                ]
+
+        columns[name] = _make_column(values, info.annotation, numpy)
+
+    if errors:
+        raise ValidationError.from_exception_data(cls.__name__, errors)
+
+    return columns
+
+
+def _make_column(values: list[Any], annotation: Any, numpy: bool) -> Column:
+    mask = [value is None for value in values]
+    _, annotation = _is_optional(annotation)
+    typecode = _ARRAY_TYPECODES.get(annotation)
+    if typecode is None:
+        return Column(data=values, mask=mask)
+
+    filled = [0 if value is None else value for value in values]
+    if not numpy:
+        return Column(data=array(typecode, filled), mask=mask)
+
+    try:
+        import numpy as np
+    except ImportError as err:  # pragma: no cover
+        raise ImportError("numpy=True requires NumPy to be installed") from err
+
+    return Column(
+        data=cast(Sequence[Any], np.array(filled, dtype=annotation)),
+        mask=cast(Sequence[bool], np.array(mask, dtype=bool)),
+    )
+
+
+@dataclass
+class DocError:
+    """
+    Why a document could not be validated: the exception's type and message,
+    and for validation errors, the location and type of each error.
+
+    The index is the position of the document in the batch, or for a
+    Document read from a file, its position in that file (with the file
+    name as the source and its byte offset).
+    """
+
+    index: int
+    error: str
+    message: str
+    details: list[dict[str, Any]] = field(default_factory=list)
+    source: str | None = None
+    offset: int | None = None
+
+
+@dataclass
+class BatchStats:
+    documents: int = 0
+    failed: int = 0
+    # Documents that didn't match the where predicate
+    filtered: int = 0
+    # The number of failed documents for each type of exception
+    by_error: dict[str, int] = field(default_factory=dict)
+
+
+# Errors caused by the content of a document (rather than by the model)
+_DOCUMENT_ERRORS = (ValidationError, DocParsingError, etree.LxmlError, ValueError)
+
+# The state made by the initializer of a worker process (see _map_chunks)
+_WORKER: dict[str, Any] = {}
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+# These two only run in the worker processes
+def _init_worker(  # pragma: no cover
+    init: Callable[..., Any], initargs: tuple[Any, ...]
+) -> None:
+    _WORKER["state"] = init(*initargs)
+
+
+def _work_in_worker(  # pragma: no cover
+    work: Callable[[Any, Any], Any], chunk: Any
+) -> Any:
+    return work(_WORKER["state"], chunk)
+
+
+def _map_chunks(
+    chunks: Iterable[list[Item]],
+    work: Callable[[State, list[Item]], Result],
+    init: Callable[..., State],
+    initargs: tuple[Any, ...],
+    workers: int,
+) -> Iterator[tuple[list[Item], Result]]:
+    """
+    Apply work(state, chunk) to each chunk, yielding the chunks and their
+    results in order. The state (eg a validator) is made by init(*initargs)
+    in each worker process, or with one worker, once for this call, with
+    the chunks worked on in this process.
+
+    The functions and chunks have to be picklable for the worker processes.
+    Only a few chunks per worker are read ahead of the results, so memory
+    stays bounded on large inputs.
+    """
+    if workers == 1:
+        state = init(*initargs)
+        for chunk in chunks:
+            yield chunk, work(state, chunk)
+        return
+
+    # multiprocessing is only imported when there are worker processes, as
+    # it is slow to import
+    from multiprocessing import Pool
+
+    with Pool(workers, initializer=_init_worker, initargs=(init, initargs)) as pool:
+        pending: deque[tuple[list[Item], AsyncResult[Result]]] = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.apply_async(_work_in_worker, (work, chunk))))
+            if len(pending) > 2 * workers:
+                done_chunk, result = pending.popleft()
+                yield done_chunk, result.get()
+        for done_chunk, result in pending:
+            yield done_chunk, result.get()
+
+
+def _chunk_validator(
+    cls: type[DocModel], doc_type: Literal["xml", "html"], where: str | None
+) -> BatchValidator[Any]:
+    return BatchValidator(cls, doc_type=doc_type, on_error="skip", where=where)
+
+
+def _validate_chunk(
+    validator: BatchValidator[Any], chunk: Chunk
+) -> list[bytes | DocError | None]:
+    """Validate a chunk in a worker, returning the JSON of each model"""
+    results: list[bytes | DocError | None] = []
+    for index, doc in chunk:
+        result = validator.validate_one(doc, index)
+        if isinstance(result, DocModel):
+            result = result.__pydantic_serializer__.to_json(result)
+        results.append(result)
+    return results
+
+
+class ModelChunk(Sequence[Model]):
+    """
+    The valid models from a chunk of documents validated in a worker process.
+
+    Models are sent back from the workers as JSON, which is much quicker to
+    send between processes than pickled models, and each one is only
+    validated into a model (from the JSON) when it is first accessed. The
+    JSON itself is available as `json`, for results that are only written
+    out again. The fields of the model must round trip through JSON.
+    """
+
+    def __init__(self, cls: type[Model], json: list[bytes]):
+        self.cls = cls
+        self.json = json
+        self._models: list[Model | None] = [None] * len(json)
+
+    def __len__(self) -> int:
+        return len(self.json)
+
+    @overload
+    def __getitem__(self, index: int) -> Model: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Model]: ...
+
+    def __getitem__(self, index: int | slice) -> Model | list[Model]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        model = self._models[index]
+        if model is None:
+            model = self.cls.model_validate_json(self.json[index])
+            self._models[index] = model
+        return model
+
+
+class BatchValidator(Generic[Model]):
+    """
+    Validate many documents against a model, carrying on past any that
+    fail. What happens to a failure depends on on_error:
+
+    - "raise": the exception is raised, as from model_validate_xml
+    - "collect": a DocError is added to `errors`
+    - "skip": the document is only counted in `stats`
+
+    With where, an XPath expression (as "//country = 'US'"), only the
+    documents for which it is true are extracted and validated. The others
+    are only parsed, and counted in `stats.filtered`.
+    """
+
+    def __init__(
+        self,
+        cls: type[Model],
+        *,
+        doc_type: Literal["xml", "html"] = "xml",
+        on_error: OnError = "collect",
+        where: str | None = None,
+    ):
+        self.cls = cls
+        self.doc_type = doc_type
+        self.on_error = on_error
+        self.where = where
+        self.errors: list[DocError] = []
+        self.stats = BatchStats()
+
+        self._where = None
+        if where is not None:
+            try:
+                self._where = _LocalXPath(
+                    f"boolean({where})", namespaces=EXSLT_NAMESPACES
+                )
+            except etree.XPathSyntaxError as err:
+                raise DocModelError(f"Invalid where expression {where!r}") from err
+
+    def validate_one(
+        self, doc: DocSource | Document, index: int = 0
+    ) -> Model | DocError | None:
+        """
+        Validate one document, returning the model or (unless on_error is
+        "raise") the error, or None if it doesn't match the where
+        expression. Errors are counted, but not collected.
+        """
+        return cast(Union[Model, DocError, None], self._process(doc, index, True))
+
+    def extract_one(
+        self, doc: DocSource | Document, index: int = 0
+    ) -> dict[str, Any] | DocError | None:
+        """
+        As validate_one, but returning the extracted data without validating
+        it (as from model_extract_xml), so only parsing errors are reported.
+        """
+        return cast(
+            Union[Dict[str, Any], DocError, None], self._process(doc, index, False)
+        )
+
+    def _process(
+        self, doc: DocSource | Document, index: int, validate: bool
+    ) -> Model | dict[str, Any] | DocError | None:
+        source = offset = None
+        if isinstance(doc, Document):
+            source, index, offset = doc.source, doc.index, doc.offset
+            doc = doc.data
+
+        self.stats.documents += 1
+        try:
+            if self._where is not None:
+                # The document is parsed once, for both the filter and the
+                # extraction
+                if not isinstance(doc, etree._Element):
+                    limits = cast(ConfigDict, self.cls.model_config).get("limits")
+                    if limits is not None:
+                        doc = limits.check_size(doc)
+                    doc_class = HtmlDoc if self.doc_type == "html" else XmlDoc
+                    doc = doc_class(doc).doc
+                if not self._where(doc):
+                    self.stats.filtered += 1
+                    return None
+
+            extracted_data = _extract_document(self.cls, self.doc_type, doc)
+            result = (
+                self.cls.model_validate(extracted_data) if validate else extracted_data
+            )
+            # Lazy fields are read here, so that their errors are handled
+            # as for the rest of the document
+            if _has_lazy_fields(self.cls):
+                result = _read_lazy(result)
+            return result
+        except _DOCUMENT_ERRORS as err:
+            name = type(err).__name__
+            self.stats.failed += 1
+            self.stats.by_error[name] = self.stats.by_error.get(name, 0) + 1
+            if self.on_error == "raise":
+                raise
+
+            details = []
+            if isinstance(err, ValidationError):
+                details = [
+                    {
+                        "loc": list(error["loc"]),
+                        "type": error["type"],
+                        "msg": error["msg"],
+                    }
+                    for error in err.errors()
+                ]
+            return DocError(index, name, str(err), details, source, offset)
+
+    def validate(self, docs: Iterable[DocSource | Document]) -> Iterator[Model]:
+        """Validate the documents lazily, yielding the valid models in order"""
+        for index, doc in enumerate(docs):
+            result = self.validate_one(doc, index)
+            if isinstance(result, DocModel):
+                yield result
+            elif result is not None and self.on_error == "collect":
+                self.errors.append(result)
+
+    def validate_parallel(
+        self,
+        docs: Iterable[DocSource | Document],
+        *,
+        workers: int | None = None,
+        chunksize: int = 64,
+    ) -> Iterator[ModelChunk[Model]]:
+        """
+        Validate the documents in worker processes (by default, one per CPU),
+        yielding a ModelChunk of the valid models for each chunk of
+        documents, in order. Errors are handled as by validate, and counted
+        in `stats`.
+
+        The model has to be importable by the workers, and the documents
+        picklable (so not parsed elements). Only a few chunks per worker are
+        read ahead of the results, so memory stays bounded on large inputs.
+        With one worker, the chunks are validated in this process.
+        """
+        workers = workers or os.cpu_count() or 1
+        results = _map_chunks(
+            _chunks(enumerate(docs), chunksize),
+            _validate_chunk,
+            _chunk_validator,
+            (self.cls, self.doc_type, self.where),
+            workers,
+        )
+        for chunk, chunk_results in results:
+            yield self._collect(chunk, chunk_results)
+
+    def _collect(
+        self, chunk: Chunk, results: list[bytes | DocError | None]
+    ) -> ModelChunk[Model]:
+        json = []
+        for (index, doc), result in zip(chunk, results):
+            if result is None:
+                self.stats.documents += 1
+                self.stats.filtered += 1
+            elif isinstance(result, bytes):
+                self.stats.documents += 1
+                json.append(result)
+            elif self.on_error == "raise":
+                # Not every exception can be sent back from a worker (lxml's
+                # can't be pickled), so the document is validated again here
+                # to raise it
+                self.validate_one(doc, index)
+            else:
+                self.stats.documents += 1
+                self.stats.failed += 1
+                self.stats.by_error[result.error] = (
+                    self.stats.by_error.get(result.error, 0) + 1
+                )
+                if self.on_error == "collect":
+                    self.errors.append(result)
+        return ModelChunk(self.cls, json)
+
+    def extract(self, docs: Iterable[DocSource | Document]) -> Iterator[dict[str, Any]]:
+        """As validate, but yielding the extracted data without validating it"""
+        for index, doc in enumerate(docs):
+            result = self.extract_one(doc, index)
+            if isinstance(result, dict):
+                yield result
+            elif result is not None and self.on_error == "collect":
+                self.errors.append(result)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Protocol
+
+from pydantic_core import from_json, to_json
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .docs import Buffer
+    from .model import DocModel
+
+
+class CacheStorage(Protocol):
+    def get(self, key: str) -> bytes | None: ...  # pragma: no cover
+
+    def set(self, key: str, value: bytes) -> None: ...  # pragma: no cover
+
+    def __len__(self) -> int: ...  # pragma: no cover
+
+
+class _Bounded:
+    """
+    Least-recently-used bookkeeping shared by the storage backends: tracks
+    the size of each entry, and which keys to evict to stay within bounds.
+    The backends hold the lock while they read or change entries, so that
+    they can be shared between threads.
+    """
+
+    def __init__(self, max_entries: int | None, max_bytes: int | None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizes: OrderedDict[str, int] = OrderedDict()
+        self.total_bytes = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def touch(self, key: str) -> None:
+        self.sizes.move_to_end(key)
+
+    def remove(self, key: str) -> None:
+        self.total_bytes -= self.sizes.pop(key, 0)
+
+    def add(self, key: str, size: int) -> list[str]:
+        self.total_bytes += size - self.sizes.pop(key, 0)
+        self.sizes[key] = size
+
+        evicted = []
+        while self.sizes and (
+            (self.max_entries is not None and len(self.sizes) > self.max_entries)
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            old_key, old_size = self.sizes.popitem(last=False)
+            self.total_bytes -= old_size
+            self.evictions += 1
+            evicted.append(old_key)
+        return evicted
+
+
+class MemoryStorage(_Bounded):
+    """Keep cache entries in a dictionary, evicting the least recently used"""
+
+    def __init__(self, max_entries: int | None = 1024, max_bytes: int | None = None):
+        super().__init__(max_entries, max_bytes)
+        self.values: dict[str, bytes] = {}
+
+    def get(self, key: str) -> bytes | None:
+        with self.lock:
+            value = self.values.get(key)
+            if value is not None:
+                self.touch(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        with self.lock:
+            self.values[key] = value
+            for old_key in self.add(key, len(value)):
+                del self.values[old_key]
+
+
+class DirectoryStorage(_Bounded):
+    """
+    Keep cache entries as files in a directory, so that they survive
+    between processes. Recency is tracked by the files' modification times.
+
+    Several processes can share the directory: each reads the entries the
+    others write, and each keeps to the bounds for the entries it knows of
+    (those there when it started, and those it has read or written since).
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+    ):
+        super().__init__(max_entries, max_bytes)
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        existing = sorted(
+            (entry.stat().st_mtime_ns, entry.name, entry.stat().st_size)
+            for entry in self.path.iterdir()
+            if entry.suffix == ".json"
+        )
+        for _, name, size in existing:
+            for old_key in self.add(name[: -len(".json")], size):
+                self._file(old_key).unlink()
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def get(self, key: str) -> bytes | None:
+        file = self._file(key)
+        with self.lock:
+            try:
+                value = file.read_bytes()
+                os.utime(file)
+            except FileNotFoundError:
+                # Never written, or evicted by another process
+                self.remove(key)
+                return None
+            # Possibly written by another process
+            for old_key in self.add(key, len(value)):
+                self._file(old_key).unlink(missing_ok=True)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        file = self._file(key)
+        with self.lock:
+            # Named for the process, so that processes writing the same
+            # entry don't write to the same file
+            tmp_file = self.path / f"{key}.{os.getpid()}.tmp"
+            tmp_file.write_bytes(value)
+            tmp_file.replace(file)
+            for old_key in self.add(key, len(value)):
+                self._file(old_key).unlink(missing_ok=True)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    Cache of the data extracted from documents, keyed on the model class
+    and a hash of the document's content.
+
+    On a hit, the document is neither parsed nor queried, and the cached data
+    only goes through pydantic validation. The key uses a fingerprint of the
+    model's queries (and its nested models'), so entries kept on disk are
+    no longer used once a query changes, though a change to the extraction
+    itself (a new version) still needs the cache to be cleared. The cache can
+    be shared between threads, as long as its storage can (as the built in
+    storages can).
+    """
+
+    def __init__(self, storage: CacheStorage | None = None):
+        self.storage = storage if storage is not None else MemoryStorage()
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+
+    def key(
+        self,
+        cls: type[DocModel],
+        doc_type: str,
+        doc: str | bytes | Buffer,
+        encoding: str | None = None,
+    ) -> str:
+        from .model import _fingerprint
+
+        if isinstance(doc, str):
+            doc = doc.encode()
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(f"{_fingerprint(cls)}:{doc_type}:".encode())
+        # The same bytes can give different text in another encoding
+        if encoding is not None:
+            hasher.update(f"{encoding}:".encode())
+        hasher.update(doc)
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        value = self.storage.get(key)
+        with self._stats_lock:
+            if value is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+
+        data: dict[str, Any] = from_json(value)
+        return data
+
+    def set(self, key: str, data: dict[str, Any]) -> dict[str, Any]:
+        """Store the data, returning it as it will be read back"""
+        value = to_json(data)
+        self.storage.set(key, value)
+        stored: dict[str, Any] = from_json(value)
+        return stored
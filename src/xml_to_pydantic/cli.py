@@ -0,0 +1,304 @@
+"""
+Validate documents against a DocModel in bulk, writing the results as
+JSON Lines.
+
+    xml-to-pydantic mypackage.models:Patent data/*.xml -o patents.jsonl -w 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from typing import IO, Any, Iterable, Literal, Optional, Sequence, Tuple
+
+from pydantic_core import to_json
+
+from .batch import BatchValidator, DocError, _chunks, _map_chunks
+from .errors import DocModelError
+from .index import iter_shard
+from .model import DocModel
+from .stream import Checkpoint, Document, expand_paths, is_compressed, iter_documents
+
+# For each document: the JSON of the validated model (or extracted data), or
+# of the error, or None if it didn't match the where expression
+WorkerResult = Optional[Tuple[bool, bytes]]
+
+
+def load_model(reference: str) -> type[DocModel]:
+    """Import a model from a 'module:ClassName' reference"""
+    module_name, _, qualname = reference.partition(":")
+    if not module_name or not qualname:
+        raise ValueError(f"Expected 'module:ClassName', got '{reference}'")
+
+    obj = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+
+    if not (isinstance(obj, type) and issubclass(obj, DocModel)):
+        raise TypeError(f"{reference} is not a DocModel")
+    return obj
+
+
+def _make_validator(
+    reference: str, doc_type: Literal["xml", "html"], where: str | None
+) -> BatchValidator[DocModel]:
+    return BatchValidator(load_model(reference), doc_type=doc_type, where=where)
+
+
+def _to_json(result: DocModel | dict[str, Any] | DocError | None) -> WorkerResult:
+    if result is None:
+        return None
+    if isinstance(result, DocError):
+        return False, json.dumps(asdict(result)).encode()
+    if isinstance(result, dict):
+        return True, to_json(result)
+    return True, result.__pydantic_serializer__.to_json(result)
+
+
+def _validate_chunk(
+    validator: BatchValidator[DocModel], docs: list[Document]
+) -> list[WorkerResult]:
+    return [_to_json(validator.validate_one(doc)) for doc in docs]
+
+
+def _extract_chunk(
+    validator: BatchValidator[DocModel], docs: list[Document]
+) -> list[WorkerResult]:
+    return [_to_json(validator.extract_one(doc)) for doc in docs]
+
+
+@dataclass
+class Stats:
+    documents: int = 0
+    errors: int = 0
+    filtered: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        rate = self.documents / self.seconds if self.seconds else 0.0
+        mb_rate = self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+        filtered = f", {self.filtered} filtered out" if self.filtered else ""
+        return (
+            f"{self.documents} documents ({self.errors} errors{filtered}), "
+            f"{self.bytes / 1e6:.1f} MB in {self.seconds:.2f}s: "
+            f"{rate:.1f} docs/s, {mb_rate:.1f} MB/s"
+        )
+
+
+def run(  # noqa: PLR0913
+    reference: str,
+    docs: Iterable[Document],
+    output: IO[bytes],
+    errors: IO[bytes],
+    *,
+    doc_type: Literal["xml", "html"] = "xml",
+    workers: int = 1,
+    chunksize: int = 64,
+    checkpoint: Checkpoint | None = None,
+    extract_only: bool = False,
+    where: str | None = None,
+) -> Stats:
+    """
+    Validate the documents, writing each model as a line of JSON to output,
+    and each failure as a line of JSON to errors. With extract_only, the
+    extracted data is written instead, without being validated, and with
+    where, documents for which that XPath expression is false are skipped.
+
+    With several workers, only a few chunks per worker are read ahead of
+    the results being written, so memory stays bounded on large inputs.
+    """
+    stats = Stats()
+    start = time.perf_counter()
+
+    results = _map_chunks(
+        _chunks(docs, chunksize),
+        _extract_chunk if extract_only else _validate_chunk,
+        _make_validator,
+        (reference, doc_type, where),
+        workers,
+    )
+    for chunk, chunk_results in results:
+        for doc, result in zip(chunk, chunk_results):
+            stats.documents += 1
+            stats.bytes += len(doc.data)
+            ok = True
+            if result is None:
+                stats.filtered += 1
+            else:
+                ok, line = result
+                (output if ok else errors).write(line + b"\n")
+                stats.errors += not ok
+            if checkpoint is not None:
+                checkpoint.update(doc, failed=not ok)
+
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def _open_output(
+    path: str | None, default: IO[bytes], checkpoint: Checkpoint | None
+) -> IO[bytes]:
+    if path is None or path == "-":
+        return default
+
+    # When resuming, drop anything written after the last checkpoint, as
+    # those documents will be processed again
+    if checkpoint is not None and path in checkpoint.outputs:
+        os.truncate(path, checkpoint.outputs[path])
+        return open(path, "ab")
+    return open(path, "wb")
+
+
+def _open_outputs(
+    stack: ExitStack, args: argparse.Namespace, checkpoint: Checkpoint | None
+) -> tuple[IO[bytes], IO[bytes]]:
+    outputs = {
+        args.output: _open_output(args.output, sys.stdout.buffer, checkpoint),
+        args.errors: _open_output(args.errors, sys.stderr.buffer, checkpoint),
+    }
+    files = {
+        path: file
+        for path, file in outputs.items()
+        if file not in (sys.stdout.buffer, sys.stderr.buffer)
+    }
+    for file in files.values():
+        stack.enter_context(file)
+
+    if checkpoint is not None:
+
+        def record_outputs(checkpoint: Checkpoint) -> None:
+            for file in outputs.values():
+                file.flush()
+            for path, file in files.items():
+                checkpoint.outputs[path] = file.tell()
+
+        checkpoint.on_save = record_outputs
+        stack.enter_context(checkpoint)
+
+    return outputs[args.output], outputs[args.errors]
+
+
+def _shard(value: str) -> tuple[int, int]:
+    shard, _, count = value.partition("/")
+    try:
+        if 1 <= int(shard) <= int(count):
+            return int(shard) - 1, int(count)
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"expected K/N with 1 <= K <= N, got '{value}'")
+
+
+def _arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="xml-to-pydantic",
+        description="Validate XML or HTML documents against a DocModel, "
+        "writing the results as JSON Lines.",
+    )
+    parser.add_argument("model", help="the model to use, as 'module:ClassName'")
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="files, directories or glob patterns; files may contain "
+        "several concatenated XML documents, and may be compressed "
+        "(.gz, .bz2, .xz or .zip)",
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="JSON Lines output (default: stdout)"
+    )
+    parser.add_argument(
+        "-e", "--errors", help="JSON Lines file for failures (default: stderr)"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=64, help="documents sent to a worker at once"
+    )
+    parser.add_argument("--html", action="store_true", help="parse the inputs as HTML")
+    parser.add_argument(
+        "--extract-only",
+        action="store_true",
+        help="write the data extracted for the model, without validating it",
+    )
+    parser.add_argument(
+        "--where",
+        help="only process documents for which this XPath expression is true "
+        "(eg \"//country = 'US'\")",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="progress manifest: resume from it if it exists, and keep it updated",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=1000,
+        help="documents between checkpoint saves",
+    )
+    parser.add_argument(
+        "--shard",
+        type=_shard,
+        help="only process shard K of N (eg 2/8) of each file, split by size",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="no summary")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = _arg_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        model = load_model(args.model)
+    except (ImportError, AttributeError, ValueError, TypeError) as err:
+        parser.error(f"unable to load model: {err}")
+    try:
+        BatchValidator(model, where=args.where)
+    except DocModelError as err:
+        parser.error(str(err))
+
+    paths = list(expand_paths(args.inputs))
+    if not paths:
+        parser.error("no input files found")
+
+    checkpoint = None
+    if args.checkpoint is not None:
+        checkpoint = Checkpoint.open(args.checkpoint, args.checkpoint_interval)
+
+    if args.shard is not None:
+        if any(is_compressed(path) for path in paths):
+            parser.error("--shard needs uncompressed inputs")
+        shard, count = args.shard
+        docs = iter_shard(paths, shard, count, checkpoint)
+    else:
+        docs = iter_documents(paths, checkpoint)
+
+    with ExitStack() as stack:
+        output, errors = _open_outputs(stack, args, checkpoint)
+        stats = run(
+            args.model,
+            docs,
+            output,
+            errors,
+            doc_type="html" if args.html else "xml",
+            workers=args.workers,
+            chunksize=args.chunksize,
+            checkpoint=checkpoint,
+            extract_only=args.extract_only,
+            where=args.where,
+        )
+
+    if not args.quiet:
+        print(stats, file=sys.stderr)
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Generate a specialised extraction function for each model.
+
+The generic extraction works out what to do with each field (is it a nested
+model, a list, a union of models...) from its annotation, for every field of
+every document. Instead, the generated code makes those decisions once, and
+is left with straight-line calls to compiled XPath objects, and direct calls
+to the functions for any nested models. Anything unusual (such as a query
+returning elements for a str field) is handed back to the generic code, so
+the results, and errors, are the same either way.
+"""
+
+from __future__ import annotations
+
+import linecache
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, cast
+
+from lxml import etree
+from typing_extensions import get_args, get_origin
+
+from .docs import (
+    EXSLT_NAMESPACES,
+    FieldQuery,
+    XmlDoc,
+    _css_to_xpath,
+    _direct_query,
+    _first,
+)
+from .errors import DocParsingError
+from .model import ConfigDict, _extract_field, _is_lazy, _result_as_list
+from .typing import _is_optional, _is_union
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .model import DocModel
+
+ExtractFunction = Callable[[etree._Element, bool], Dict[str, Any]]
+
+# A query whose last step selects text or an attribute (and isn't a union)
+# can only return strings, so the results don't need to be checked
+_STRING_QUERY = re.compile(r"[^|]*(?:^|/)\s*(?:text\(\)|@[\w.:\-]+)\s*")
+
+
+def _extract_items(items: list[Any], annotation: Any) -> Any:
+    """Hand the results of a query to the generic extraction"""
+    docs = [
+        XmlDoc(item) if isinstance(item, etree._Element) else item for item in items
+    ]
+    return _extract_field(docs, annotation)
+
+
+def _model_type(annotation: Any) -> Any:
+    """
+    The nested model for the field (as for DocModel or list[DocModel]), or
+    None if the field is not a model. For anything else that isn't a plain
+    value (a union of models), Any is returned, and the field is left to the
+    generic extraction.
+    """
+    _, annotation = _is_optional(annotation)
+    field_type = get_origin(annotation) or annotation
+    field_args = get_args(annotation)
+
+    if hasattr(field_type, "query_fields"):
+        return field_type
+    if _is_union(field_type) and all(
+        hasattr(arg, "query_fields") for arg in field_args
+    ):
+        return Any
+    if (
+        _result_as_list(field_type)
+        and field_args
+        and hasattr(field_args[0], "query_fields")
+    ):
+        return field_args[0]
+    return None
+
+
+class _Generator:
+    """Writes the functions for a model and any models nested in it"""
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        self.namespace: dict[str, Any] = {
+            "_Element": etree._Element,
+            "DocParsingError": DocParsingError,
+            "XPathError": etree.XPathError,
+            "_extract_items": _extract_items,
+        }
+        self.constants = 0
+        self.functions: dict[type[DocModel], str] = {}
+        self.pending: list[type[DocModel]] = []
+
+    def constant(self, prefix: str, value: Any) -> str:
+        name = f"{prefix}{self.constants}"
+        self.constants += 1
+        self.namespace[name] = value
+        return name
+
+    def function(self, cls: type[DocModel]) -> str:
+        name = self.functions.get(cls)
+        if name is None:
+            name = f"extract_{len(self.functions)}"
+            self.functions[cls] = name
+            self.pending.append(cls)
+        return name
+
+    def generate(self, cls: type[DocModel]) -> str:
+        name = self.function(cls)
+        while self.pending:
+            self.write_function(self.pending.pop(0))
+        return name
+
+    def query(self, query: FieldQuery) -> str:
+        """
+        The expression for a query's compiled XPath object (or for a simple
+        path that doesn't need XPath, a function with the same results)
+        """
+
+        def compile_xpath(xpath: str) -> etree.XPath:
+            if query.stops_early:
+                xpath = _first(xpath)
+            return etree.XPath(xpath, namespaces=EXSLT_NAMESPACES, smart_strings=False)
+
+        if query.query_type == "xpath":
+            direct = _direct_query(query.query, query.stops_early)
+            if direct is not None:
+                return self.constant("find_", direct)
+            return self.constant("xpath_", compile_xpath(query.query))
+
+        # CSS is translated differently for HTML
+        xml, html = (
+            self.constant("css_", compile_xpath(_css_to_xpath(query.query, html)))
+            for html in [False, True]
+        )
+        return f"({html} if html else {xml})"
+
+    def write_function(self, cls: type[DocModel]) -> None:
+        lines = self.lines
+        lines.append(f"def {self.functions[cls]}(doc, html=False):")
+        lines.append(f"    # {cls.__module__}.{cls.__qualname__}")
+
+        xpath_root = cast(ConfigDict, cls.model_config).get("xpath_root")
+        if xpath_root is not None:
+            root = self.query(FieldQuery("xpath", xpath_root))
+            message = f"Root xpath {xpath_root} did not "
+            not_one = repr(f"{message}return exactly one element")
+            not_element = repr(f"{message}return an element, returned a ")
+            lines += [
+                f"    roots = {root}(doc)",
+                "    if not isinstance(roots, list):",
+                "        roots = [roots]",
+                "    if len(roots) != 1:",
+                f"        raise DocParsingError({not_one})",
+                "    if not isinstance(roots[0], _Element):",
+                "        raise DocParsingError(",
+                f"            {not_element} + f'{{type(roots[0])}} instead'",
+                "        )",
+                "    doc = roots[0]",
+                # As in the generic extraction, the new root is treated as XML
+                "    html = False",
+            ]
+
+        lines += ["    data = {}", "    field = None", "    try:"]
+        for field_name, query in cls.query_fields().items():
+            self.write_field(cls, field_name, query)
+        cls_name = self.constant("cls_", cls)
+        lines += [
+            "    except (AttributeError, XPathError) as err:",
+            "        raise DocParsingError(",
+            f"            f'Error parsing field {{field}} on class {{{cls_name}}}'",
+            "        ) from err",
+            "    return data",
+            "",
+        ]
+
+    def write_field(
+        self, cls: type[DocModel], field_name: str, query: FieldQuery
+    ) -> None:
+        annotation = cls.model_fields[field_name].annotation
+        _, field_type = _is_optional(annotation)
+        field_origin = get_origin(field_type) or field_type
+        as_list = _result_as_list(field_origin)
+        model_type = _model_type(annotation)
+        target = f"data[{field_name!r}]"
+
+        def value(items: str) -> str:
+            return items if as_list else f"{items}[0] if len({items}) == 1 else {items}"
+
+        lines = self.lines
+        lines += [
+            f"        field = {field_name!r}",
+            f"        items = {self.query(query)}(doc)",
+            "        if not isinstance(items, list):",
+            "            items = [items]",
+        ]
+        if query.cleans:
+            lines.append(
+                f"        items = {self.constant('clean_', query.clean)}(items)"
+            )
+        if query.first and not query.stops_early:
+            lines.append("        items = items[:1]")
+        lines.append("        if items:")
+
+        def generic() -> str:
+            annotation_name = self.constant("annotation_", annotation)
+            return f"{target} = _extract_items(items, {annotation_name})"
+
+        if model_type is None:
+            if query.query_type == "xpath" and _STRING_QUERY.fullmatch(query.query):
+                lines.append(f"            {target} = {value('items')}")
+            else:
+                lines += [
+                    "            if all(isinstance(item, str) for item in items):",
+                    f"                {target} = {value('items')}",
+                    "            else:",
+                    f"                {generic()}",
+                ]
+        elif model_type is Any:
+            lines.append(f"            {generic()}")
+        else:
+            function = self.function(model_type)
+            models = f"{function}(item) for item in items"
+            # The models of a lazy field are extracted as it is iterated
+            models = f"({models})" if _is_lazy(field_origin) else f"[{models}]"
+            lines += [
+                "            if all(isinstance(item, _Element) for item in items):",
+                f"                models = {models}",
+                f"                {target} = {value('models')}",
+                "            else:",
+                f"                {generic()}",
+            ]
+
+
+class Extractor:
+    """
+    The generated extraction function for a model, which takes the root
+    element of a document, and whether the document is HTML.
+
+    lxml evaluates an XPath object in one thread at a time, so rather than
+    share the function's compiled queries, each thread that uses the
+    extractor generates a copy of the function for itself.
+    """
+
+    def __init__(self, cls: type[DocModel]):
+        self.cls = cls
+        self.local = threading.local()
+        self.source, self.local.function = self._generate()
+
+    def _generate(self) -> tuple[str, ExtractFunction]:
+        cls = self.cls
+        generator = _Generator()
+        name = generator.generate(cls)
+        source = "\n".join(generator.lines)
+
+        # Registering the source lets tracebacks (and debuggers) show it
+        filename = f"<xml_to_pydantic extractor {cls.__module__}.{cls.__qualname__}>"
+        linecache.cache[filename] = (
+            len(source),
+            None,
+            source.splitlines(keepends=True),
+            filename,
+        )
+        exec(compile(source, filename, "exec"), generator.namespace)  # noqa: S102
+        return source, generator.namespace[name]
+
+    def __call__(self, root: etree._Element, html: bool = False) -> dict[str, Any]:
+        try:
+            function: ExtractFunction = self.local.function
+        except AttributeError:
+            _, function = self._generate()
+            self.local.function = function
+        return function(root, html)
+
+
+def extractor_source(cls: type[DocModel]) -> str:
+    """The source of the function generated for a model, for debugging"""
+    return Extractor(cls).source
@@ -1,36 +1,357 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Literal, Protocol, Union, cast
+import codecs
+import mmap
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    List,
+    Literal,
+    Protocol,
+    Tuple,
+    Union,
+    cast,
+)
 
-from cssselect import GenericTranslator, HTMLTranslator
 from lxml import etree
 
 
 class GenericDoc(Protocol):
     def query(
-        self, query_type: Literal["xpath", "css"], query: str
+        self, query_type: Literal["xpath", "css"], query: str, first: bool = False
     ) -> QueryReturn: ...  # pragma: no cover
 
 
+# The EXSLT extensions to XPath that can be used in queries, under their usual
+# prefixes, so that values can be filtered (as by re:test()) by libxml2 before
+# they are returned to Python
+EXSLT_NAMESPACES = {
+    "re": "http://exslt.org/regular-expressions",
+    "str": "http://exslt.org/strings",
+    "math": "http://exslt.org/math",
+    "set": "http://exslt.org/sets",
+    "date": "http://exslt.org/dates-and-times",
+}
+
 # TODO: Add support for more types of queries - xpath can return bool, float
 XPathReturn = Union[str, List[str], List[etree._Element]]
 QueryReturn = Union[List[str], List[GenericDoc]]
 
+# A buffer holding a whole document, which is read by the parser in chunks
+# rather than copied into a bytes object first
+Buffer = Union[bytearray, memoryview, mmap.mmap]
+BUFFER_TYPES = (bytearray, memoryview, mmap.mmap)
+# A document to be parsed: its text, a buffer holding it, the path to a
+# file, or a binary file object. A DocSource can also be an element that has
+# already been parsed.
+DocInput = Union[str, bytes, Buffer, "os.PathLike[str]", BinaryIO]
+DocSource = Union[DocInput, etree._Element]
+
+
+class _BufferReader:
+    """A file object over a buffer, returning it in chunks"""
+
+    def __init__(self, buffer: Buffer):
+        self.view = memoryview(buffer).cast("B")
+        self.position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self.view) if size < 0 else self.position + size
+        chunk = self.view[self.position : end].tobytes()
+        self.position += len(chunk)
+        return chunk
+
+
+# Parsers are reused rather than created for every document, but each thread
+# has its own, as lxml only lets one thread use a parser at a time
+_PARSERS = threading.local()
+
+
+def _new_parser(
+    doc_type: Literal["xml", "html"], encoding: str | None, **kwargs: Any
+) -> Any:
+    """
+    A parser for a type of document. With an encoding, the parser decodes
+    bytes with it, rather than working it out from the document (its XML
+    declaration, byte order mark or meta tags). Text is already decoded, so
+    the encoding makes no difference to it.
+    """
+    parser_class = etree.XMLParser if doc_type == "xml" else etree.HTMLParser
+    if doc_type == "html":
+        kwargs["recover"] = True
+    try:
+        return parser_class(encoding=encoding, **kwargs)
+    except LookupError:
+        # libxml2 doesn't know some of Python's names (such as latin-1), but
+        # does know the normalised name (iso8859-1)
+        name = codecs.lookup(cast(str, encoding)).name
+        return parser_class(encoding=name, **kwargs)
+
+
+def _parser(doc_type: Literal["xml", "html"], encoding: str | None = None) -> Any:
+    """The parser for a type of document in this thread"""
+    parsers: dict[tuple[str, str | None], Any] = _PARSERS.__dict__.setdefault(
+        "parsers", {}
+    )
+    parser = parsers.get((doc_type, encoding))
+    if parser is None:
+        parser = parsers[(doc_type, encoding)] = _new_parser(doc_type, encoding)
+    return parser
+
+
+def _parse(source: DocInput, parser: Any) -> Any:
+    """
+    Parse a document, returning the root element (or, for a parser with a
+    target, the target's result). Files are read by libxml2 directly, and
+    file objects and buffers in chunks, so the whole document is never held
+    as a bytes object as well as the tree.
+    """
+    if isinstance(source, (str, bytes)):
+        return etree.fromstring(source, parser)  # noqa: S320
+    file: str | BinaryIO | _BufferReader
+    if isinstance(source, BUFFER_TYPES):
+        file = _BufferReader(source)
+    elif isinstance(source, os.PathLike):
+        file = os.fspath(source)
+    else:
+        file = source
+
+    result = etree.parse(file, parser)  # noqa: S320
+    if isinstance(result, etree._ElementTree):
+        return result.getroot()
+    return result
+
+
+class _LocalXPath:
+    """
+    A compiled XPath that can be shared between threads. lxml evaluates an
+    XPath object in one thread at a time (holding a lock while it runs), so
+    each thread compiles its own copy on first use, and threads can run
+    their queries in parallel.
+    """
+
+    def __init__(self, path: str, **kwargs: Any):
+        self.path = path
+        self.kwargs = kwargs
+        self.local = threading.local()
+        # Compiling it straight away reports any syntax error to the caller
+        self.local.xpath = etree.XPath(path, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"_LocalXPath({self.path!r})"
+
+    def __call__(self, element: etree._Element, **variables: Any) -> Any:
+        try:
+            xpath = self.local.xpath
+        except AttributeError:
+            xpath = self.local.xpath = etree.XPath(self.path, **self.kwargs)
+        return xpath(element, **variables)
+
+
+@lru_cache(maxsize=None)
+def _css_to_xpath(query: str, html: bool) -> str:
+    """
+    Convert a CSS selector to the equivalent XPath, selecting the text nodes.
+
+    cssselect is only imported here, on the first CssField query, so that
+    models using only XPath don't pay for it at import time.
+    """
+    from cssselect import GenericTranslator, HTMLTranslator
+
+    translator = HTMLTranslator() if html else GenericTranslator()
+    return f"{translator.css_to_xpath(query)}/text()"
+
 
 @dataclass
 class FieldQuery:
     query_type: Literal["xpath", "css"]
     query: str
+    # Replace string results with an interned copy, so that repeated
+    # values (country codes, kind codes, ...) share a single object
+    intern: bool = False
+    # Tidy up the whitespace in string results: collapse runs of whitespace
+    # to a single space (as XPath's normalize-space()), or only remove it
+    # from the ends, and leave out results that are only whitespace
+    normalize_space: bool = False
+    strip: bool = False
+    drop_blank: bool = False
+    # Only the first result is used (for a single valued field)
+    first: bool = False
+    # Whether clean() needs to be called on the results at all
+    cleans: bool = field(init=False, repr=False, compare=False)
+    # Whether the query itself can stop at the first result, as (query)[1].
+    # Not when blank results are dropped, as the first that isn't blank is
+    # wanted.
+    stops_early: bool = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.cleans = (
+            self.intern or self.normalize_space or self.strip or self.drop_blank
+        )
+        self.stops_early = (
+            self.first
+            and not self.drop_blank
+            and (self.query_type == "css" or _returns_nodes(self.query))
+        )
+
+    def clean(self, results: QueryReturn) -> QueryReturn:
+        """
+        Apply the string options to the string results. This is done here,
+        rather than in the XPath, as normalize-space() only applies to the
+        first node it is given in XPath 1.0.
+        """
+        cleaned: list[str | GenericDoc] = []
+        for item in results:
+            if isinstance(item, str):
+                if self.normalize_space:
+                    item = " ".join(item.split())  # noqa: PLW2901
+                elif self.strip:
+                    item = item.strip()  # noqa: PLW2901
+                if self.drop_blank and (not item or item.isspace()):
+                    continue
+                if self.intern:
+                    item = sys.intern(item)  # noqa: PLW2901
+            cleaned.append(item)
+        return cast(QueryReturn, cleaned)
+
+
+_NAME = re.compile(r"[A-Za-z_][\w.\-]*")
+
+# What a simple path collects: the steps to an element, whether they start at
+# the document (rather than the context element), and the attribute (None
+# for text)
+ParsedPath = Tuple[Tuple[str, ...], bool, Union[str, None]]
+
+
+@lru_cache(maxsize=None)
+def _parse_path(query: str) -> ParsedPath | None:
+    """
+    Split an XPath like './a/b/text()', '/root/a/@id' or '@id' into its
+    steps, or return None if it is anything more complicated.
+    """
+    path = query.strip()
+    absolute = path.startswith("/")
+    if absolute:
+        path = path[1:]
+
+    *steps, last = path.split("/")
+    if last == "text()":
+        attribute = None
+    elif last.startswith("@") and _NAME.fullmatch(last[1:]):
+        attribute = last[1:]
+    else:
+        return None
+
+    steps = [step for step in steps if step != "."]
+    if not all(_NAME.fullmatch(step) for step in steps):
+        return None
+    if absolute and not steps:
+        return None
+
+    return tuple(steps), absolute, attribute
+
+
+def _find_first(element: etree._Element, path: ParsedPath) -> list[str]:
+    """
+    The first result of a simple path, as a list like an XPath's. ElementPath
+    stops at the first matching element, where libxml2 finds every match
+    even for (query)[1].
+    """
+    steps, absolute, attribute = path
+    if absolute:
+        element = element.getroottree().getroot()
+        if element.tag != steps[0]:
+            return []
+        steps = steps[1:]
+
+    for match in element.iterfind("/".join(steps)) if steps else [element]:
+        if attribute is not None:
+            value = match.get(attribute)
+            if value is not None:
+                return [value]
+            continue
+        # The text nodes of an element are its text, and the tails of its
+        # children (including comments and processing instructions)
+        if match.text is not None:
+            return [match.text]
+        for child in match:
+            if child.tail is not None:
+                return [child.tail]
+    return []
+
+
+def _own_values(element: etree._Element, attribute: str | None) -> list[str]:
+    """The results of @attribute, or of text(), on the element itself"""
+    if attribute is not None:
+        value = element.get(attribute)
+        return [] if value is None else [value]
+    texts = [] if element.text is None else [element.text]
+    texts.extend(child.tail for child in element if child.tail is not None)
+    return texts
+
+
+DirectQuery = Callable[[etree._Element], List[str]]
+
+
+@lru_cache(maxsize=None)
+def _direct_query(query: str, first: bool) -> DirectQuery | None:
+    """
+    A function with the same results as an XPath, without going through
+    XPath: for the first result of a simple path, or for @attribute or
+    text() on the element itself. Otherwise None, as XPath is quicker for
+    paths with many matches than creating a Python object for each element.
+    """
+    path = _parse_path(query)
+    if path is None:
+        return None
+    if first:
+        return partial(_find_first, path=path)
+    steps, _, attribute = path
+    if steps:
+        return None
+    return partial(_own_values, attribute=attribute)
+
+
+@lru_cache(maxsize=None)
+def _returns_nodes(query: str) -> bool:
+    """
+    Whether an XPath returns nodes, rather than a string, number or boolean
+    (which can't be limited to the first result). In XPath 1.0 this doesn't
+    depend on the document, so an empty element is used to find out.
+    """
+    try:
+        xpath = etree.XPath(query, namespaces=EXSLT_NAMESPACES)
+        return isinstance(xpath(etree.Element("empty")), list)
+    except etree.XPathError:
+        return False
+
+
+def _first(query: str) -> str:
+    """The XPath for the first node that a query returns"""
+    return f"({query})[1]"
 
 
 class XpathDoc:
     def __init__(self, doc: etree._Element):
         self.doc = doc
 
-    def _query(self, query: str) -> QueryReturn:
+    def _query(self, query: str, first: bool = False) -> QueryReturn:
+        direct = _direct_query(query, first)
+        if direct is not None:
+            return cast(QueryReturn, direct(self.doc))
+        if first:
+            query = _first(query)
+
         results = cast(
-            XPathReturn, self.doc.xpath(query, smart_strings=False)
+            XPathReturn,
+            self.doc.xpath(query, namespaces=EXSLT_NAMESPACES, smart_strings=False),
         )  # noqa: S320
 
         if not isinstance(results, list):
@@ -45,40 +366,40 @@ class XpathDoc:
 
 
 class XmlDoc(XpathDoc):
-    def __init__(self, doc: str | bytes | etree._Element):
+    def __init__(self, doc: DocSource, encoding: str | None = None):
         if not isinstance(doc, etree._Element):
-            parser = etree.XMLParser()
-            doc = etree.fromstring(doc, parser=parser)  # noqa: S320
-        super().__init__(doc)
+            doc = _parse(doc, _parser("xml", encoding))
+        super().__init__(cast(etree._Element, doc))
 
-    def query(self, query_type: Literal["xpath", "css"], query: str) -> QueryReturn:
+    def query(
+        self, query_type: Literal["xpath", "css"], query: str, first: bool = False
+    ) -> QueryReturn:
         if query_type not in ["xpath", "css"]:
             raise ValueError(
                 f"Invalid query type for XmlDoc: {query_type}"
             )  # pragma: no cover
 
         if query_type == "css":
-            query = GenericTranslator().css_to_xpath(query)
-            query = f"{query}/text()"
+            query = _css_to_xpath(query, html=False)
 
-        return self._query(query)
+        return self._query(query, first)
 
 
 class HtmlDoc(XpathDoc):
-    def __init__(self, doc: str | bytes | etree._Element):
+    def __init__(self, doc: DocSource, encoding: str | None = None):
         if not isinstance(doc, etree._Element):
-            parser = etree.HTMLParser(recover=True)
-            doc = etree.fromstring(doc, parser=parser)  # noqa: S320
-        super().__init__(doc)
+            doc = _parse(doc, _parser("html", encoding))
+        super().__init__(cast(etree._Element, doc))
 
-    def query(self, query_type: Literal["xpath", "css"], query: str) -> QueryReturn:
+    def query(
+        self, query_type: Literal["xpath", "css"], query: str, first: bool = False
+    ) -> QueryReturn:
         if query_type not in ["xpath", "css"]:
             raise ValueError(
                 f"Invalid query type for HtmlDoc: {query_type}"
             )  # pragma: no cover
 
         if query_type == "css":
-            query = HTMLTranslator().css_to_xpath(query)
-            query = f"{query}/text()"
+            query = _css_to_xpath(query, html=True)
 
-        return self._query(query)
+        return self._query(query, first)
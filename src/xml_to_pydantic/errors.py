@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+
+class DocModelError(Exception):
+    """Error in settings creating an XML model"""
+
+
+class DocParsingError(Exception):
+    """Error when parsing XML using lxml"""
+
+
+class DocLimitError(DocParsingError):
+    """A document went over one of the limits set for it"""
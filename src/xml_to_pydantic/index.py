@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Iterable, Iterator
+
+from .stream import (
+    INDEX_SUFFIX,
+    XML_DECLARATION,
+    Checkpoint,
+    Document,
+    PathType,
+    expand_paths,
+    is_compressed,
+)
+
+_MAGIC = b"XTPIDX1\n"
+# File size, file modification time (ns), number of documents
+_HEADER = struct.Struct("<qqq")
+
+
+@dataclass
+class Shard:
+    """A contiguous range of documents in a file: [start, stop)"""
+
+    path: str
+    start: int
+    stop: int
+    offset: int
+    end: int
+
+    @property
+    def size(self) -> int:
+        return self.end - self.offset
+
+
+def _scan_offsets(data: bytes | mmap.mmap) -> array[int]:
+    """
+    Find where each document starts in a (non-empty) file: at the beginning,
+    and at each later line beginning with an XML declaration (as in
+    split_documents).
+    """
+    offsets = array("q", [0])
+    marker = b"\n" + XML_DECLARATION
+    position = data.find(marker)
+    while position != -1:
+        offsets.append(position + 1)
+        position = data.find(marker, position + 1)
+    return offsets
+
+
+class DocumentIndex:
+    """
+    The byte offset of each document in a file of concatenated XML
+    documents, giving random access to any document, and a way of splitting
+    the file into shards of similar size without splitting the file itself.
+
+    The file is memory mapped, so reading a document is a single slice.
+    """
+
+    def __init__(self, path: PathType, offsets: array[int]):
+        self.path = Path(path)
+        self.offsets = offsets
+        self._file = open(self.path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._data = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.size
+            else b""
+        )
+
+    @classmethod
+    def build(cls, path: PathType) -> DocumentIndex:
+        """Scan the file for the start of each document"""
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return cls(path, array("q"))
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return cls(path, _scan_offsets(data))
+
+    @staticmethod
+    def index_path(path: PathType) -> Path:
+        return Path(f"{os.fspath(path)}{INDEX_SUFFIX}")
+
+    @classmethod
+    def load(cls, path: PathType) -> DocumentIndex:
+        """
+        Use the index cached next to the file (as <file>.idx), if it is still
+        up to date, or otherwise build the index and try to cache it.
+        """
+        stat = os.stat(path)
+        index_path = cls.index_path(path)
+        try:
+            with open(index_path, "rb") as file:
+                if file.read(len(_MAGIC)) == _MAGIC:
+                    size, mtime, count = _HEADER.unpack(file.read(_HEADER.size))
+                    if (size, mtime) == (stat.st_size, stat.st_mtime_ns):
+                        offsets = array("q")
+                        offsets.fromfile(file, count)
+                        return cls(path, offsets)
+        except (OSError, EOFError, struct.error):
+            pass
+
+        index = cls.build(path)
+        index.save()
+        return index
+
+    def save(self) -> None:
+        mtime = os.stat(self.path).st_mtime_ns
+        header = _HEADER.pack(self.size, mtime, len(self.offsets))
+        tmp_path = self.index_path(f"{self.path}.tmp")
+        try:
+            with open(tmp_path, "wb") as file:
+                file.write(_MAGIC + header)
+                self.offsets.tofile(file)
+            tmp_path.replace(self.index_path(self.path))
+        except OSError:
+            # The index is only a cache, so a read-only directory is fine
+            pass
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self) -> DocumentIndex:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def span(self, n: int) -> tuple[int, int]:
+        """The start and end byte offsets of document n"""
+        start = self.offsets[n]
+        end = self.offsets[n + 1] if n + 1 < len(self.offsets) else self.size
+        return start, end
+
+    def __getitem__(self, n: int) -> Document:
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError(f"document {n} out of range")
+        start, end = self.span(n)
+        return Document(os.fspath(self.path), n, start, self._data[start:end])
+
+    def documents(self, start: int = 0, stop: int | None = None) -> Iterator[Document]:
+        stop = len(self) if stop is None else min(stop, len(self))
+        for n in range(start, stop):
+            yield self[n]
+
+    def __iter__(self) -> Iterator[Document]:
+        return self.documents()
+
+    def shards(self, count: int) -> list[Shard]:
+        """
+        Split the documents into (at most) count contiguous shards, with
+        boundaries chosen so that each has roughly the same number of bytes.
+        """
+        boundaries = [0]
+        for i in range(1, count):
+            target = self.size * i // count
+            boundary = bisect_left(self.offsets, target)
+            if boundaries[-1] < boundary < len(self):
+                boundaries.append(boundary)
+        boundaries.append(len(self))
+
+        return [
+            Shard(
+                os.fspath(self.path),
+                start,
+                stop,
+                self.span(start)[0],
+                self.span(stop - 1)[1],
+            )
+            for start, stop in zip(boundaries, boundaries[1:])
+            if stop > start
+        ]
+
+
+def iter_shard(
+    paths: Iterable[PathType],
+    shard: int,
+    count: int,
+    checkpoint: Checkpoint | None = None,
+) -> Iterator[Document]:
+    """
+    Read the documents in shard number `shard` (counting from 0) of `count`
+    from each of the files, using (and caching) each file's index.
+
+    With a checkpoint, documents already processed are skipped. As the index
+    needs random access to the file, it can't be compressed.
+    """
+    for path in expand_paths(paths):
+        if is_compressed(path):
+            raise ValueError(f"Unable to shard compressed file {path}")
+        with DocumentIndex.load(path) as index:
+            shards = index.shards(count)
+            if shard >= len(shards):
+                continue
+
+            start = shards[shard].start
+            if checkpoint is not None:
+                start = max(start, checkpoint.progress(os.fspath(path)).documents)
+            yield from index.documents(start, shards[shard].stop)
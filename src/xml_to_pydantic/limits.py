@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import BinaryIO, Sized, cast
+
+from lxml import etree
+
+from .docs import BUFFER_TYPES, DocInput, _LocalXPath
+from .errors import DocLimitError
+
+
+@dataclass(frozen=True)
+class DocLimits:
+    """
+    Limits on the work done for one document, so that a pathological
+    document fails quickly with a DocLimitError rather than stalling:
+
+    - max_bytes: the size of the input (characters for str), checked before
+      parsing, or as it is read for file objects
+    - max_depth: how deeply elements are nested, checked after parsing
+    - max_results: the number of results from any one query
+    - time_limit: seconds for parsing and extraction together. Queries
+      can't be interrupted, so this is checked between them.
+    """
+
+    max_bytes: int | None = None
+    max_depth: int | None = None
+    max_results: int | None = None
+    time_limit: float | None = None
+
+    def check_size(self, source: DocInput) -> DocInput:
+        """
+        Check the size of a document before it is parsed. File objects are
+        returned wrapped, to be checked as they are read.
+        """
+        if self.max_bytes is None:
+            return source
+
+        if isinstance(source, (str, bytes)):
+            size = len(source)
+        elif isinstance(source, BUFFER_TYPES):
+            size = memoryview(source).nbytes
+        elif isinstance(source, os.PathLike):
+            size = os.stat(source).st_size
+        else:
+            return cast(BinaryIO, _LimitedReader(source, self.max_bytes))
+
+        if size > self.max_bytes:
+            raise DocLimitError(
+                f"Document is {size} bytes, more than the limit of {self.max_bytes}"
+            )
+        return source
+
+    def check_depth(self, root: etree._Element) -> None:
+        if self.max_depth is not None and _deeper_than(self.max_depth)(root):
+            raise DocLimitError(
+                f"Document has elements nested more than {self.max_depth} deep"
+            )
+
+
+@lru_cache(maxsize=None)
+def _deeper_than(depth: int) -> _LocalXPath:
+    """Whether there is an element below the given depth (the root is 1)"""
+    return _LocalXPath("boolean(" + "/".join(["."] + ["*"] * depth) + ")")
+
+
+class _LimitedReader:
+    """A file object that raises a DocLimitError if too much is read"""
+
+    def __init__(self, file: BinaryIO, max_bytes: int):
+        self.file = file
+        self.max_bytes = max_bytes
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.file.read(size)
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise DocLimitError(
+                f"Document is more than the limit of {self.max_bytes} bytes"
+            )
+        return chunk
+
+
+class Budget:
+    """The limits for the document being extracted, and its deadline"""
+
+    def __init__(self, limits: DocLimits):
+        self.limits = limits
+        self.deadline = (
+            None
+            if limits.time_limit is None
+            else time.perf_counter() + limits.time_limit
+        )
+
+    def check(self, results: Sized, query: str) -> None:
+        """Check the results of a query, and the time taken so far"""
+        max_results = self.limits.max_results
+        if max_results is not None and len(results) > max_results:
+            raise DocLimitError(
+                f"Query {query} returned {len(results)} results, more than the "
+                f"limit of {max_results}"
+            )
+        self.check_time()
+
+    def check_time(self) -> None:
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise DocLimitError(
+                f"Document took longer than the time limit of "
+                f"{self.limits.time_limit}s"
+            )
+
+
+# The budget of the document being extracted (in this thread or task), which
+# nested models share
+BUDGET: ContextVar[Budget | None] = ContextVar("budget", default=None)
@@ -1,37 +1,82 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, Iterable, List, Literal, Union, cast
+import collections.abc
+import hashlib
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    TypeVar,
+    Union,
+    cast,
+)
+from weakref import WeakKeyDictionary
 
 from lxml import etree
 from pydantic import BaseModel, ValidationError
 from pydantic import ConfigDict as BaseConfigDict
 from pydantic.fields import FieldInfo
+from pydantic_core import ErrorDetails, InitErrorDetails, PydanticCustomError
+from pydantic_core.core_schema import ErrorType
 from typing_extensions import Self, get_args, get_origin
 
-from .docs import FieldQuery, GenericDoc, HtmlDoc, XmlDoc
+from .docs import (
+    BUFFER_TYPES,
+    DocInput,
+    DocSource,
+    FieldQuery,
+    GenericDoc,
+    HtmlDoc,
+    QueryReturn,
+    XmlDoc,
+)
+from .errors import DocModelError, DocParsingError
+from .limits import BUDGET, Budget, DocLimits
+from .target import TargetPlan
 from .typing import _is_optional, _is_union
 
-QueryTypes = Literal["xpath", "css"]
-
+if TYPE_CHECKING:  # pragma: no cover
+    from .cache import ResultCache
+    from .codegen import Extractor
 
-class DocModelError(Exception):
-    """Error in settings creating an XML model"""
-
-
-class DocParsingError(Exception):
-    """Error when parsing XML using lxml"""
+QueryTypes = Literal["xpath", "css"]
+T = TypeVar("T")
 
 
 class ConfigDict(BaseConfigDict, total=False):
     xpath_generator: Callable[[str], str] | None
     xpath_root: str | None
     attribute_prefix: str
+    intern_strings: bool
+    normalize_space: bool
+    strip: bool
+    drop_blank: bool
+    result_cache: ResultCache | None
+    engine: Literal["tree", "target"]
+    codegen: bool
+    limits: DocLimits | None
+    strict_matches: bool
 
 
 DEFAULT_CONFIG = ConfigDict(
     xpath_generator=None,
     xpath_root=None,
     attribute_prefix="attr_",
+    intern_strings=False,
+    normalize_space=False,
+    strip=False,
+    drop_blank=False,
+    result_cache=None,
+    engine="tree",
+    codegen=False,
+    limits=None,
+    strict_matches=False,
 )
 
 
@@ -54,9 +99,23 @@ def XpathField(query: str, *args: Any, **kwargs: Any) -> Any:  # noqa: N802
 
 
 class DocFieldInfo(FieldInfo):
-    def __init__(self, query_type: QueryTypes, query: str, *args: Any, **kwargs: Any):
+    def __init__(  # noqa: PLR0913
+        self,
+        query_type: QueryTypes,
+        query: str,
+        *args: Any,
+        intern: bool | None = None,
+        normalize_space: bool | None = None,
+        strip: bool | None = None,
+        drop_blank: bool | None = None,
+        **kwargs: Any,
+    ):
         self.query_type = query_type
         self.query = query
+        self.intern = intern
+        self.normalize_space = normalize_space
+        self.strip = strip
+        self.drop_blank = drop_blank
         super().__init__(*args, **kwargs)
 
 
@@ -87,21 +146,101 @@ def _generate_xpath(field: str, annotation: Any, config: ConfigDict) -> str:
     return xpath
 
 
-def _extract_field(
-    items: list[GenericDoc] | list[str], annotation: Any
-) -> str | list[str] | dict[str, Any] | list[dict[str, Any]]:
-    _, annotation = _is_optional(annotation)
-    field_type = get_origin(annotation) or annotation
-    field_args = get_args(annotation)
-
+def _result_as_list(field_type: Any) -> bool:
     # lxml always returns a list. If we want a single value,
     # we need to extract it
-    result_as_list = (
+    return (
         isinstance(field_type, type)
         and (not issubclass(field_type, (str, bytes, BaseModel)))
         and issubclass(field_type, Iterable)
     )
 
+
+def _is_lazy(field_type: Any) -> bool:
+    """
+    Whether a field's results are extracted as the field is iterated, rather
+    than up front: as for Iterable[DocModel], which pydantic validates lazily
+    """
+    return field_type is collections.abc.Iterable
+
+
+def _read_lazy(value: Any) -> Any:
+    """
+    Read any lazy fields in a model or its extracted data (including in
+    nested models) in full, into lists, so that their extraction and
+    validation errors are raised now rather than as they are iterated
+    """
+    if isinstance(value, collections.abc.Iterator):
+        value = list(value)
+
+    items: Any
+    target: Any
+    if isinstance(value, BaseModel):
+        # Set directly, as the model may be frozen
+        items = target = value.__dict__
+    elif isinstance(value, dict):
+        items = target = value
+    elif isinstance(value, list):
+        items, target = dict(enumerate(value)), value
+    else:
+        return value
+
+    for key, item in items.items():
+        try:
+            read = _read_lazy(item)
+        except ValidationError as err:
+            # The errors of a lazy field are located within the field
+            title = type(value).__name__ if isinstance(value, BaseModel) else err.title
+            raise ValidationError.from_exception_data(
+                title,
+                [_moved_error(error, (key, *error["loc"])) for error in err.errors()],
+            ) from None
+        if read is not item:
+            # A model's field stays an iterator (which pydantic serializes
+            # as it does the lazy field), though over values already read
+            target[key] = iter(read) if isinstance(value, BaseModel) else read
+    return value
+
+
+_ERROR_TYPES = frozenset(get_args(ErrorType))
+
+
+def _moved_error(error: ErrorDetails, loc: tuple[int | str, ...]) -> InitErrorDetails:
+    """
+    An error from one ValidationError, at a new location, to be raised in
+    another. Errors of other types than pydantic's own (as raised with
+    PydanticCustomError by validators) are raised again as custom errors.
+    """
+    ctx = error.get("ctx", {})
+    error_type: str | PydanticCustomError = error["type"]
+    if error_type not in _ERROR_TYPES:
+        error_type = PydanticCustomError(error["type"], error["msg"], ctx)
+    return InitErrorDetails(type=error_type, loc=loc, input=error["input"], ctx=ctx)
+
+
+def _single_valued(annotation: Any) -> bool:
+    """
+    Whether a field takes a single value (rather than a list, or a union that
+    could take one), so only the first result of its query is needed
+    """
+    _, annotation = _is_optional(annotation)
+    field_type = get_origin(annotation) or annotation
+    if field_type is Any:
+        return False
+    if _is_union(field_type):
+        return all(hasattr(arg, "query_fields") for arg in get_args(annotation))
+    return not _result_as_list(field_type)
+
+
+def _extract_field(
+    items: list[GenericDoc] | list[str], annotation: Any
+) -> str | list[str] | dict[str, Any] | list[dict[str, Any]] | Iterator[dict[str, Any]]:
+    _, annotation = _is_optional(annotation)
+    field_type = get_origin(annotation) or annotation
+    field_args = get_args(annotation)
+
+    result_as_list = _result_as_list(field_type)
+
     # Is DocModel
     # Note: in python 3.9 -> 3.11, isinstance(list[str], type) is True, but
     # issubclass(list[str], DocModel) gives an exception.
@@ -129,6 +268,18 @@ def _extract_field(
                 # get the correct type on the first try
                 pass  # pragma: no cover
 
+    # Is Iterable[DocModel]: each model is extracted (and then validated by
+    # pydantic) as the field is iterated, from the elements kept until then.
+    # Within limits, the models are extracted up front (as for a list), so
+    # that the limits apply to them, and only their validation is lazy.
+    elif (
+        _is_lazy(field_type)
+        and hasattr(field_args[0], "query_fields")
+        and BUDGET.get() is None
+    ):
+        items = cast(List[GenericDoc], items)
+        return (_extract_model(item, field_args[0]) for item in items)
+
     # Is eg list[DocModel]
     elif result_as_list and hasattr(field_args[0], "query_fields"):
         items = cast(List[GenericDoc], items)
@@ -162,13 +313,20 @@ def _extract_model(doc: GenericDoc, cls: type[DocModel]) -> dict[str, Any]:
         doc = new_docs[0]
 
     extracted_data = {}
+    budget = BUDGET.get()
     try:
         for field_name, query in cls.query_fields().items():
-            annotation = cls.model_fields[field_name].annotation
-            elements = doc.query(query.query_type, query.query)
-            if len(elements) == 0:
-                continue
-            extracted_data[field_name] = _extract_field(elements, annotation)
+            elements = doc.query(query.query_type, query.query, query.stops_early)
+            if budget is not None:
+                budget.check(elements, query.query)
+            if query.cleans:
+                elements = query.clean(elements)
+            if query.first:
+                elements = elements[:1]
+            if len(elements) > 0:
+                extracted_data[field_name] = _extract_field(
+                    elements, cls.model_fields[field_name].annotation
+                )
 
     except (AttributeError, etree.XPathError) as err:
         raise DocParsingError(
@@ -178,32 +336,349 @@ def _extract_model(doc: GenericDoc, cls: type[DocModel]) -> dict[str, Any]:
     return extracted_data
 
 
-class DocModel(BaseModel):
-    @classmethod
-    def query_fields(cls) -> dict[str, FieldQuery]:
-        fields = {}
-        config = ConfigDict(**{**DEFAULT_CONFIG, **cls.model_config})
+def _extract_target(
+    plan: TargetPlan,
+    cls: type[DocModel],
+    source: DocInput,
+    encoding: str | None = None,
+) -> dict[str, Any]:
+    extracted_data = {}
+    results = plan.extract(source, encoding)
+    for (field_name, query), values in zip(cls.query_fields().items(), results):
+        elements = cast(QueryReturn, values)
+        if query.cleans:
+            elements = query.clean(elements)
+        if query.first:
+            elements = elements[:1]
+        if len(elements) > 0:
+            extracted_data[field_name] = _extract_field(
+                elements, cls.model_fields[field_name].annotation
+            )
+
+    return extracted_data
+
+
+def _build_query_fields(cls: type[DocModel]) -> dict[str, FieldQuery]:
+    fields = {}
+    config = ConfigDict(**{**DEFAULT_CONFIG, **cls.model_config})
+
+    for field, info in cls.model_fields.items():
+        if isinstance(info, DocFieldInfo) and info.query is not None:
+            query_type = info.query_type
+            query = info.query
+        else:
+            query_type = "xpath"
+            query = _generate_xpath(field, info.annotation, config)
+
+        # Each option can be set for the model, and overridden for a field
+        options: dict[str, bool] = {
+            "intern": config["intern_strings"],
+            "normalize_space": config["normalize_space"],
+            "strip": config["strip"],
+            "drop_blank": config["drop_blank"],
+        }
+        if isinstance(info, DocFieldInfo):
+            for option in options:
+                value = getattr(info, option)
+                if value is not None:
+                    options[option] = value
+
+        # Unless the matches are strict, a single valued field takes the
+        # first result, rather than failing validation on several
+        first = not config["strict_matches"] and _single_valued(info.annotation)
+        fields[field] = FieldQuery(
+            query_type=query_type, query=query, first=first, **options
+        )
+
+    return fields
+
+
+# The queries for each class are worked out on first use (usually the first
+# validation), rather than at class creation, and then reused.
+_QUERY_FIELDS: WeakKeyDictionary[type[DocModel], dict[str, FieldQuery]] = (
+    WeakKeyDictionary()
+)
+
+# Looking up a class's queries (or plan, or extractor) is a single dictionary
+# read, without a lock, but they are built under this lock, so that threads
+# validating a new class at the same time build them once and share them.
+# It is reentrant, as building a model's plan builds its nested models' too.
+_BUILD_LOCK = threading.RLock()
+_MISSING = object()
+
+
+def _cached(
+    cache: WeakKeyDictionary[type[DocModel], T],
+    cls: type[DocModel],
+    build: Callable[[type[DocModel]], T],
+) -> T:
+    value = cache.get(cls, _MISSING)
+    if value is _MISSING:
+        with _BUILD_LOCK:
+            value = cache.get(cls, _MISSING)
+            if value is _MISSING:
+                value = build(cls)
+                # Until pydantic has resolved any forward references, the
+                # annotations (and so the inferred xpaths) may still change
+                if cls.__pydantic_complete__:
+                    cache[cls] = value
+    return cast(T, value)
+
+
+_TARGET_PLANS: WeakKeyDictionary[type[DocModel], TargetPlan | None] = (
+    WeakKeyDictionary()
+)
+
+
+def _target_plan(cls: type[DocModel]) -> TargetPlan | None:
+    """
+    The plan for extracting the model with a parser target, or None if the
+    model needs the tree engine (eg nested models, or complex queries)
+    """
+    return _cached(_TARGET_PLANS, cls, _build_target_plan)
+
+
+def _build_target_plan(cls: type[DocModel]) -> TargetPlan | None:
+    if cast(ConfigDict, cls.model_config).get("xpath_root") is not None:
+        return None
+    return TargetPlan.compile(cls.query_fields())
+
+
+_EXTRACTORS: WeakKeyDictionary[type[DocModel], Extractor | None] = WeakKeyDictionary()
+
+
+def _extractor(cls: type[DocModel]) -> Extractor | None:
+    """
+    The generated extraction function for the model, or None if it can't be
+    generated (an invalid XPath), leaving the generic extraction to report it
+    """
+    return _cached(_EXTRACTORS, cls, _build_extractor)
+
+
+def _build_extractor(cls: type[DocModel]) -> Extractor | None:
+    from .codegen import Extractor
+
+    try:
+        return Extractor(cls)
+    except etree.XPathError:
+        return None
+
+
+_FINGERPRINTS: WeakKeyDictionary[type[DocModel], str] = WeakKeyDictionary()
 
-        for field, info in cls.model_fields.items():
-            if isinstance(info, DocFieldInfo) and info.query is not None:
-                query_type = info.query_type
-                query = info.query
-            else:
-                query_type = "xpath"
-                query = _generate_xpath(field, info.annotation, config)
 
-            fields[field] = FieldQuery(query_type=query_type, query=query)
+def _fingerprint(cls: type[DocModel]) -> str:
+    """
+    A digest of everything the data extracted for the model depends on: its
+    name, root and queries, and those of its nested models, and its limits
+    (which decide whether there is any data). Used in the keys
+    of cached results, so that models which share a name (eg built by a
+    factory) don't share entries, and entries on disk don't outlive a change
+    to the model's fields.
+    """
+    return _cached(_FINGERPRINTS, cls, _build_fingerprint)
+
+
+def _build_fingerprint(cls: type[DocModel]) -> str:
+    hasher = hashlib.blake2b(digest_size=20)
+    seen: set[type[DocModel]] = set()
+
+    def add(model: type[DocModel]) -> None:
+        hasher.update(f"{model.__module__}:{model.__qualname__}:".encode())
+        # A model nested in itself is only referred to by name
+        if model in seen:
+            return
+        seen.add(model)
+
+        root = cast(ConfigDict, model.model_config).get("xpath_root")
+        hasher.update(f"{root!r}:".encode())
+        for field, query in model.query_fields().items():
+            hasher.update(f"{field}={query!r}:".encode())
+            for nested in _nested_models(model.model_fields[field].annotation):
+                add(nested)
+
+    add(cls)
+    hasher.update(repr(cast(ConfigDict, cls.model_config).get("limits")).encode())
+    return hasher.hexdigest()
+
+
+def _nested_models(annotation: Any) -> Iterator[type[DocModel]]:
+    if hasattr(annotation, "query_fields"):
+        yield annotation
+    for arg in get_args(annotation):
+        yield from _nested_models(arg)
+
+
+_HAS_LAZY: WeakKeyDictionary[type[DocModel], bool] = WeakKeyDictionary()
+
+
+def _has_lazy_fields(cls: type[DocModel]) -> bool:
+    """
+    Whether the model or any model nested in it has lazy fields, so that
+    _read_lazy has anything to read
+    """
+    return _cached(_HAS_LAZY, cls, _build_has_lazy_fields)
 
-        return fields
 
+def _build_has_lazy_fields(cls: type[DocModel]) -> bool:
+    seen: set[type[DocModel]] = set()
+
+    def has_lazy(model: type[DocModel]) -> bool:
+        if model in seen:
+            return False
+        seen.add(model)
+        return any(
+            _lazy_annotation(info.annotation)
+            or any(has_lazy(nested) for nested in _nested_models(info.annotation))
+            for info in model.model_fields.values()
+        )
+
+    return has_lazy(cls)
+
+
+def _lazy_annotation(annotation: Any) -> bool:
+    return _is_lazy(get_origin(annotation)) or any(
+        _lazy_annotation(arg) for arg in get_args(annotation)
+    )
+
+
+def _extract_source(
+    cls: type[DocModel],
+    doc_type: Literal["xml", "html"],
+    source: DocSource,
+    encoding: str | None = None,
+    limits: DocLimits | None = None,
+) -> dict[str, Any]:
+    config = cast(ConfigDict, cls.model_config)
+    limits = limits if limits is not None else config.get("limits")
+    if limits is not None:
+        return _extract_limited(cls, doc_type, source, encoding, limits)
+
+    if (
+        doc_type == "xml"
+        and config.get("engine") == "target"
+        and not isinstance(source, etree._Element)
+        and (plan := _target_plan(cls)) is not None
+    ):
+        return _extract_target(plan, cls, source, encoding)
+
+    doc_class = XmlDoc if doc_type == "xml" else HtmlDoc
+    doc = doc_class(source, encoding)
+    if config.get("codegen") and (extractor := _extractor(cls)) is not None:
+        return extractor(doc.doc, doc_type == "html")
+
+    return _extract_model(doc, cls)
+
+
+def _extract_limited(
+    cls: type[DocModel],
+    doc_type: Literal["xml", "html"],
+    source: DocSource,
+    encoding: str | None,
+    limits: DocLimits,
+) -> dict[str, Any]:
+    """
+    Extract a document within limits. This always uses the tree engine and
+    the generic extraction, which check the budget as they go.
+    """
+    budget = Budget(limits)
+    if not isinstance(source, etree._Element):
+        source = limits.check_size(source)
+    doc_class = XmlDoc if doc_type == "xml" else HtmlDoc
+    doc = doc_class(source, encoding)
+    limits.check_depth(doc.doc)
+    budget.check_time()
+
+    token = BUDGET.set(budget)
+    try:
+        return _extract_model(doc, cls)
+    finally:
+        BUDGET.reset(token)
+
+
+def _extract_document(
+    cls: type[DocModel],
+    doc_type: Literal["xml", "html"],
+    source: DocSource,
+    encoding: str | None = None,
+    limits: DocLimits | None = None,
+) -> dict[str, Any]:
+    # Only documents held in memory are cached: files and file objects would
+    # have to be read in full just to work out the key. The key only covers
+    # the model's own limits, so limits for the call skip the cache.
+    config = cast(ConfigDict, cls.model_config)
+    cache = config.get("result_cache")
+    if (
+        cache is None
+        or limits is not None
+        or not isinstance(source, (str, bytes, *BUFFER_TYPES))
+    ):
+        return _extract_source(cls, doc_type, source, encoding, limits)
+
+    # A hit skips parsing, but not the size limit
+    if (model_limits := config.get("limits")) is not None:
+        model_limits.check_size(source)
+
+    key = cache.key(cls, doc_type, source, encoding)
+    extracted_data = cache.get(key)
+    if extracted_data is None:
+        extracted_data = _extract_source(cls, doc_type, source, encoding, limits)
+        # Any lazy fields are read in full to be stored, so the data is
+        # validated as stored, just as it would be on a hit
+        extracted_data = cache.set(key, extracted_data)
+
+    return extracted_data
+
+
+class DocModel(BaseModel):
     @classmethod
-    def model_validate_xml(cls, xml: str | bytes | etree._Element) -> Self:
-        doc = XmlDoc(xml)
-        extracted_data = _extract_model(doc, cls)
+    def query_fields(cls) -> dict[str, FieldQuery]:
+        return _cached(_QUERY_FIELDS, cls, _build_query_fields)
+
+    @classmethod
+    def model_validate_xml(
+        cls,
+        xml: DocSource,
+        *,
+        encoding: str | None = None,
+        limits: DocLimits | None = None,
+    ) -> Self:
+        extracted_data = _extract_document(cls, "xml", xml, encoding, limits)
         return cls.model_validate(extracted_data)
 
     @classmethod
-    def model_validate_html(cls, html: str | bytes | etree._Element) -> Self:
-        doc = HtmlDoc(html)
-        extracted_data = _extract_model(doc, cls)
+    def model_validate_html(
+        cls,
+        html: DocSource,
+        *,
+        encoding: str | None = None,
+        limits: DocLimits | None = None,
+    ) -> Self:
+        extracted_data = _extract_document(cls, "html", html, encoding, limits)
         return cls.model_validate(extracted_data)
+
+    @classmethod
+    def model_extract_xml(
+        cls,
+        xml: DocSource,
+        *,
+        encoding: str | None = None,
+        limits: DocLimits | None = None,
+    ) -> dict[str, Any]:
+        """
+        The data that model_validate_xml would validate: the strings found
+        for each field (nested dicts for nested models), before any
+        validation or type conversion.
+        """
+        return _extract_document(cls, "xml", xml, encoding, limits)
+
+    @classmethod
+    def model_extract_html(
+        cls,
+        html: DocSource,
+        *,
+        encoding: str | None = None,
+        limits: DocLimits | None = None,
+    ) -> dict[str, Any]:
+        """As model_extract_xml, for HTML"""
+        return _extract_document(cls, "html", html, encoding, limits)
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO, Callable, Iterable, Iterator, Union, cast
+
+PathType = Union[str, "os.PathLike[str]"]
+
+# Files such as the USPTO bulk downloads are many XML documents concatenated
+# together, each starting with its own XML declaration
+XML_DECLARATION = b"<?xml"
+
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz", ".zip")
+
+# Document indexes cached next to their files (see index.DocumentIndex), which
+# aren't inputs themselves
+INDEX_SUFFIX = ".idx"
+
+
+@dataclass
+class Document:
+    """One document from an input file, and where it came from"""
+
+    source: str
+    index: int
+    offset: int
+    data: bytes
+
+    @property
+    def end(self) -> int:
+        return self.offset + len(self.data)
+
+
+def split_documents(
+    stream: BinaryIO, source: str = "", index: int = 0, offset: int = 0
+) -> Iterator[Document]:
+    """
+    Split a stream of concatenated XML documents into separate documents.
+
+    A new document starts at each line beginning with an XML declaration.
+    A stream without any declarations is returned as a single document.
+    When the stream has been positioned part way through a file, index and
+    offset give the position of its first document in that file.
+    """
+    start = offset
+    lines: list[bytes] = []
+    for line in stream:
+        if line.startswith(XML_DECLARATION) and lines:
+            yield Document(source, index, start, b"".join(lines))
+            index += 1
+            start = offset
+            lines = []
+        lines.append(line)
+        offset += len(line)
+
+    if lines:
+        yield Document(source, index, start, b"".join(lines))
+
+
+def expand_paths(paths: Iterable[PathType]) -> Iterator[Path]:
+    """
+    Expand a list of files, directories (searched recursively) and glob
+    patterns into the files they refer to, in a repeatable order.
+
+    Cached document indexes found in directories or by patterns are skipped.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(
+                file
+                for file in Path(path).rglob("*")
+                if file.is_file() and not _is_index(file)
+            )
+        elif os.path.exists(path):
+            yield Path(path)
+        else:
+            import glob
+
+            yield from (
+                Path(file)
+                for file in sorted(glob.glob(os.fspath(path), recursive=True))
+                if os.path.isfile(file) and not _is_index(file)
+            )
+
+
+def _is_index(path: PathType) -> bool:
+    return os.fspath(path).endswith(INDEX_SUFFIX)
+
+
+def is_compressed(path: PathType) -> bool:
+    return os.fspath(path).lower().endswith(COMPRESSED_SUFFIXES)
+
+
+def open_inputs(path: PathType) -> Iterator[tuple[str, BinaryIO]]:
+    """
+    Open a file for reading, decompressing .gz, .bz2 and .xz files as they
+    are read, so that the decompressed data is never held in memory (or
+    written to disk) as a whole.
+
+    Each member of a .zip archive is opened in turn, with the source named
+    '<archive>::<member>'. Other files give a single stream.
+
+    The compression modules are only imported here, so that importing the
+    package (which most uses do without reading files) doesn't pay for them.
+    """
+    source = os.fspath(path)
+    suffix = source.lower().rpartition(".")[2]
+    if suffix == "zip":
+        import zipfile
+
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    with archive.open(info) as member:
+                        yield f"{source}::{info.filename}", cast(BinaryIO, member)
+        return
+
+    stream: BinaryIO
+    if suffix == "gz":
+        import gzip
+
+        stream = cast(BinaryIO, gzip.open(path, "rb"))
+    elif suffix == "bz2":
+        import bz2
+
+        stream = cast(BinaryIO, bz2.open(path, "rb"))
+    elif suffix == "xz":
+        import lzma
+
+        stream = cast(BinaryIO, lzma.open(path, "rb"))
+    else:
+        stream = open(path, "rb")  # noqa: SIM115
+    with stream:
+        yield source, stream
+
+
+@dataclass
+class FileProgress:
+    """How far through a file processing has got"""
+
+    offset: int = 0
+    documents: int = 0
+    errors: int = 0
+
+
+@dataclass
+class Checkpoint:
+    """
+    A manifest of progress through a set of files, saved to disk so that
+    an interrupted run can carry on from where it stopped.
+
+    For each file, it records the byte offset of the next document to
+    process, along with the number of documents and errors so far. Any
+    other positions the caller needs to resume (eg the size of an output
+    file) can be kept in `outputs`, and on_save is called just before the
+    manifest is written, to update them. The manifest is written every
+    `interval` documents, and when used as a context manager, on exit.
+    """
+
+    path: Path
+    interval: int = 1000
+    files: dict[str, FileProgress] = field(default_factory=dict)
+    outputs: dict[str, int] = field(default_factory=dict)
+    on_save: Callable[[Checkpoint], None] | None = field(default=None, repr=False)
+    _unsaved: int = field(default=0, init=False, repr=False)
+
+    @classmethod
+    def open(cls, path: PathType, interval: int = 1000) -> Checkpoint:
+        """Load the checkpoint at path, or start a new one if it doesn't exist"""
+        checkpoint = cls(Path(path), interval)
+        if checkpoint.path.exists():
+            manifest = json.loads(checkpoint.path.read_text())
+            checkpoint.files = {
+                source: FileProgress(**progress)
+                for source, progress in manifest["files"].items()
+            }
+            checkpoint.outputs = manifest["outputs"]
+        return checkpoint
+
+    def __enter__(self) -> Checkpoint:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.save()
+
+    def progress(self, source: str) -> FileProgress:
+        return self.files.setdefault(source, FileProgress())
+
+    def update(self, doc: Document, failed: bool = False) -> None:
+        """Record that a document has been processed (successfully or not)"""
+        progress = self.progress(doc.source)
+        progress.offset = doc.end
+        progress.documents = doc.index + 1
+        progress.errors += failed
+
+        self._unsaved += 1
+        if self._unsaved >= self.interval:
+            self.save()
+
+    def save(self) -> None:
+        if self.on_save is not None:
+            self.on_save(self)
+        manifest = {
+            "files": {
+                source: asdict(progress) for source, progress in self.files.items()
+            },
+            "outputs": self.outputs,
+        }
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2))
+        tmp_path.replace(self.path)
+        self._unsaved = 0
+
+
+def iter_documents(
+    paths: Iterable[PathType], checkpoint: Checkpoint | None = None
+) -> Iterator[Document]:
+    """
+    Read the documents from each of the files, in order. Compressed files
+    and zip archives are decompressed as they are read (see open_inputs).
+
+    With a checkpoint, each file is read from the offset after the last
+    document processed, so earlier documents are not parsed again. For
+    compressed files, the offsets are in the decompressed data, and the
+    data before the offset still has to be decompressed to skip it.
+    """
+    for path in expand_paths(paths):
+        for source, stream in open_inputs(path):
+            progress = checkpoint.progress(source) if checkpoint else FileProgress()
+            if progress.offset:
+                stream.seek(progress.offset)
+            yield from split_documents(
+                stream, source, index=progress.documents, offset=progress.offset
+            )
@@ -0,0 +1,163 @@
+"""
+Extraction without building a tree: for models whose queries are all simple
+paths to text or attributes, the parser's events are matched directly
+against the paths, and only the values needed are kept.
+"""
+
+from __future__ import annotations
+
+from typing import Mapping, Sequence, cast
+
+from .docs import DocInput, FieldQuery, ParsedPath, _new_parser, _parse, _parse_path
+
+
+class _Node:
+    """
+    A step in the trie of paths: the queries that collect this element's
+    text or attributes, and the steps below it.
+    """
+
+    __slots__ = ("children", "text", "attributes")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.text: list[int] = []
+        self.attributes: list[tuple[str, int]] = []
+
+    def add(self, steps: Sequence[str]) -> _Node:
+        node = self
+        for step in steps:
+            node = node.children.setdefault(step, _Node())
+        return node
+
+
+def _merge(first: _Node, second: _Node) -> _Node:
+    node = _Node()
+    node.text = first.text + second.text
+    node.attributes = first.attributes + second.attributes
+    node.children = dict(first.children)
+    for tag, child in second.children.items():
+        node.children[tag] = (
+            _merge(node.children[tag], child) if tag in node.children else child
+        )
+    return node
+
+
+def _parse_query(query: FieldQuery) -> ParsedPath | None:
+    """The steps of a query, or None if it is not a simple path"""
+    if query.query_type != "xpath":
+        return None
+    return _parse_path(query.query)
+
+
+class TargetPlan:
+    """
+    The queries of a model, compiled into a trie of element paths that a
+    parser target walks as the document is parsed.
+    """
+
+    def __init__(self, queries: list[ParsedPath]):
+        self.size = len(queries)
+        self.relative = _Node()
+        self.absolute: dict[str, _Node] = {}
+        for slot, (steps, absolute, attribute) in enumerate(queries):
+            if absolute:
+                root = self.absolute.setdefault(steps[0], _Node())
+                node = root.add(steps[1:])
+            else:
+                node = self.relative.add(steps)
+            if attribute is None:
+                node.text.append(slot)
+            else:
+                node.attributes.append((attribute, slot))
+        self._roots: dict[str, _Node] = {}
+
+    @classmethod
+    def compile(cls, query_fields: Mapping[str, FieldQuery]) -> TargetPlan | None:
+        """The plan for the queries, or None if any are not simple paths"""
+        queries = []
+        for query in query_fields.values():
+            parsed = _parse_query(query)
+            if parsed is None:
+                return None
+            queries.append(parsed)
+        return cls(queries)
+
+    def root(self, tag: str) -> _Node:
+        node = self._roots.get(tag)
+        if node is None:
+            node = self.relative
+            if tag in self.absolute:
+                node = _merge(node, self.absolute[tag])
+            self._roots[tag] = node
+        return node
+
+    def extract(self, source: DocInput, encoding: str | None = None) -> list[list[str]]:
+        """Parse the document, returning the results of each query in order"""
+        parser = _new_parser("xml", encoding, target=_Collector(self))
+        results: list[list[str]] = _parse(source, parser)
+        return results
+
+
+class _Collector:
+    """
+    The parser target. Text is buffered until the next event that ends a
+    text node (a child element, the end of the element, a comment or a
+    processing instruction), matching the text nodes XPath would return.
+    """
+
+    def __init__(self, plan: TargetPlan):
+        self.plan = plan
+        self.results: list[list[str]] = [[] for _ in range(plan.size)]
+        # The current element's node (None if no query reaches it), and
+        # those of its ancestors
+        self.node: _Node | None = None
+        self.stack: list[_Node | None] = []
+        self.buffer: list[str] = []
+
+    def _flush(self) -> None:
+        value = "".join(self.buffer)
+        for slot in cast(_Node, self.node).text:
+            self.results[slot].append(value)
+        self.buffer = []
+
+    def start(self, tag: str, attrib: Mapping[str, str]) -> None:
+        if self.buffer:
+            self._flush()
+
+        parent = self.node
+        if parent is not None:
+            node = parent.children.get(tag)
+        elif not self.stack:
+            node = self.plan.root(tag)
+        else:
+            node = None
+
+        if node is not None:
+            for name, slot in node.attributes:
+                value = attrib.get(name)
+                if value is not None:
+                    self.results[slot].append(value)
+        self.stack.append(parent)
+        self.node = node
+
+    def end(self, tag: str) -> None:
+        if self.buffer:
+            self._flush()
+        self.node = self.stack.pop()
+
+    def data(self, data: str) -> None:
+        node = self.node
+        if node is not None and node.text:
+            self.buffer.append(data)
+
+    def comment(self, text: str) -> None:
+        if self.buffer:
+            self._flush()
+
+    def pi(self, target: str, data: str | None = None) -> None:
+        if self.buffer:
+            self._flush()
+
+    def close(self) -> list[list[str]]:
+        return self.results
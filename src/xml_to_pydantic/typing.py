@@ -3,7 +3,7 @@ from __future__ import annotations
 import types
 from typing import Any, Union
 
-from typing_extensions import get_args, get_origin
+from typing_extensions import Annotated, get_args, get_origin
 
 
 def _is_union(origin: Any) -> bool:
@@ -28,6 +28,10 @@ def _is_optional(annotation: Any) -> tuple[bool, Any]:
     """
     Function to determine if a type is optional, and to return the
     type stripped of the optional.
+
+    Pydantic moves the metadata of an Annotated field into the field info,
+    but not when the Annotated type is inside an Optional, so that is also
+    stripped here.
     """
     if not _is_union(get_origin(annotation)):
         return False, annotation
@@ -40,6 +44,9 @@ def _is_optional(annotation: Any) -> tuple[bool, Any]:
         type_is_optional = True
 
     if len(args) == 1:
-        return type_is_optional, args.pop()
+        arg = args.pop()
+        if get_origin(arg) is Annotated:
+            arg = get_args(arg)[0]
+        return type_is_optional, arg
 
     return type_is_optional, Union[tuple(args)]
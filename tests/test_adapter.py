@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+import pydantic
+import pytest
+
+from xml_to_pydantic import (
+    DocAdapter,
+    DocModel,
+    DocModelError,
+    DocParsingError,
+    XpathField,
+)
+
+XML_BYTES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<root>
+    <record id="1"><name> a </name></record>
+    <record id="2"><name>b</name></record>
+</root>
+"""
+
+
+class Record(DocModel):
+    attr_id: int
+    name: str = XpathField("./name/text()")
+
+
+def test_list_of_models() -> None:
+    adapter = DocAdapter(List[Record], "//record")
+    records = adapter.validate_xml(XML_BYTES)
+    assert records == [Record(attr_id=1, name=" a "), Record(attr_id=2, name="b")]
+
+    # The adapter is reused across documents
+    assert adapter.validate_xml(b"<root/>") == []
+    assert repr(adapter) == f"DocAdapter({List[Record]!r}, '//record')"
+
+
+def test_root_model() -> None:
+    adapter = DocAdapter(Record)
+    assert adapter.validate_xml(b"<record id='3'><name>c</name></record>") == Record(
+        attr_id=3, name="c"
+    )
+
+
+def test_optional_model() -> None:
+    adapter = DocAdapter[Optional[Record]](Optional[Record], "//record[3]")
+    assert adapter.validate_xml(XML_BYTES) is None
+
+
+def test_values() -> None:
+    assert DocAdapter(List[int], "//record/@id").validate_xml(XML_BYTES) == [1, 2]
+    assert DocAdapter(str, "string(//record[2])").validate_xml(XML_BYTES) == "b"
+
+    names = DocAdapter(List[str], "//name/text()", strip=True)
+    assert names.validate_xml(XML_BYTES) == ["a", "b"]
+
+
+def test_css_html() -> None:
+    adapter = DocAdapter(List[str], "li", query_type="css")
+    html = b"<html><body><ul><li>a</li><li>b</li></ul></body></html>"
+    assert adapter.validate_html(html) == ["a", "b"]
+    assert adapter.validate_xml(b"<ul><li>c</li></ul>") == ["c"]
+
+
+def test_validation_error() -> None:
+    adapter = DocAdapter(List[Record], "//record")
+    with pytest.raises(pydantic.ValidationError, match="attr_id"):
+        adapter.validate_xml(b"<root><record id='x'><name>a</name></record></root>")
+
+
+def test_mapping_not_supported() -> None:
+    with pytest.raises(DocModelError, match="mappings"):
+        DocAdapter(Dict[str, Record], "//record")
+
+
+def test_query_errors() -> None:
+    with pytest.raises(DocModelError, match="Invalid query"):
+        DocAdapter(str, "//record[")
+
+    adapter = DocAdapter(str, "//ns:record")
+    with pytest.raises(DocParsingError, match="ns:record"):
+        adapter.validate_xml(XML_BYTES)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pydantic
+import pytest
+from typing_extensions import get_args
+
+from xml_to_pydantic import (
+    ConfigDict,
+    DocModel,
+    NumpyArray,
+    XpathField,
+    validate_columns,
+)
+
+XML_BYTES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<root>
+    <v>1.5</v><v>2</v><v> -3e2 </v>
+    <count>1</count><count>2</count>
+</root>
+"""
+
+
+class Series(DocModel):
+    readings: NumpyArray[np.float64] = XpathField(query="./v/text()")
+    count: NumpyArray[np.int32]
+    missing: NumpyArray[np.int64] | None = XpathField(
+        query="./missing/text()", default=None
+    )
+
+
+def test_array_field() -> None:
+    model = Series.model_validate_xml(XML_BYTES)
+    assert isinstance(model.readings, np.ndarray)
+    assert model.readings.dtype == np.float64
+    assert model.readings.tolist() == [1.5, 2.0, -300.0]
+    assert model.count.dtype == np.int32
+    assert model.count.tolist() == [1, 2]
+    assert model.missing is None
+
+
+def test_single_value_is_array() -> None:
+    class Model(DocModel):
+        readings: NumpyArray[np.float64] | None = XpathField(query="./v[1]/text()")
+
+    model = Model.model_validate_xml(XML_BYTES)
+    assert model.readings is not None
+    assert model.readings.tolist() == [1.5]
+
+
+@pytest.mark.parametrize("config", [{"engine": "target"}, {"codegen": True}])
+def test_engines(config: ConfigDict) -> None:
+    class Model(Series):
+        model_config = ConfigDict(**config)
+
+    model = Model.model_validate_xml(XML_BYTES)
+    assert model.readings.tolist() == [1.5, 2.0, -300.0]
+    assert model.count.tolist() == [1, 2]
+
+
+def test_invalid_values() -> None:
+    with pytest.raises(pydantic.ValidationError, match="could not convert") as exc:
+        Series.model_validate_xml(b"<root><v>1</v><v>x</v><count>1.5</count></root>")
+    assert [error["loc"] for error in exc.value.errors()] == [("readings",), ("count",)]
+
+
+@pytest.mark.parametrize(
+    ("dtype", "value", "message"),
+    [
+        (np.int64, "99999999999999999999", "too large"),
+        (np.int8, "128", "between -128 and 127"),
+        (np.uint8, "-1", "between 0 and 255"),
+        (np.uint8, "256", "between 0 and 255"),
+        (np.uint64, "-1", "between 0 and 18446744073709551615"),
+        (np.uint64, "18446744073709551616", "too large"),
+    ],
+)
+def test_out_of_range(dtype: type[np.generic], value: str, message: str) -> None:
+    class Values(DocModel):
+        v: NumpyArray[dtype]  # type: ignore[valid-type]
+
+    with pytest.raises(pydantic.ValidationError, match=message) as exc:
+        Values.model_validate_xml(b"<root><v>1</v><v>%s</v></root>" % value.encode())
+    assert exc.value.errors()[0]["loc"] == ("v",)
+
+
+@pytest.mark.parametrize("dtype", [np.int8, np.uint8, np.uint64, np.int64])
+def test_integer_limits(dtype: type[np.integer[Any]]) -> None:
+    class Values(DocModel):
+        v: NumpyArray[dtype]  # type: ignore[valid-type]
+
+    info = np.iinfo(dtype)
+    doc = b"<root><v>%d</v><v>%d</v></root>" % (info.min, info.max)
+    values = Values.model_validate_xml(doc).v
+    assert values.dtype == dtype
+    assert values.tolist() == [info.min, info.max]
+    assert Values.model_validate({"v": []}).v.tolist() == []
+
+
+def test_python_input() -> None:
+    model = Series.model_validate(
+        {"readings": [1, 2], "count": np.array([3], dtype=np.int64)}
+    )
+    assert model.readings.dtype == np.float64
+    assert model.count.dtype == np.int32
+
+    with pytest.raises(pydantic.ValidationError, match="not a string"):
+        Series.model_validate({"readings": "12", "count": [1]})
+    with pytest.raises(pydantic.ValidationError, match="one dimensional"):
+        Series.model_validate({"readings": [[1.0]], "count": [1]})
+    with pytest.raises(pydantic.ValidationError, match="int\\(\\) argument"):
+        Series.model_validate({"readings": [1.0], "count": [{}]})
+
+
+def test_serialization() -> None:
+    model = Series.model_validate_xml(XML_BYTES)
+    assert model.model_dump_json() == (
+        '{"readings":[1.5,2.0,-300.0],"count":[1,2],"missing":null}'
+    )
+    assert isinstance(model.model_dump()["readings"], np.ndarray)
+
+    schema = Series.model_json_schema()["properties"]
+    assert schema["readings"]["items"] == {"type": "number"}
+    assert schema["count"]["items"] == {"type": "integer"}
+
+
+def test_unsupported_dtype() -> None:
+    with pytest.raises(TypeError, match="integer and float dtypes"):
+        NumpyArray[np.str_]  # noqa: B018
+    assert repr(get_args(NumpyArray[np.uint8])[1]) == "NumpyArray[uint8]"
+
+
+def test_array_columns() -> None:
+    columns = validate_columns(Series, [XML_BYTES, XML_BYTES])
+    readings = columns["readings"].data
+    assert len(readings) == 2  # noqa: PLR2004
+    assert all(isinstance(value, np.ndarray) for value in readings)
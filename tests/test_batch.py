@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+from array import array
+from typing import Optional
+
+import pydantic
+import pytest
+from lxml import etree
+from pydantic import AfterValidator, Field
+from pydantic_core import PydanticCustomError
+from typing_extensions import Annotated
+
+from xml_to_pydantic import (
+    BatchStats,
+    BatchValidator,
+    ConfigDict,
+    DocError,
+    DocLimitError,
+    DocLimits,
+    DocModel,
+    DocModelError,
+    DocParsingError,
+    XpathField,
+    validate_columns,
+)
+from xml_to_pydantic.stream import Document
+
+DOCS = [
+    b"<record><name>a</name><price>1.5</price><count>3</count></record>",
+    b"<record><name>b</name><count>4</count></record>",
+    b"<record><name>c</name><price>2.5</price></record>",
+]
+
+
+class Record(DocModel):
+    name: str
+    price: Optional[float] = None  # noqa: UP007
+    count: int = Field(gt=0, default=1)
+
+
+def test_columns() -> None:
+    columns = validate_columns(Record, DOCS)
+
+    assert columns["name"].data == ["a", "b", "c"]
+    assert columns["name"].mask == [False, False, False]
+    assert columns["price"].data == array("d", [1.5, 0.0, 2.5])
+    assert columns["price"].mask == [False, True, False]
+    assert columns["count"].data == array("q", [3, 4, 1])
+    assert len(columns["count"]) == 3  # noqa: PLR2004
+
+
+def test_columns_of_nested_models() -> None:
+    class Tag(DocModel):
+        attr_key: str
+
+    class Tagged(DocModel):
+        tag: list[Tag] = XpathField(query="./tag", default_factory=list)
+
+    docs = [b'<doc><tag key="a"/><tag key="b"/></doc>', b"<doc/>"]
+    columns = validate_columns(Tagged, docs)
+    assert columns["tag"].data == [[Tag(attr_key="a"), Tag(attr_key="b")], []]
+    assert columns["tag"].data[0] is not columns["tag"].data[1]
+
+
+def test_columns_html() -> None:
+    class Page(DocModel):
+        title: str = XpathField(query="/html/head/title/text()")
+
+    docs = [
+        "<html><head><title>Title 1</title></head></html>",
+        "<title>Title 2</title>",
+    ]
+    columns = validate_columns(Page, docs, doc_type="html")
+    assert columns["title"].data == ["Title 1", "Title 2"]
+
+
+def test_column_errors_refer_to_documents() -> None:
+    docs = [*DOCS, b"<record><price>abc</price><count>0</count></record>"]
+
+    with pytest.raises(pydantic.ValidationError) as exc_info:
+        validate_columns(Record, docs)
+
+    errors = [(error["loc"], error["type"]) for error in exc_info.value.errors()]
+    assert errors == [
+        ((3, "name"), "missing"),
+        ((3, "price"), "float_parsing"),
+        ((3, "count"), "greater_than"),
+    ]
+
+
+def test_column_errors_for_required_field() -> None:
+    class Required(DocModel):
+        a: int
+
+    docs = [b"<r><a>1</a></r>", b"<r><a>z</a></r>", b"<r/>", b"<r><a>3</a></r>"]
+    with pytest.raises(pydantic.ValidationError) as exc_info:
+        validate_columns(Required, docs)
+
+    errors = [(error["loc"], error["type"]) for error in exc_info.value.errors()]
+    assert errors == [((1, "a"), "int_parsing"), ((2, "a"), "missing")]
+
+
+def test_column_custom_errors() -> None:
+    def check_name(value: str) -> str:
+        if value == "b":
+            raise PydanticCustomError("not_b", "{name} is not allowed", {"name": value})
+        return value
+
+    class Checked(DocModel):
+        name: Annotated[str, AfterValidator(check_name)]
+
+    with pytest.raises(pydantic.ValidationError) as exc_info:
+        validate_columns(Checked, DOCS)
+
+    (error,) = exc_info.value.errors()
+    assert (error["loc"], error["type"], error["msg"]) == (
+        (1, "name"),
+        "not_b",
+        "b is not allowed",
+    )
+
+
+def test_columns_empty() -> None:
+    columns = validate_columns(Record, [])
+    assert columns["name"].data == []
+    assert columns["price"].data == array("d")
+
+
+def test_columns_numpy() -> None:
+    np = pytest.importorskip("numpy")
+
+    columns = validate_columns(Record, DOCS, numpy=True)
+    price, count = columns["price"], columns["count"]
+    assert isinstance(price.data, np.ndarray)
+    assert isinstance(price.mask, np.ndarray)
+    assert isinstance(count.data, np.ndarray)
+    assert price.data.dtype == np.float64
+    assert price.data.tolist() == [1.5, 0.0, 2.5]
+    assert price.mask.tolist() == [False, True, False]
+    assert count.data.tolist() == [3, 4, 1]
+    assert columns["name"].data == ["a", "b", "c"]
+
+
+DIRTY_DOCS = [
+    DOCS[0],
+    b"<record><name>b</name><count>0</count></record>",
+    b"<record><name>c</name>",
+    DOCS[2],
+]
+
+
+def test_batch_collect_errors() -> None:
+    validator = BatchValidator(Record)
+    models = list(validator.validate(DIRTY_DOCS))
+
+    assert [model.name for model in models] == ["a", "c"]
+    first, second = validator.errors
+    assert first == DocError(
+        index=1,
+        error="ValidationError",
+        message=first.message,
+        details=[
+            {
+                "loc": ["count"],
+                "type": "greater_than",
+                "msg": "Input should be greater than 0",
+            }
+        ],
+    )
+    assert second.index == 2  # noqa: PLR2004
+    assert second.error == "XMLSyntaxError"
+    assert second.details == []
+    assert validator.stats == BatchStats(
+        documents=4,
+        failed=2,
+        by_error={"ValidationError": 1, "XMLSyntaxError": 1},
+    )
+
+
+def test_batch_skip_errors() -> None:
+    validator = BatchValidator(Record, on_error="skip")
+    models = list(validator.validate(DIRTY_DOCS))
+
+    assert len(models) == 2  # noqa: PLR2004
+    assert validator.errors == []
+    assert validator.stats.failed == 2  # noqa: PLR2004
+
+
+def test_batch_raise_errors() -> None:
+    validator = BatchValidator(Record, on_error="raise")
+    models = validator.validate(DIRTY_DOCS)
+
+    assert next(models).name == "a"
+    with pytest.raises(pydantic.ValidationError):
+        next(models)
+    assert validator.stats == BatchStats(
+        documents=2, failed=1, by_error={"ValidationError": 1}
+    )
+
+
+def test_batch_documents_from_files() -> None:
+    docs = [
+        Document("feed.xml", index, offset, data)
+        for index, offset, data in [(10, 0, DOCS[0]), (11, 64, DIRTY_DOCS[1])]
+    ]
+    validator = BatchValidator(Record)
+    assert [model.name for model in validator.validate(docs)] == ["a"]
+
+    (error,) = validator.errors
+    assert (error.source, error.index, error.offset) == ("feed.xml", 11, 64)
+
+
+def test_batch_validate_one() -> None:
+    class Page(DocModel):
+        model_config = ConfigDict(xpath_root="//div")
+        title: str
+
+    validator = BatchValidator(Page, doc_type="html")
+    page = validator.validate_one(b"<div><title>t</title></div>")
+    assert isinstance(page, Page)
+    assert page.title == "t"
+
+    element = etree.fromstring(b"<root><div/><div/></root>")
+    error = validator.validate_one(element, index=5)
+    assert isinstance(error, DocError)
+    assert error.index == 5  # noqa: PLR2004
+    assert error.error == DocParsingError.__name__
+    # Only validate() collects the errors
+    assert validator.errors == []
+
+
+def test_batch_where() -> None:
+    docs = [
+        *DOCS,
+        b"<record><name>d</name><price>free</price></record>",
+        b"<record><name>e</name>",
+    ]
+    validator = BatchValidator(Record, where="number(//price) > 1 or //price = 'free'")
+    assert [record.name for record in validator.validate(docs)] == ["a", "c"]
+    # Documents that don't match aren't validated, but all are parsed
+    assert [(error.index, error.error) for error in validator.errors] == [
+        (3, "ValidationError"),
+        (4, "XMLSyntaxError"),
+    ]
+    assert validator.stats == BatchStats(
+        documents=5,
+        failed=2,
+        filtered=1,
+        by_error={"ValidationError": 1, "XMLSyntaxError": 1},
+    )
+
+    assert validator.validate_one(DOCS[1]) is None
+    assert list(validator.extract(docs[:2])) == [
+        {"name": "a", "price": "1.5", "count": "3"}
+    ]
+
+
+def test_batch_where_html() -> None:
+    class Page(DocModel):
+        title: str = XpathField("//title/text()")
+
+    validator = BatchValidator(
+        Page, doc_type="html", where="//meta[@name='robots' and @content='index']"
+    )
+    pages: list[bytes | etree._Element] = [
+        b"<title>a</title><meta name='robots' content='index'>",
+        b"<title>b</title><meta name='robots' content='noindex'>",
+        etree.fromstring(b"<html><title>c</title></html>"),
+    ]
+    assert [page.title for page in validator.validate(pages)] == ["a"]
+    assert validator.stats.filtered == 2  # noqa: PLR2004
+
+
+def test_batch_where_limits() -> None:
+    class Limited(Record):
+        model_config = ConfigDict(limits=DocLimits(max_bytes=60))
+
+    validator = BatchValidator(Limited, where="//count", on_error="raise")
+    assert validator.validate_one(DOCS[1]) is not None
+    with pytest.raises(DocLimitError):
+        validator.validate_one(DOCS[0])
+
+
+def test_batch_invalid_where() -> None:
+    with pytest.raises(DocModelError, match="Invalid where expression"):
+        BatchValidator(Record, where="//price >")
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from lxml import etree
+
+from xml_to_pydantic import (
+    ConfigDict,
+    DirectoryStorage,
+    DocModel,
+    MemoryStorage,
+    ResultCache,
+    XpathField,
+)
+
+XML_BYTES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<root>
+    <element1>text1</element1>
+    <element2>4.53</element2>
+</root>
+"""
+
+
+def test_cache_hits_and_misses() -> None:
+    cache = ResultCache()
+
+    class MyModel(DocModel):
+        model_config = ConfigDict(result_cache=cache)
+        element1: str
+        element2: float
+
+    first = MyModel.model_validate_xml(XML_BYTES)
+    second = MyModel.model_validate_xml(XML_BYTES)
+    third = MyModel.model_validate_xml(XML_BYTES.decode())
+
+    assert first == second == third
+    assert second.element2 == 4.53  # noqa: PLR2004
+    assert cache.stats.misses == 1
+    assert cache.stats.hits == 2  # noqa: PLR2004
+    assert cache.stats.hit_rate == 2 / 3
+    assert len(cache.storage) == 1
+
+
+def test_cache_hit_is_still_validated() -> None:
+    """The cache holds the extracted data, so validators run on every hit"""
+    cache = ResultCache()
+    calls = []
+
+    class MyModel(DocModel):
+        model_config = ConfigDict(result_cache=cache)
+        element1: str
+
+        def model_post_init(self, __context: object) -> None:
+            calls.append(self.element1)
+
+    MyModel.model_validate_xml(XML_BYTES)
+    MyModel.model_validate_xml(XML_BYTES)
+    assert calls == ["text1", "text1"]
+    assert cache.stats.hits == 1
+
+
+def test_cache_keys_differ_by_model_and_doc_type() -> None:
+    cache = ResultCache()
+
+    class Model1(DocModel):
+        model_config = ConfigDict(result_cache=cache)
+        element1: str = XpathField(query="//element1/text()")
+
+    class Model2(DocModel):
+        model_config = ConfigDict(result_cache=cache)
+        element2: str
+
+    assert Model1.model_validate_xml(XML_BYTES).element1 == "text1"
+    assert Model2.model_validate_xml(XML_BYTES).element2 == "4.53"
+    assert Model1.model_validate_html(XML_BYTES).element1 == "text1"
+    assert cache.stats.misses == 3  # noqa: PLR2004
+    assert cache.stats.hits == 0
+
+
+def test_cache_keys_differ_by_query() -> None:
+    cache = ResultCache()
+
+    def make_model(query: str) -> Any:
+        class Model(DocModel):
+            model_config = ConfigDict(result_cache=cache)
+            value: str = XpathField(query)
+
+        return Model
+
+    # The same name, but different queries
+    first, second = make_model("//element1/text()"), make_model("//element2/text()")
+    assert first.__qualname__ == second.__qualname__
+    assert first.model_validate_xml(XML_BYTES).value == "text1"
+    assert second.model_validate_xml(XML_BYTES).value == "4.53"
+    assert cache.stats.misses == 2  # noqa: PLR2004
+
+    # The same queries give the same key
+    third = make_model("//element1/text()")
+    assert third.model_validate_xml(XML_BYTES).value == "text1"
+    assert cache.stats.hits == 1
+
+
+def test_cache_keys_differ_by_nested_query() -> None:
+    cache = ResultCache()
+
+    def make_model(query: str) -> type[DocModel]:
+        class Inner(DocModel):
+            value: str = XpathField(query)
+
+        class Outer(DocModel):
+            model_config = ConfigDict(result_cache=cache)
+            inner: list[Inner] = XpathField("/root")
+            outer: list[Outer] = []
+
+        return Outer
+
+    first, second = make_model("./element1/text()"), make_model("./element2/text()")
+    assert cache.key(first, "xml", XML_BYTES) != cache.key(second, "xml", XML_BYTES)
+    assert cache.key(first, "xml", XML_BYTES) == cache.key(
+        make_model("./element1/text()"), "xml", XML_BYTES
+    )
+    results: list[Any] = [cls.model_validate_xml(XML_BYTES) for cls in [first, second]]
+    assert [result.inner[0].value for result in results] == ["text1", "4.53"]
+
+
+def test_cache_skipped_for_elements() -> None:
+    cache = ResultCache()
+
+    class MyModel(DocModel):
+        model_config = ConfigDict(result_cache=cache)
+        element1: str
+
+    MyModel.model_validate_xml(etree.fromstring(XML_BYTES))
+    assert cache.stats.misses == 0
+    assert len(cache.storage) == 0
+
+
+def test_empty_cache_stats() -> None:
+    assert ResultCache().stats.hit_rate == 0.0
+
+
+def test_memory_storage_evicts_least_recently_used() -> None:
+    storage = MemoryStorage(max_entries=2)
+    storage.set("a", b"1")
+    storage.set("b", b"2")
+    assert storage.get("a") == b"1"
+    storage.set("c", b"3")
+
+    assert storage.get("b") is None
+    assert storage.get("a") == b"1"
+    assert storage.get("c") == b"3"
+    assert storage.evictions == 1
+
+
+def test_memory_storage_evicts_by_size() -> None:
+    storage = MemoryStorage(max_entries=None, max_bytes=10)
+    storage.set("a", b"12345")
+    storage.set("b", b"12345")
+    assert storage.total_bytes == 10  # noqa: PLR2004
+
+    storage.set("a", b"123")
+    assert storage.total_bytes == 8  # noqa: PLR2004
+
+    storage.set("c", b"12345")
+    assert storage.get("b") is None
+    assert len(storage) == 2  # noqa: PLR2004
+    assert storage.total_bytes == 8  # noqa: PLR2004
+
+
+def test_directory_storage(tmp_path: Path) -> None:
+    storage = DirectoryStorage(tmp_path, max_entries=2)
+    storage.set("a", b"1")
+    storage.set("b", b"2")
+    assert storage.get("a") == b"1"
+    storage.set("c", b"3")
+
+    assert storage.get("b") is None
+    assert sorted(file.name for file in tmp_path.iterdir()) == ["a.json", "c.json"]
+
+    reopened = DirectoryStorage(tmp_path, max_bytes=1)
+    assert len(reopened) == 1
+    assert reopened.get("c") == b"3"
+    assert [file.name for file in tmp_path.iterdir()] == ["c.json"]
+
+
+def test_directory_storage_shared_while_open(tmp_path: Path) -> None:
+    first = DirectoryStorage(tmp_path, max_entries=1)
+    second = DirectoryStorage(tmp_path, max_entries=1)
+
+    # Entries written by one are read by the other
+    first.set("a", b"1")
+    assert second.get("a") == b"1"
+    assert len(second) == 1
+
+    # And those one evicts are misses for the other
+    second.set("b", b"2")
+    assert first.get("a") is None
+    assert len(first) == 0
+    assert first.get("b") == b"2"
+    assert first.total_bytes == 1
+    assert sorted(file.name for file in tmp_path.iterdir()) == ["b.json"]
+
+    # Reading another's entry can evict one too
+    (tmp_path / "c.json").write_bytes(b"3")
+    assert first.get("c") == b"3"
+    assert first.evictions == 1
+    assert sorted(file.name for file in tmp_path.iterdir()) == ["c.json"]
+
+
+def test_directory_cache_shared_between_instances(tmp_path: Path) -> None:
+    class MyModel(DocModel):
+        model_config = ConfigDict(result_cache=ResultCache(DirectoryStorage(tmp_path)))
+        element1: str
+
+    MyModel.model_validate_xml(XML_BYTES)
+
+    cache = ResultCache(DirectoryStorage(tmp_path))
+    MyModel.model_config["result_cache"] = cache
+    assert MyModel.model_validate_xml(XML_BYTES).element1 == "text1"
+    assert cache.stats.hits == 1
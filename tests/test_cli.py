@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, ClassVar
+
+import pytest
+from pydantic import model_validator
+
+from xml_to_pydantic import DocModel, XpathField
+from xml_to_pydantic.cli import load_model, main
+from xml_to_pydantic.stream import Checkpoint, expand_paths, iter_documents
+
+DATA_FILE = Path(__file__).parent / "endtoend" / "data" / "ipg240109_head.xml"
+N_PATENTS = 102
+
+
+class Patent(DocModel):
+    title: str = XpathField(
+        query="/us-patent-grant/us-bibliographic-data-grant/invention-title/text()"
+    )
+    kind: str = XpathField(
+        query="/us-patent-grant/us-bibliographic-data-grant"
+        "/publication-reference/document-id/kind/text()"
+    )
+
+
+class Page(DocModel):
+    title: str = XpathField(query="/html/head/title/text()")
+
+
+class Value(DocModel):
+    value: int
+
+
+class NotAModel:
+    pass
+
+
+class CrashingPatent(Patent):
+    """Fails part way through a run, like a worker being killed"""
+
+    validated: ClassVar[int] = 0
+    crash_at: ClassVar[int | None] = None
+
+    @model_validator(mode="after")
+    def crash(self) -> CrashingPatent:
+        CrashingPatent.validated += 1
+        if CrashingPatent.validated == CrashingPatent.crash_at:
+            raise RuntimeError("crashed")
+        return self
+
+
+def read_jsonl(path: Path) -> list[dict[str, Any]]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_split_concatenated_documents() -> None:
+    docs = list(iter_documents([DATA_FILE]))
+    assert len(docs) == N_PATENTS
+    assert [doc.index for doc in docs] == list(range(N_PATENTS))
+    assert all(doc.data.startswith(b"<?xml") for doc in docs)
+
+    data = DATA_FILE.read_bytes()
+    for doc in docs[:5]:
+        assert data[doc.offset : doc.offset + len(doc.data)] == doc.data
+
+
+def test_single_document_without_declaration(tmp_path: Path) -> None:
+    (tmp_path / "page.html").write_bytes(b"<html>\n<body/>\n</html>\n")
+    docs = list(iter_documents([tmp_path / "page.html"]))
+    assert len(docs) == 1
+    assert docs[0].data == b"<html>\n<body/>\n</html>\n"
+
+    (tmp_path / "empty.xml").write_bytes(b"")
+    assert list(iter_documents([tmp_path / "empty.xml"])) == []
+
+
+def test_expand_paths(tmp_path: Path) -> None:
+    (tmp_path / "sub").mkdir()
+    for name in ["a.xml", "b.txt", "sub/c.xml", "a.xml.idx", "a.xml.tmp.idx"]:
+        (tmp_path / name).write_bytes(b"<a/>")
+
+    assert list(expand_paths([tmp_path])) == [
+        tmp_path / "a.xml",
+        tmp_path / "b.txt",
+        tmp_path / "sub" / "c.xml",
+    ]
+    assert list(expand_paths([tmp_path / "b.txt", f"{tmp_path}/**/*.xml"])) == [
+        tmp_path / "b.txt",
+        tmp_path / "a.xml",
+        tmp_path / "sub" / "c.xml",
+    ]
+    # Cached indexes are skipped unless named explicitly
+    assert list(expand_paths([f"{tmp_path}/a.*"])) == [tmp_path / "a.xml"]
+    assert list(expand_paths([tmp_path / "a.xml.idx"])) == [tmp_path / "a.xml.idx"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cli(tmp_path: Path, workers: int, capsys: pytest.CaptureFixture[str]) -> None:
+    output = tmp_path / "out.jsonl"
+    result = main(
+        [
+            "tests.test_cli:Patent",
+            str(DATA_FILE),
+            "-o",
+            str(output),
+            "-w",
+            str(workers),
+            "--chunksize",
+            "10",
+        ]
+    )
+
+    assert result == 0
+    patents = read_jsonl(output)
+    assert len(patents) == N_PATENTS
+    assert patents[0] == {"title": "Elongated kabob pet treat", "kind": "S1"}
+    assert f"{N_PATENTS} documents (0 errors)" in capsys.readouterr().err
+
+
+def test_cli_errors(tmp_path: Path) -> None:
+    (tmp_path / "good.html").write_bytes(b"<title>Title</title>")
+    (tmp_path / "bad.html").write_bytes(b"<p>No title</p>")
+
+    output = tmp_path / "out.jsonl"
+    errors = tmp_path / "errors.jsonl"
+    args = ["tests.test_cli:Page", str(tmp_path / "*.html"), "--html", "-q"]
+    result = main([*args, "-o", str(output), "-e", str(errors)])
+
+    assert result == 1
+    assert read_jsonl(output) == [{"title": "Title"}]
+    (error,) = read_jsonl(errors)
+    assert error["source"] == str(tmp_path / "bad.html")
+    assert error["error"] == "ValidationError"
+    assert error["details"] == [
+        {"loc": ["title"], "type": "missing", "msg": "Field required"}
+    ]
+
+
+def test_cli_extract_only(tmp_path: Path) -> None:
+    (tmp_path / "a.xml").write_bytes(b"<root><value>1</value></root>")
+    (tmp_path / "b.xml").write_bytes(b"<root><value>many</value></root>")
+    (tmp_path / "c.xml").write_bytes(b"<root><value>")
+
+    output = tmp_path / "out.jsonl"
+    errors = tmp_path / "errors.jsonl"
+    args = ["tests.test_cli:Value", str(tmp_path / "*.xml"), "--extract-only", "-q"]
+    result = main([*args, "-o", str(output), "-e", str(errors)])
+
+    # Only the document that can't be parsed fails: nothing is validated
+    assert result == 1
+    assert read_jsonl(output) == [{"value": "1"}, {"value": "many"}]
+    (error,) = read_jsonl(errors)
+    assert error["source"] == str(tmp_path / "c.xml")
+    assert error["error"] == "XMLSyntaxError"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cli_where(
+    tmp_path: Path, workers: int, capsys: pytest.CaptureFixture[str]
+) -> None:
+    output = tmp_path / "out.jsonl"
+    where = "//us-applicant//country = 'GB'"
+    args = [str(DATA_FILE), "--where", where, "-w", str(workers)]
+    result = main(["tests.test_cli:Patent", *args, "-o", str(output)])
+
+    assert result == 0
+    assert len(read_jsonl(output)) == 4  # noqa: PLR2004
+    assert f"{N_PATENTS} documents (0 errors, 98 filtered out)" in (
+        capsys.readouterr().err
+    )
+
+
+def test_cli_invalid_where(tmp_path: Path) -> None:
+    with pytest.raises(SystemExit):
+        main(["tests.test_cli:Patent", str(DATA_FILE), "--where", "//["])
+
+
+def test_cli_stdout(capsysbinary: pytest.CaptureFixture[bytes]) -> None:
+    assert main(["tests.test_cli:Patent", str(DATA_FILE), "-q"]) == 0
+    captured = capsysbinary.readouterr()
+    assert len(captured.out.splitlines()) == N_PATENTS
+    assert captured.err == b""
+
+
+@pytest.mark.parametrize(
+    "reference",
+    ["tests.test_cli", "tests.test_cli:NotAModel", "tests.test_cli:Missing"],
+)
+def test_cli_invalid_model(reference: str) -> None:
+    with pytest.raises(SystemExit):
+        main([reference, str(DATA_FILE)])
+
+
+def test_cli_no_inputs(tmp_path: Path) -> None:
+    with pytest.raises(SystemExit):
+        main(["tests.test_cli:Patent", str(tmp_path / "*.xml")])
+
+
+def test_load_model() -> None:
+    assert load_model("tests.test_cli:Patent") is Patent
+
+
+def test_checkpoint_resume(tmp_path: Path) -> None:
+    checkpoint_path = tmp_path / "checkpoint.json"
+    all_docs = list(iter_documents([DATA_FILE]))
+
+    with Checkpoint.open(checkpoint_path, interval=10) as checkpoint:
+        for doc in iter_documents([DATA_FILE], checkpoint):
+            checkpoint.update(doc, failed=doc.index % 2 == 1)
+            if doc.index == 24:  # noqa: PLR2004
+                break
+
+    checkpoint = Checkpoint.open(checkpoint_path)
+    progress = checkpoint.files[str(DATA_FILE)]
+    assert progress.documents == 25  # noqa: PLR2004
+    assert progress.errors == 12  # noqa: PLR2004
+    assert progress.offset == all_docs[25].offset
+
+    resumed = list(iter_documents([DATA_FILE], checkpoint))
+    assert resumed == all_docs[25:]
+
+
+def test_cli_resume_after_crash(tmp_path: Path) -> None:
+    output = tmp_path / "out.jsonl"
+    checkpoint = tmp_path / "checkpoint.json"
+    args = [
+        "tests.test_cli:CrashingPatent",
+        str(DATA_FILE),
+        "-o",
+        str(output),
+        "--checkpoint",
+        str(checkpoint),
+        "--checkpoint-interval",
+        "10",
+        "--chunksize",
+        "10",
+        "-q",
+    ]
+
+    CrashingPatent.crash_at = 35
+    with pytest.raises(RuntimeError):
+        main(args)
+    assert len(read_jsonl(output)) == 30  # noqa: PLR2004
+
+    # Simulate output written after the checkpoint was saved
+    with open(output, "ab") as f:
+        f.write(b'{"title": "partial"')
+
+    CrashingPatent.crash_at = None
+    CrashingPatent.validated = 0
+    assert main(args) == 0
+    assert CrashingPatent.validated == N_PATENTS - 30
+
+    main(["tests.test_cli:Patent", str(DATA_FILE), "-o", str(tmp_path / "all.jsonl")])
+    assert output.read_bytes() == (tmp_path / "all.jsonl").read_bytes()
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import traceback
+from pathlib import Path
+from typing import Union
+
+import pytest
+
+from xml_to_pydantic import (
+    ConfigDict,
+    CssField,
+    DocModel,
+    DocModelError,
+    DocParsingError,
+    XpathField,
+)
+from xml_to_pydantic.codegen import extractor_source
+from xml_to_pydantic.model import _EXTRACTORS, _extractor
+from xml_to_pydantic.stream import iter_documents
+
+DATA_FILE = Path(__file__).parent / "endtoend" / "data" / "ipg240109_head.xml"
+
+
+class Applicant(DocModel):
+    last_name: str | None = XpathField("./addressbook/last-name/text()", default=None)
+    attr_sequence: str
+
+
+class Patent(DocModel):
+    model_config = ConfigDict(
+        codegen=True, xpath_root="/us-patent-grant/us-bibliographic-data-grant"
+    )
+    title: str = XpathField("./invention-title/text()")
+    kind: str = XpathField(
+        "./publication-reference/document-id/kind/text()", intern=True
+    )
+    applicant: Applicant | None = XpathField(".//us-applicant[1]", default=None)
+    applicants: list[Applicant] = XpathField(".//us-applicant", default=[])
+    classes: list[str] = XpathField(
+        ".//classification-locarno/main-classification/text() | .//section/text()",
+        default=[],
+    )
+    title_css: list[str] = CssField("invention-title")
+
+
+class GenericPatent(Patent):
+    model_config = ConfigDict(codegen=False)
+
+
+def test_codegen_matches_generic() -> None:
+    docs = list(iter_documents([DATA_FILE]))
+    for doc in docs:
+        patent = Patent.model_validate_xml(doc.data)
+        assert (
+            patent.model_dump()
+            == GenericPatent.model_validate_xml(doc.data).model_dump()
+        )
+
+    assert _EXTRACTORS[Patent] is not None
+    assert GenericPatent not in _EXTRACTORS
+
+
+def test_codegen_source() -> None:
+    source = extractor_source(Patent)
+    assert source.startswith("def extract_0(doc, html=False):\n")
+    assert f"# {__name__}.Patent" in source
+    assert f"# {__name__}.Applicant" in source
+    assert "items = clean_" in source
+
+
+class Page(DocModel):
+    model_config = ConfigDict(codegen=True)
+    title: str = CssField("title")
+    first_link: str = XpathField("string(//a/@href)")
+    links: list[str] = XpathField("//a/@href")
+
+
+def test_codegen_html() -> None:
+    html = "<html><head><title>T</title></head><body><a href='/a'>A</a></body></html>"
+    page = Page.model_validate_html(html)
+    assert page.title == "T"
+    assert page.first_link == "/a"
+    assert page.links == ["/a"]
+
+
+class One(DocModel):
+    attr_one: str
+
+
+class Two(DocModel):
+    attr_two: str
+
+
+def test_codegen_union_of_models() -> None:
+    class Model(DocModel):
+        model_config = ConfigDict(codegen=True)
+        child: Union[One, Two]  # noqa: UP007
+
+    model = Model.model_validate_xml(b'<root><child two="2"/></root>')
+    assert model.child == Two(attr_two="2")
+    assert "_extract_items(items, annotation_" in extractor_source(Model)
+
+
+def test_codegen_unexpected_results() -> None:
+    class Model(DocModel):
+        # Strict, so that every result of the queries is extracted
+        model_config = ConfigDict(codegen=True, strict_matches=True)
+        child: One | None = XpathField("./child/@one | ./child", default=None)
+        value: str | None = XpathField("./child", default=None)
+
+    # Both are left to the generic extraction, which raises the same errors
+    with pytest.raises(DocModelError, match="Unable to use type"):
+        Model.model_validate_xml(b"<root><child/></root>")
+    with pytest.raises(DocParsingError, match="field attr_one"):
+        Model.model_validate_xml(b'<root><child one="1"/></root>')
+
+    model = Model.model_validate_xml(b"<root/>")
+    assert model.child is None
+
+
+def test_codegen_root_errors() -> None:
+    class Model(DocModel):
+        model_config = ConfigDict(codegen=True, xpath_root="./child")
+        value: str
+
+    class Text(DocModel):
+        model_config = ConfigDict(codegen=True, xpath_root="string(./child)")
+        value: str
+
+    with pytest.raises(DocParsingError, match="exactly one element"):
+        Model.model_validate_xml(b"<root><child/><child/></root>")
+    with pytest.raises(DocParsingError, match="returned a <class 'str'> instead"):
+        Text.model_validate_xml(b"<root><child/></root>")
+
+
+def test_codegen_query_errors() -> None:
+    class Prefix(DocModel):
+        model_config = ConfigDict(codegen=True)
+        value: str = XpathField("./ns:value/text()")
+
+    class Invalid(DocModel):
+        model_config = ConfigDict(codegen=True)
+        value: str = XpathField("./value[")
+
+    with pytest.raises(DocParsingError, match="field value") as exc_info:
+        Prefix.model_validate_xml(b"<root/>")
+
+    # The generated source is shown in the traceback
+    cause = exc_info.value.__cause__
+    assert cause is not None
+    frame = traceback.extract_tb(cause.__traceback__)[0]
+    assert (
+        frame.filename
+        == f"<xml_to_pydantic extractor {__name__}.{Prefix.__qualname__}>"
+    )
+    assert frame.line is not None
+    assert frame.line.startswith("items = xpath_")
+
+    # An invalid query is left to the generic extraction to report
+    with pytest.raises(DocParsingError, match="field value"):
+        Invalid.model_validate_xml(b"<root/>")
+    assert _extractor(Invalid) is None
+
+
+def test_codegen_not_cached_before_model_complete() -> None:
+    class Model(DocModel):
+        model_config = ConfigDict(codegen=True)
+        child: Child
+
+    assert _extractor(Model) is not None
+    assert Model not in _EXTRACTORS
+
+    class Child(DocModel):
+        value: str
+
+    Model.model_rebuild()
+    assert Model.model_validate_xml(b"<r><child><value>v</value></child></r>")
+    assert Model in _EXTRACTORS
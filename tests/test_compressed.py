@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import json
+import lzma
+import zipfile
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from xml_to_pydantic.cli import main
+from xml_to_pydantic.index import iter_shard
+from xml_to_pydantic.stream import (
+    Checkpoint,
+    is_compressed,
+    iter_documents,
+    open_inputs,
+)
+
+DATA_FILE = Path(__file__).parent / "endtoend" / "data" / "ipg240109_head.xml"
+N_PATENTS = 102
+
+# The fastest settings, as the compression ratio doesn't matter here
+COMPRESSORS: dict[str, Callable[[bytes], bytes]] = {
+    ".gz": lambda data: gzip.compress(data, compresslevel=1),
+    ".bz2": lambda data: bz2.compress(data, compresslevel=1),
+    ".xz": lambda data: lzma.compress(data, preset=0),
+}
+
+
+def compress(tmp_path: Path, suffix: str) -> Path:
+    path = tmp_path / f"{DATA_FILE.name}{suffix}"
+    path.write_bytes(COMPRESSORS[suffix](DATA_FILE.read_bytes()))
+    return path
+
+
+@pytest.mark.parametrize("suffix", list(COMPRESSORS))
+def test_compressed_documents(tmp_path: Path, suffix: str) -> None:
+    path = compress(tmp_path, suffix)
+    assert is_compressed(path)
+
+    expected = list(iter_documents([DATA_FILE]))
+    docs = list(iter_documents([path]))
+    assert [doc.data for doc in docs] == [doc.data for doc in expected]
+    assert [doc.offset for doc in docs] == [doc.offset for doc in expected]
+    assert {doc.source for doc in docs} == {str(path)}
+
+
+def test_zip_members(tmp_path: Path) -> None:
+    path = tmp_path / "patents.zip"
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(DATA_FILE, "a/patents.xml")
+        archive.writestr("b/", "")
+        archive.writestr("b/single.xml", "<us-patent-grant/>")
+
+    assert [source for source, _ in open_inputs(path)] == [
+        f"{path}::a/patents.xml",
+        f"{path}::b/single.xml",
+    ]
+
+    docs = list(iter_documents([path]))
+    assert len(docs) == N_PATENTS + 1
+    assert docs[-1].source == f"{path}::b/single.xml"
+    assert docs[-1].index == 0
+
+
+def test_uncompressed_file() -> None:
+    assert not is_compressed(DATA_FILE)
+    ((source, stream),) = list(open_inputs(DATA_FILE))
+    assert source == str(DATA_FILE)
+    assert stream.closed
+
+
+def test_compressed_checkpoint_resume(tmp_path: Path) -> None:
+    path = compress(tmp_path, ".gz")
+    all_docs = list(iter_documents([path]))
+
+    with Checkpoint.open(tmp_path / "checkpoint.json") as checkpoint:
+        for doc in iter_documents([path], checkpoint):
+            checkpoint.update(doc)
+            if doc.index == 24:  # noqa: PLR2004
+                break
+
+    resumed = list(iter_documents([path], checkpoint))
+    assert resumed == all_docs[25:]
+
+
+def test_cli_compressed(tmp_path: Path) -> None:
+    path = compress(tmp_path, ".xz")
+    output = tmp_path / "out.jsonl"
+
+    assert main(["tests.test_cli:Patent", str(path), "-o", str(output), "-q"]) == 0
+    patents = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(patents) == N_PATENTS
+    assert patents[0] == {"title": "Elongated kabob pet treat", "kind": "S1"}
+
+
+def test_shard_compressed(tmp_path: Path) -> None:
+    path = compress(tmp_path, ".bz2")
+
+    with pytest.raises(ValueError, match="compressed"):
+        list(iter_shard([path], 0, 2))
+
+    with pytest.raises(SystemExit):
+        main(["tests.test_cli:Patent", str(path), "--shard", "1/2"])
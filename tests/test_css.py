@@ -1,3 +1,5 @@
+import subprocess
+import sys
 from typing import List
 
 import pytest
@@ -66,3 +68,19 @@ def test_css_selector_nested_model() -> None:
     # TODO: fix this test
     with pytest.raises(ValidationError):
         MyModel.model_validate_html(html)
+
+
+def test_cssselect_imported_on_first_use() -> None:
+    code = """
+import sys
+import xml_to_pydantic
+
+assert "cssselect" not in sys.modules
+
+class MyModel(xml_to_pydantic.DocModel):
+    title: str = xml_to_pydantic.CssField(query="title")
+
+MyModel.model_validate_html(b"<html><head><title>Title</title></head></html>")
+assert "cssselect" in sys.modules
+"""
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import pytest
+from lxml import etree
+
+from xml_to_pydantic import ConfigDict, DocModel, XpathField
+from xml_to_pydantic.docs import _direct_query
+
+XML_BYTES = (
+    b'<record id="1" kind="k" empty="">text<!-- c -->after comment<a>a</a>tail</record>'
+)
+
+
+@pytest.mark.parametrize("query", ["@id", "@empty", "@missing", "text()", " ./text()"])
+@pytest.mark.parametrize("first", [False, True])
+def test_direct_queries(query: str, first: bool) -> None:
+    root = etree.fromstring(XML_BYTES)
+    direct = _direct_query(query, first)
+    assert direct is not None
+    expected = root.xpath(f"({query})[1]" if first else query, smart_strings=False)
+    assert direct(root) == expected
+    assert direct(root[1]) == root[1].xpath(query, smart_strings=False)[:1]
+
+
+@pytest.mark.parametrize(
+    "query", ["./a/text()", "a/@id", "/record/@id", "//a/text()", "string(@id)"]
+)
+def test_xpath_queries(query: str) -> None:
+    # Paths to other elements can match many, for which XPath is quicker
+    assert _direct_query(query, first=False) is None
+
+
+@pytest.mark.parametrize(
+    "config", [ConfigDict(), ConfigDict(codegen=True), ConfigDict(engine="target")]
+)
+def test_attribute_fields(config: ConfigDict) -> None:
+    class Record(DocModel):
+        model_config = config
+        attr_id: int
+        attr_kind: str
+        attr_missing: Optional[str] = None  # noqa: UP007
+        text: list[str] = XpathField("text()")
+
+    record = Record.model_validate_xml(XML_BYTES)
+    assert record == Record(
+        attr_id=1, attr_kind="k", text=["text", "after comment", "tail"]
+    )
@@ -11,6 +11,8 @@ ROOT = Path(__file__).parent.parent
     "example", find_examples(ROOT / "docs", ROOT / "README.md"), ids=str
 )
 def test_docs_linting(example: CodeExample, eval_example: EvalExample) -> None:
+    if example.prefix_settings().get("test") == "skip":
+        pytest.skip("example not runnable in tests")
     if eval_example.update_examples:
         eval_example.format(example)
         eval_example.run_print_update(example)
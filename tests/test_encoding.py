@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from xml_to_pydantic import (
+    ConfigDict,
+    CssField,
+    DocAdapter,
+    DocModel,
+    ResultCache,
+)
+from xml_to_pydantic.docs import _parser
+
+# None of the documents say what their encoding is
+HTML_UTF8 = "<html><body><p>café</p></body></html>".encode()
+HTML_CP1252 = "<html><body><p>€ café</p></body></html>".encode("cp1252")
+XML_LATIN1 = "<root><p>café</p></root>".encode("latin-1")
+XML_CP1252 = "<root><p>€ café</p></root>".encode("cp1252")
+
+
+class Page(DocModel):
+    p: str = CssField("p")
+
+
+def test_html_encoding() -> None:
+    # Without a meta tag, libxml2 reads HTML as latin-1
+    assert Page.model_validate_html(HTML_UTF8).p == "cafÃ©"
+    assert Page.model_validate_html(HTML_UTF8, encoding="utf-8").p == "café"
+    assert Page.model_validate_html(HTML_CP1252).p == "\x80 café"
+    assert Page.model_validate_html(HTML_CP1252, encoding="cp1252").p == "€ café"
+
+
+def test_xml_encoding() -> None:
+    assert Page.model_validate_xml(XML_CP1252, encoding="cp1252").p == "€ café"
+    # libxml2 doesn't know the name latin-1, so Python's name for it is used
+    assert Page.model_validate_xml(XML_LATIN1, encoding="latin-1").p == "café"
+
+    class Target(Page):
+        model_config = ConfigDict(engine="target")
+        p: str
+
+    assert Target.model_validate_xml(XML_CP1252, encoding="cp1252").p == "€ café"
+
+
+def test_text_ignores_encoding() -> None:
+    text = "<html><body><p>café 日本</p></body></html>"
+    assert Page.model_validate_html(text, encoding="latin-1").p == "café 日本"
+
+
+def test_unknown_encoding() -> None:
+    with pytest.raises(LookupError):
+        Page.model_validate_html(HTML_UTF8, encoding="not-an-encoding")
+
+
+def test_parsers_reused_per_thread() -> None:
+    parser = _parser("html", "utf-8")
+    assert _parser("html", "utf-8") is parser
+    assert _parser("html") is not parser
+    assert _parser("xml", "utf-8") is not parser
+
+    other: list[object] = []
+    thread = threading.Thread(target=lambda: other.append(_parser("html", "utf-8")))
+    thread.start()
+    thread.join()
+    assert other[0] is not parser
+
+
+def test_cache_key_includes_encoding() -> None:
+    cache = ResultCache()
+
+    class Cached(Page):
+        model_config = ConfigDict(result_cache=cache)
+
+    assert Cached.model_validate_html(HTML_UTF8, encoding="utf-8").p == "café"
+    assert Cached.model_validate_html(HTML_UTF8).p == "cafÃ©"
+    assert Cached.model_validate_html(HTML_UTF8, encoding="utf-8").p == "café"
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+def test_adapter_encoding() -> None:
+    adapter = DocAdapter(str, "p", query_type="css")
+    assert adapter.validate_html(HTML_UTF8, encoding="utf-8") == "café"
+    assert adapter.validate_xml(XML_CP1252, encoding="cp1252") == "€ café"
@@ -119,12 +119,27 @@ def test_list_to_str_fails() -> None:
     """
 
     class MyModel(DocModel):
+        model_config = ConfigDict(strict_matches=True)
         element1: str = XpathField(query="./element1/text()")
 
     with pytest.raises(pydantic.ValidationError):
         MyModel.model_validate_xml(xml_bytes)
 
 
+def test_str_takes_first_match() -> None:
+    xml_bytes = b"""<?xml version="1.0" encoding="UTF-8"?>
+    <root>
+        <element1>text1</element1>
+        <element1>text2</element1>
+    </root>
+    """
+
+    class MyModel(DocModel):
+        element1: str = XpathField(query="./element1/text()")
+
+    assert MyModel.model_validate_xml(xml_bytes).element1 == "text1"
+
+
 def test_non_xml_field_not_required() -> None:
     """All fields need a value, and for DocModels this
     usually comes from the XML. But if there's a default
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import List, cast
+
+import pytest
+
+from xml_to_pydantic import ConfigDict, DocAdapter, DocModel, XpathField
+
+XML_BYTES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<patent>
+    <claim num="1"><ref>US-123</ref><ref>EP-456</ref><ref>US-789</ref></claim>
+    <claim num="2"><ref>WO-1</ref></claim>
+    <claim num="10"><ref>US-2</ref></claim>
+    <price>3.5</price>
+    <price>7.25</price>
+</patent>
+"""
+
+
+@pytest.fixture(
+    params=[ConfigDict(), ConfigDict(codegen=True), ConfigDict(engine="target")]
+)
+def config(request: pytest.FixtureRequest) -> ConfigDict:
+    return cast(ConfigDict, request.param)
+
+
+def test_regular_expressions(config: ConfigDict) -> None:
+    class Patent(DocModel):
+        model_config = config
+        us_refs: list[str] = XpathField("//ref[re:test(., '^US-\\d+$')]/text()")
+        numbers: list[str] = XpathField("//ref/text()[re:test(., 'US|WO', 'i')]")
+        claim: str = XpathField("//claim[re:test(@num, '^\\d{2}$')]/ref/text()")
+
+    patent = Patent.model_validate_xml(XML_BYTES)
+    assert patent.us_refs == ["US-123", "US-789", "US-2"]
+    assert patent.numbers == ["US-123", "US-789", "WO-1", "US-2"]
+    assert patent.claim == "US-2"
+
+
+def test_other_extensions(config: ConfigDict) -> None:
+    class Patent(DocModel):
+        model_config = config
+        refs: str = XpathField("str:concat(//claim[1]/ref)")
+        countries: list[str] = XpathField(
+            "set:distinct(//ref/text()[re:test(., '^[A-Z]+-')])"
+        )
+        highest: float = XpathField("string(math:max(//price))")
+
+    patent = Patent.model_validate_xml(XML_BYTES)
+    assert patent.refs == "US-123EP-456US-789"
+    assert len(patent.countries) == 5  # noqa: PLR2004
+    assert patent.highest == 7.25  # noqa: PLR2004
+
+
+def test_xpath_root() -> None:
+    class Claim(DocModel):
+        model_config = ConfigDict(xpath_root="//claim[re:test(@num, '^2$')]")
+        ref: str
+
+    assert Claim.model_validate_xml(XML_BYTES).ref == "WO-1"
+
+
+def test_adapter() -> None:
+    adapter = DocAdapter(List[str], "//ref[re:test(., '^EP')]/text()")
+    assert adapter.validate_xml(XML_BYTES) == ["EP-456"]
+
+    adapter = DocAdapter(List[str], "//p/text()[re:test(., '^EP', 'i')]")
+    assert adapter.validate_html("<p>EP-1</p><p>US-2</p><p>ep-3</p>") == [
+        "EP-1",
+        "ep-3",
+    ]
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import pytest
+from pydantic import Field
+
+from xml_to_pydantic import (
+    BatchValidator,
+    ConfigDict,
+    DocError,
+    DocLimitError,
+    DocLimits,
+    DocModel,
+    MemoryStorage,
+    ResultCache,
+    XpathField,
+)
+
+XML_BYTES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<root>
+    <name>widget</name>
+    <price>not a number</price>
+    <part><id>1</id></part>
+    <part><id>2</id></part>
+</root>
+"""
+
+
+class Part(DocModel):
+    id: int
+
+
+class Product(DocModel):
+    name: str
+    price: float
+    count: int = Field(gt=0, default=1)
+    part: list[Part]
+
+
+def test_extract_xml() -> None:
+    # Nothing is validated, so the invalid price, and the missing count, are
+    # left as they are
+    assert Product.model_extract_xml(XML_BYTES) == {
+        "name": "widget",
+        "price": "not a number",
+        "part": [{"id": "1"}, {"id": "2"}],
+    }
+
+
+def test_extract_html() -> None:
+    class Page(DocModel):
+        title: str = XpathField("//title/text()")
+        links: list[str] = XpathField("//a/@href")
+
+    html = "<title>t</title><a href='/a'>a</a><a href='/b'>b</a>"
+    assert Page.model_extract_html(html) == {"title": "t", "links": ["/a", "/b"]}
+
+
+def test_extract_matches_validate() -> None:
+    xml = XML_BYTES.replace(b"not a number", b"1.5")
+    assert Product.model_validate(Product.model_extract_xml(xml)) == (
+        Product.model_validate_xml(xml)
+    )
+
+
+def test_extract_with_limits() -> None:
+    with pytest.raises(DocLimitError):
+        Product.model_extract_xml(XML_BYTES, limits=DocLimits(max_results=1))
+
+
+def test_extract_cached() -> None:
+    cache = ResultCache(MemoryStorage())
+
+    class CachedPart(DocModel):
+        model_config = ConfigDict(result_cache=cache)
+        id: list[str] = XpathField("//id/text()")
+
+    first = CachedPart.model_extract_xml(XML_BYTES)
+    second = CachedPart.model_extract_xml(XML_BYTES)
+    assert first == second == {"id": ["1", "2"]}
+    assert cache.stats.hits == 1
+    # Each call gets its own data, which can be changed freely
+    first["id"].append("3")
+    assert CachedPart.model_extract_xml(XML_BYTES) == {"id": ["1", "2"]}
+
+
+def test_batch_extract() -> None:
+    class Record(DocModel):
+        name: str
+        price: Optional[float] = None  # noqa: UP007
+
+    docs = [
+        b"<record><name>a</name><price>cheap</price></record>",
+        b"<record><name>b</name>",
+        b"<record><name>c</name></record>",
+    ]
+    validator = BatchValidator(Record, on_error="collect")
+    assert list(validator.extract(docs)) == [
+        {"name": "a", "price": "cheap"},
+        {"name": "c"},
+    ]
+    (error,) = validator.errors
+    assert error.index == 1
+    assert error.error == "XMLSyntaxError"
+    assert validator.stats.documents == 3  # noqa: PLR2004
+
+    skipping = BatchValidator(Record, on_error="skip")
+    assert len(list(skipping.extract(docs))) == 2  # noqa: PLR2004
+    assert skipping.errors == []
+
+    result = validator.extract_one(docs[1], index=7)
+    assert isinstance(result, DocError)
+    assert result.index == 7  # noqa: PLR2004
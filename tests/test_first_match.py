@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from typing import Any, Union, cast
+
+import pydantic
+import pytest
+from lxml import etree
+
+from xml_to_pydantic import ConfigDict, CssField, DocAdapter, DocModel, XpathField
+from xml_to_pydantic.docs import _find_first, _parse_path
+
+XML_BYTES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<root>
+    <title> </title>
+    <title>first</title>
+    <section><title>second</title></section>
+    <value>1</value>
+    <value>2</value>
+</root>
+"""
+
+
+class Section(DocModel):
+    title: str
+
+
+class Value(DocModel):
+    value: int = XpathField("./text()")
+
+
+@pytest.fixture(
+    params=[ConfigDict(), ConfigDict(codegen=True), ConfigDict(engine="target")]
+)
+def config(request: pytest.FixtureRequest) -> ConfigDict:
+    return cast(ConfigDict, request.param)
+
+
+def test_first_match(config: ConfigDict) -> None:
+    class Model(DocModel):
+        model_config = config
+        value: int
+        last_value: int = XpathField("./value[last()]/text()")
+        titles: list[str] = XpathField("//title/text()")
+        title: str = XpathField("//title/text()", drop_blank=True)
+        css_title: str = CssField("section title")
+
+    model = Model.model_validate_xml(XML_BYTES)
+    assert model.value == 1
+    assert model.last_value == 2  # noqa: PLR2004
+    assert model.titles == [" ", "first", "second"]
+    # The first result that isn't blank
+    assert model.title == "first"
+    assert model.css_title == "second"
+
+
+def test_first_match_models(config: ConfigDict) -> None:
+    class Model(DocModel):
+        model_config = config
+        section: Section = XpathField("//section/title | //section")
+        value: Union[Value, Section] = XpathField("//value")  # noqa: UP007
+        all_values: list[Value] = XpathField("//value")
+
+    model = Model.model_validate_xml(XML_BYTES)
+    assert model.section == Section(title="second")
+    assert model.value == Value(value=1)
+    assert model.all_values == [Value(value=1), Value(value=2)]
+
+
+def test_fields_taking_lists(config: ConfigDict) -> None:
+    class Model(DocModel):
+        model_config = config
+        any_value: Any = XpathField("//value/text()")
+        either: Union[int, list[int]] = XpathField("//value/text()")  # noqa: UP007
+
+    model = Model.model_validate_xml(XML_BYTES)
+    assert model.any_value == ["1", "2"]
+    assert model.either == [1, 2]
+
+
+def test_strict_matches(config: ConfigDict) -> None:
+    class Model(DocModel):
+        model_config = ConfigDict(**config, strict_matches=True)
+        value: int
+
+    with pytest.raises(pydantic.ValidationError, match="valid integer"):
+        Model.model_validate_xml(XML_BYTES)
+
+
+def test_queries_stop_early() -> None:
+    class Model(DocModel):
+        value: int
+        values: list[int] = XpathField("./value/text()")
+        count: int = XpathField("string(count(//value))")
+        title: str = XpathField("//title/text()", drop_blank=True)
+        css_title: str = CssField("title")
+        invalid: str = XpathField("./value[", default="")
+
+    queries = Model.query_fields()
+    stops_early = {name: query.stops_early for name, query in queries.items()}
+    assert stops_early == {
+        "value": True,
+        "values": False,
+        # Only nodes can be limited to the first result
+        "count": False,
+        "title": False,
+        "css_title": True,
+        "invalid": False,
+    }
+
+
+def test_adapter() -> None:
+    first = DocAdapter(str, "//title/text()", drop_blank=True)
+    assert first.validate_xml(XML_BYTES) == "first"
+    css = DocAdapter(str, "p", query_type="css")
+    assert css.validate_html("<p>a</p><p>b</p>") == "a"
+
+    strict = DocAdapter(str, "//title/text()", strict_matches=True)
+    with pytest.raises(pydantic.ValidationError):
+        strict.validate_xml(XML_BYTES)
+
+
+TRICKY_XML = b"""<root id="r">
+    <a/>
+    <a x="1"><!-- comment -->after comment<b>b1</b></a>
+    <a x="2"><b/><b>b2</b>tail<?pi?>after pi</a>
+</root>
+"""
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "./a/text()",
+        "./a/@x",
+        "./a/b/text()",
+        "a/@y",
+        "./b/text()",
+        "text()",
+        "@id",
+        "/root/a/@x",
+        "/root/@id",
+        "/other/a/@x",
+    ],
+)
+def test_find_first(query: str) -> None:
+    # The same first result as XPath, from the root and from a child
+    root = etree.fromstring(TRICKY_XML)
+    path = _parse_path(query)
+    assert path is not None
+    for element in [root, root[2]]:
+        expected = element.xpath(f"({query})[1]", smart_strings=False)
+        assert _find_first(element, path) == expected
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from xml_to_pydantic.cli import main
+from xml_to_pydantic.index import DocumentIndex, iter_shard
+from xml_to_pydantic.stream import Checkpoint, iter_documents
+
+DATA_FILE = Path(__file__).parent / "endtoend" / "data" / "ipg240109_head.xml"
+N_PATENTS = 102
+
+
+@pytest.fixture()
+def data_file(tmp_path: Path) -> Path:
+    path = tmp_path / DATA_FILE.name
+    shutil.copy(DATA_FILE, path)
+    return path
+
+
+def test_index_matches_split_documents(data_file: Path) -> None:
+    docs = list(iter_documents([data_file]))
+
+    with DocumentIndex.build(data_file) as index:
+        assert len(index) == N_PATENTS
+        assert list(index) == docs
+        assert index[5] == docs[5]
+        assert index[-1] == docs[-1]
+        assert index.span(0) == (0, len(docs[0].data))
+
+        with pytest.raises(IndexError):
+            index[N_PATENTS]
+
+
+def test_index_cached_next_to_file(data_file: Path) -> None:
+    index_path = DocumentIndex.index_path(data_file)
+    assert not index_path.exists()
+
+    with DocumentIndex.load(data_file) as index:
+        offsets = index.offsets
+    assert index_path.exists()
+
+    with DocumentIndex.load(data_file) as index:
+        assert index.offsets == offsets
+
+    # A stale index is rebuilt
+    with open(data_file, "ab") as f:
+        f.write(b'\n<?xml version="1.0"?>\n<extra/>\n')
+    with DocumentIndex.load(data_file) as index:
+        assert len(index) == N_PATENTS + 1
+        assert index[N_PATENTS].data == b'<?xml version="1.0"?>\n<extra/>\n'
+
+    # As is an unreadable one
+    for contents in [b"XTPIDX1\n", b"something else"]:
+        index_path.write_bytes(contents)
+        with DocumentIndex.load(data_file) as index:
+            assert len(index) == N_PATENTS + 1
+
+
+def test_index_not_cached_when_directory_read_only(
+    data_file: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        DocumentIndex, "index_path", staticmethod(lambda path: data_file.parent)
+    )
+    with DocumentIndex.load(data_file) as index:
+        assert len(index) == N_PATENTS
+
+
+def test_empty_file(tmp_path: Path) -> None:
+    (tmp_path / "empty.xml").write_bytes(b"")
+    with DocumentIndex.load(tmp_path / "empty.xml") as index:
+        assert len(index) == 0
+        assert index.shards(4) == []
+
+
+def test_single_document_file(tmp_path: Path) -> None:
+    (tmp_path / "one.xml").write_bytes(b"<root/>\n")
+    with DocumentIndex.build(tmp_path / "one.xml") as index:
+        assert [doc.data for doc in index] == [b"<root/>\n"]
+        assert len(index.shards(4)) == 1
+
+
+def test_shards(data_file: Path) -> None:
+    with DocumentIndex.load(data_file) as index:
+        shards = index.shards(4)
+
+        assert len(shards) == 4  # noqa: PLR2004
+        assert shards[0].start == 0
+        assert shards[-1].stop == N_PATENTS
+        assert shards[0].offset == 0
+        assert shards[-1].end == index.size
+        for first, second in zip(shards, shards[1:]):
+            assert first.stop == second.start
+            assert first.end == second.offset
+
+        sizes = [shard.size for shard in shards]
+        assert sum(sizes) == index.size
+        assert max(sizes) < 1.5 * index.size / 4
+
+    docs = [
+        doc.index for shard in range(4) for doc in iter_shard([data_file], shard, 4)
+    ]
+    assert docs == list(range(N_PATENTS))
+    assert list(iter_shard([data_file], 200, 201)) == []
+
+
+def test_shard_with_checkpoint(data_file: Path, tmp_path: Path) -> None:
+    checkpoint = Checkpoint.open(tmp_path / "checkpoint.json")
+    with DocumentIndex.load(data_file) as index:
+        shard = index.shards(2)[1]
+        checkpoint.update(index[shard.start + 3])
+
+    docs = list(iter_shard([data_file], 1, 2, checkpoint))
+    assert docs[0].index == shard.start + 4
+    assert docs[-1].index == N_PATENTS - 1
+
+
+def test_cli_shards(data_file: Path, tmp_path: Path) -> None:
+    titles: list[str] = []
+    for shard in ["1/3", "2/3", "3/3"]:
+        output = tmp_path / "out.jsonl"
+        args = ["tests.test_cli:Patent", str(data_file), "--shard", shard]
+        assert main([*args, "-o", str(output), "-q"]) == 0
+        titles.extend(
+            json.loads(line)["title"] for line in output.read_text().splitlines()
+        )
+
+    assert len(titles) == N_PATENTS
+
+
+def test_cli_directory_with_index(
+    data_file: Path, tmp_path_factory: pytest.TempPathFactory
+) -> None:
+    # The index cached by a sharded run isn't read as an input by later runs
+    output = tmp_path_factory.mktemp("output") / "out.jsonl"
+    args = ["tests.test_cli:Patent", str(data_file.parent), "-o", str(output), "-q"]
+    for extra in [["--shard", "1/1"], ["--shard", "1/1"], []]:
+        assert main([*args, *extra]) == 0
+        assert len(output.read_text().splitlines()) == N_PATENTS
+
+    assert sorted(path.name for path in data_file.parent.iterdir()) == [
+        data_file.name,
+        f"{data_file.name}.idx",
+    ]
+
+
+@pytest.mark.parametrize("shard", ["0/3", "4/3", "a/3", "3"])
+def test_cli_invalid_shard(data_file: Path, shard: str) -> None:
+    with pytest.raises(SystemExit):
+        main(["tests.test_cli:Patent", str(data_file), "--shard", shard])
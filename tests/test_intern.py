@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing_extensions import Annotated
+
+from xml_to_pydantic import ConfigDict, DocModel, XpathField
+
+XML_BYTES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<root>
+    <record country="US"><kind>B2</kind></record>
+    <record country="US"><kind>B2</kind></record>
+    <record country="US"><kind>S1</kind></record>
+</root>
+"""
+
+
+def test_intern_field() -> None:
+    class Record(DocModel):
+        attr_country: str = XpathField(query="@country", intern=True)
+        kind: str = XpathField(query="./kind/text()")
+
+    class MyModel(DocModel):
+        record: list[Record]
+
+    model = MyModel.model_validate_xml(XML_BYTES)
+    first, second, third = model.record
+    assert first.attr_country is second.attr_country is third.attr_country
+    assert first.kind == second.kind
+    assert first.kind is not second.kind
+
+
+def test_intern_annotated_field() -> None:
+    class MyModel(DocModel):
+        kind: Annotated[list[str], XpathField(query="//kind/text()", intern=True)]
+
+    model = MyModel.model_validate_xml(XML_BYTES)
+    assert model.kind == ["B2", "B2", "S1"]
+    assert model.kind[0] is model.kind[1]
+
+
+def test_intern_model_config() -> None:
+    class Record(DocModel):
+        model_config = ConfigDict(intern_strings=True)
+        attr_country: str
+        kind: str
+        kind_not_interned: str = XpathField(query="./kind/text()", intern=False)
+
+    class MyModel(DocModel):
+        record: list[Record]
+
+    model = MyModel.model_validate_xml(XML_BYTES)
+    first, second, _ = model.record
+    assert first.attr_country is second.attr_country
+    assert first.kind is second.kind
+    assert first.kind_not_interned is not second.kind_not_interned
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, cast
+
+import pytest
+from pydantic import ValidationError, field_validator
+from pydantic_core import PydanticCustomError
+
+from xml_to_pydantic import (
+    BatchValidator,
+    ConfigDict,
+    DocAdapter,
+    DocLimitError,
+    DocLimits,
+    DocModel,
+    MemoryStorage,
+    ResultCache,
+    XpathField,
+    batch,
+)
+from xml_to_pydantic.cli import main
+from xml_to_pydantic.codegen import extractor_source
+from xml_to_pydantic.model import _has_lazy_fields
+
+CONFIGS = [ConfigDict(), ConfigDict(codegen=True)]
+
+
+class Row(DocModel):
+    id: int = XpathField("./@id")
+    value: float
+
+
+def make_table(rows: int, bad: int | None = None) -> bytes:
+    values = [b'<row id="%d"><value>%d.5</value></row>' % (i, i) for i in range(rows)]
+    if bad is not None:
+        values[bad] = b'<row id="%d"><value>many</value></row>' % bad
+    return b"<table><name>t</name>" + b"".join(values) + b"</table>"
+
+
+class Table(DocModel):
+    name: str
+    row: Iterable[Row]
+
+
+def make_model(config: ConfigDict) -> type[DocModel]:
+    class Table(DocModel):
+        model_config = config
+        name: str
+        row: Iterable[Row]
+
+    return Table
+
+
+@pytest.fixture(params=CONFIGS, ids=["generic", "codegen"])
+def table_model(request: pytest.FixtureRequest) -> type[DocModel]:
+    return make_model(cast(ConfigDict, request.param))
+
+
+def test_lazy_rows(table_model: type[DocModel]) -> None:
+    table: Any = table_model.model_validate_xml(make_table(1000))
+    assert table.name == "t"
+    assert not isinstance(table.row, list)
+
+    total = 0.0
+    for row in table.row:
+        assert isinstance(row, Row)
+        total += row.value
+    assert total == sum(i + 0.5 for i in range(1000))
+
+    # The rows are only produced once
+    assert list(table.row) == []
+
+
+def test_lazy_rows_validated_as_iterated(table_model: type[DocModel]) -> None:
+    table: Any = table_model.model_validate_xml(make_table(10, bad=2))
+    rows = iter(table.row)
+    assert next(rows).id == 0
+    assert next(rows).id == 1
+    with pytest.raises(ValidationError, match="value"):
+        next(rows)
+
+
+def test_lazy_rows_stop_early(table_model: type[DocModel]) -> None:
+    table: Any = table_model.model_validate_xml(make_table(10, bad=9))
+    first = [row.id for _, row in zip(range(3), table.row)]
+    assert first == [0, 1, 2]
+
+
+def test_lazy_rows_json(table_model: type[DocModel]) -> None:
+    table = table_model.model_validate_xml(make_table(2))
+    assert table.model_dump_json() == (
+        '{"name":"t","row":[{"id":0,"value":0.5},{"id":1,"value":1.5}]}'
+    )
+
+
+def test_lazy_rows_extract() -> None:
+    data = make_model(ConfigDict()).model_extract_xml(make_table(2))
+    assert isinstance(data["row"], Iterator)
+    assert list(data["row"]) == [
+        {"id": "0", "value": "0.5"},
+        {"id": "1", "value": "1.5"},
+    ]
+
+
+def test_lazy_rows_optional() -> None:
+    class Table(DocModel):
+        row: Optional[Iterable[Row]] = None  # noqa: UP007
+
+    assert Table.model_validate_xml(b"<table/>").row is None
+    table = Table.model_validate_xml(make_table(3))
+    assert [row.id for row in cast(Iterable[Row], table.row)] == [0, 1, 2]
+
+
+def test_lazy_rows_codegen_source() -> None:
+    source = extractor_source(make_model(ConfigDict()))
+    assert "models = (extract_1(item) for item in items)" in source
+
+
+def test_lazy_rows_cached() -> None:
+    cache = ResultCache(MemoryStorage())
+    table_model = make_model(ConfigDict(result_cache=cache))
+    doc = make_table(3)
+
+    # On a miss, the rows are read in full to be cached, and still validated
+    for _ in range(2):
+        table: Any = table_model.model_validate_xml(doc)
+        assert [row.id for row in table.row] == [0, 1, 2]
+    assert cache.stats.hits == 1
+
+
+def test_lazy_rows_adapter() -> None:
+    adapter: DocAdapter[Iterable[Row]] = DocAdapter(Iterable[Row], "//row")
+    rows = adapter.validate_xml(make_table(3, bad=2))
+    assert not isinstance(rows, list)
+    rows = iter(rows)
+    assert [next(rows).id, next(rows).id] == [0, 1]
+    with pytest.raises(ValidationError):
+        next(rows)
+
+
+def test_lazy_rows_parallel() -> None:
+    table_model = make_model(ConfigDict())
+    validator = BatchValidator(table_model)
+    chunks = list(validator.validate_parallel([make_table(2)] * 3, workers=1))
+    tables: list[Any] = [table for chunk in chunks for table in chunk]
+    assert [[row.id for row in table.row] for table in tables] == [[0, 1]] * 3
+
+
+def test_lazy_rows_batch_errors(table_model: type[DocModel]) -> None:
+    # In a batch, lazy fields are read before the model is returned, so that
+    # their errors are handled by on_error
+    validator = BatchValidator(table_model)
+    docs = [make_table(3), make_table(3, bad=1)]
+    tables: list[Any] = list(validator.validate(docs))
+
+    assert len(tables) == 1
+    assert [row.id for row in tables[0].row] == [0, 1, 2]
+    assert [error.index for error in validator.errors] == [1]
+    assert validator.errors[0].details[0]["loc"] == ["row", 1, "value"]
+    assert validator.stats.by_error == {"ValidationError": 1}
+    assert table_model.__name__ in validator.errors[0].message
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_lazy_rows_parallel_errors(workers: int) -> None:
+    validator = BatchValidator(Table, on_error="collect")
+    docs = [make_table(2), make_table(2, bad=0), make_table(2)]
+    tables: list[Any] = [
+        table
+        for chunk in validator.validate_parallel(docs, workers=workers)
+        for table in chunk
+    ]
+    assert len(tables) == 2  # noqa: PLR2004
+    assert [error.index for error in validator.errors] == [1]
+
+
+def test_lazy_rows_custom_errors() -> None:
+    class Limited(Row):
+        @field_validator("value")
+        @classmethod
+        def check_value(cls, value: float) -> float:
+            if value > 1:
+                raise PydanticCustomError(
+                    "too_big", "{value} is too big", {"value": value}
+                )
+            return value
+
+    class LimitedTable(DocModel):
+        row: Iterable[Limited]
+
+    validator = BatchValidator(LimitedTable)
+    assert list(validator.validate([make_table(3)])) == []
+    assert validator.errors[0].details == [
+        {"loc": ["row", 1, "value"], "type": "too_big", "msg": "1.5 is too big"}
+    ]
+
+
+def test_lazy_rows_extract_one_errors() -> None:
+    class Broken(DocModel):
+        value: str = XpathField("./value/text() | count(.)")
+
+    class BrokenTable(DocModel):
+        row: Iterable[Broken]
+
+    validator = BatchValidator(BrokenTable)
+    assert list(validator.extract([make_table(2)])) == []
+    assert validator.errors[0].error == "DocParsingError"
+
+
+def test_lazy_rows_nested_frozen() -> None:
+    class Section(DocModel):
+        model_config = ConfigDict(frozen=True)
+        row: Iterable[Row]
+
+    class Sections(DocModel):
+        section: list[Section]
+
+    sections = [make_table(2), make_table(2, bad=1)]
+    doc = b"<doc>%s</doc>" % b"".join(sections).replace(b"table", b"section")
+    validator = BatchValidator(Sections)
+    assert list(validator.validate([doc])) == []
+    assert validator.errors[0].details[0]["loc"] == [
+        "section",
+        1,
+        "row",
+        1,
+        "value",
+    ]
+
+
+def test_has_lazy_fields() -> None:
+    class Node(DocModel):
+        name: str
+        child: list[Node] = []
+
+    class Tree(DocModel):
+        node: Optional[list[Node]] = None  # noqa: UP007
+
+    class Sections(DocModel):
+        section: list[make_model(ConfigDict())]  # type: ignore[valid-type]
+
+    assert not _has_lazy_fields(Row)
+    assert not _has_lazy_fields(Tree)
+    assert _has_lazy_fields(Table)
+    assert _has_lazy_fields(Sections)
+
+
+def test_lazy_rows_not_read_without_lazy_fields(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    reads: list[Any] = []
+    monkeypatch.setattr(batch, "_read_lazy", reads.append)
+    validator = BatchValidator(Row)
+    assert list(validator.validate([b'<row id="1"><value>2</value></row>'])) == [
+        Row(id=1, value=2)
+    ]
+    assert reads == []
+
+
+def test_lazy_rows_cli(tmp_path: Path) -> None:
+    path = tmp_path / "tables.xml"
+    path.write_bytes(
+        b"".join(
+            b'<?xml version="1.0"?>\n%s\n' % table
+            for table in [make_table(2), make_table(2, bad=1)]
+        )
+    )
+    output, errors = tmp_path / "out.jsonl", tmp_path / "errors.jsonl"
+    args = [str(path), "-o", str(output), "-e", str(errors), "-q"]
+
+    assert main(["tests.test_lazy:Table", *args]) == 1
+    assert json.loads(output.read_text())["row"] == [
+        {"id": 0, "value": 0.5},
+        {"id": 1, "value": 1.5},
+    ]
+    assert json.loads(errors.read_text())["details"][0]["loc"] == ["row", 1, "value"]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_lazy_rows_within_limits(lazy: bool) -> None:
+    class Values(DocModel):
+        v: list[int]
+
+    class ValuesTable(DocModel):
+        row: Iterable[Values] if lazy else list[Values]  # type: ignore[valid-type]
+
+    row = b"<row>" + b"<v>1</v>" * 100 + b"</row>"
+    doc = b"<table>" + row * 2 + b"</table>"
+    with pytest.raises(DocLimitError, match="100 results"):
+        ValuesTable.model_validate_xml(doc, limits=DocLimits(max_results=10))
+
+    # Only the validation is lazy within limits
+    table: Any = ValuesTable.model_validate_xml(doc, limits=DocLimits())
+    assert [len(values.v) for values in table.row] == [100, 100]
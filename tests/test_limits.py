@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from lxml import etree
+
+from xml_to_pydantic import (
+    BatchValidator,
+    ConfigDict,
+    DocLimitError,
+    DocLimits,
+    DocModel,
+    DocParsingError,
+    ResultCache,
+    XpathField,
+)
+from xml_to_pydantic import limits as limits_module
+
+XML_BYTES = b"<root><a><b><c>deep</c></b></a><v>1</v><v>2</v><v>3</v></root>"
+
+
+class Child(DocModel):
+    v: list[int] = XpathField("./v/text()", default=[])
+
+
+class Record(DocModel):
+    c: str = XpathField(".//c/text()")
+    child: Child = XpathField(".")
+
+
+def test_no_limits() -> None:
+    record = Record.model_validate_xml(XML_BYTES, limits=DocLimits())
+    assert record == Record(c="deep", child=Child(v=[1, 2, 3]))
+
+
+@pytest.mark.parametrize(
+    "source",
+    [XML_BYTES, XML_BYTES.decode(), memoryview(XML_BYTES), bytearray(XML_BYTES)],
+)
+def test_max_bytes(source: str | bytes) -> None:
+    size = len(XML_BYTES)
+    assert Record.model_validate_xml(source, limits=DocLimits(max_bytes=size))
+    with pytest.raises(DocLimitError, match=f"{size} bytes, more than the limit"):
+        Record.model_validate_xml(source, limits=DocLimits(max_bytes=size - 1))
+
+
+def test_max_bytes_files(tmp_path: Path) -> None:
+    path = tmp_path / "record.xml"
+    path.write_bytes(XML_BYTES)
+    limits = DocLimits(max_bytes=len(XML_BYTES) - 1)
+
+    with pytest.raises(DocLimitError):
+        Record.model_validate_xml(path, limits=limits)
+    # File objects are checked as they are read
+    with pytest.raises(DocLimitError, match="more than the limit"):
+        Record.model_validate_xml(io.BytesIO(XML_BYTES), limits=limits)
+
+    limits = DocLimits(max_bytes=len(XML_BYTES))
+    assert Record.model_validate_xml(io.BytesIO(XML_BYTES), limits=limits)
+
+
+def test_max_depth() -> None:
+    assert Record.model_validate_xml(XML_BYTES, limits=DocLimits(max_depth=4))
+    # Also checked for elements that have already been parsed
+    root = etree.fromstring(XML_BYTES)
+    with pytest.raises(DocLimitError, match="nested more than 3 deep"):
+        Record.model_validate_xml(root, limits=DocLimits(max_depth=3, max_bytes=1))
+    with pytest.raises(DocLimitError, match="nested more than 3 deep"):
+        Record.model_validate_xml(XML_BYTES, limits=DocLimits(max_depth=3))
+
+    html = b"<html><body>" + b"<table><tr><td>" * 100 + b"</body></html>"
+
+    class Page(DocModel):
+        td: list[str] = XpathField("//td/text()", default=[])
+
+    with pytest.raises(DocLimitError):
+        Page.model_validate_html(html, limits=DocLimits(max_depth=50))
+
+
+def test_max_results() -> None:
+    # Checked for nested models too
+    assert Record.model_validate_xml(XML_BYTES, limits=DocLimits(max_results=3))
+    with pytest.raises(DocLimitError, match=r"Query ./v/text\(\) returned 3 results"):
+        Record.model_validate_xml(XML_BYTES, limits=DocLimits(max_results=2))
+
+
+@pytest.fixture()
+def _clock(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A clock that moves forward a second each time it is read"""
+    now = [0.0]
+
+    def perf_counter() -> float:
+        now[0] += 1
+        return now[0]
+
+    monkeypatch.setattr(
+        limits_module, "time", SimpleNamespace(perf_counter=perf_counter)
+    )
+
+
+@pytest.mark.usefixtures("_clock")
+def test_time_limit() -> None:
+    # The clock is read at the start, after parsing, and after each query
+    assert Record.model_validate_xml(XML_BYTES, limits=DocLimits(time_limit=4))
+    with pytest.raises(DocLimitError, match="time limit of 3s"):
+        Record.model_validate_xml(XML_BYTES, limits=DocLimits(time_limit=3))
+    with pytest.raises(DocLimitError, match="time limit of 0.5s"):
+        Record.model_validate_xml(XML_BYTES, limits=DocLimits(time_limit=0.5))
+
+
+def test_model_config_limits() -> None:
+    class Limited(Record):
+        model_config = ConfigDict(limits=DocLimits(max_results=2))
+
+    with pytest.raises(DocLimitError):
+        Limited.model_validate_xml(XML_BYTES)
+    # Limits for the call replace those of the model
+    assert Limited.model_validate_xml(XML_BYTES, limits=DocLimits(max_results=3))
+
+
+@pytest.mark.parametrize("config", [{"engine": "target"}, {"codegen": True}])
+def test_limits_use_generic_extraction(config: ConfigDict) -> None:
+    class Fast(Child):
+        model_config = ConfigDict(limits=DocLimits(max_results=2), **config)
+
+    with pytest.raises(DocLimitError):
+        Fast.model_validate_xml(XML_BYTES)
+
+
+def test_limits_with_cache() -> None:
+    cache = ResultCache()
+
+    class Cached(Record):
+        model_config = ConfigDict(result_cache=cache)
+
+    class Limited(Cached):
+        model_config = ConfigDict(limits=DocLimits(max_bytes=len(XML_BYTES)))
+
+    Cached.model_validate_xml(XML_BYTES)
+    Limited.model_validate_xml(XML_BYTES)
+    assert cache.stats.hits == 0
+
+    # Limits for the call apply even once the document is cached
+    with pytest.raises(DocLimitError, match="bytes"):
+        Cached.model_validate_xml(XML_BYTES, limits=DocLimits(max_bytes=10))
+    with pytest.raises(DocLimitError, match="results"):
+        Cached.model_validate_xml(XML_BYTES, limits=DocLimits(max_results=2))
+
+    # As do the model's, on a hit
+    Limited.model_validate_xml(XML_BYTES)
+    assert cache.stats.hits == 1
+    Limited.model_config["limits"] = DocLimits(max_bytes=10)
+    with pytest.raises(DocLimitError, match="bytes"):
+        Limited.model_validate_xml(XML_BYTES)
+
+
+def test_limit_errors_are_document_errors() -> None:
+    assert issubclass(DocLimitError, DocParsingError)
+
+    class Limited(Record):
+        model_config = ConfigDict(
+            limits=DocLimits(max_results=2), result_cache=ResultCache()
+        )
+
+    validator = BatchValidator(Limited)
+    assert list(validator.validate([XML_BYTES, b"<root><c>x</c></root>"])) == [
+        Limited(c="x", child=Child(v=[]))
+    ]
+    assert validator.stats.by_error == {"DocLimitError": 1}
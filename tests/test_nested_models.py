@@ -3,7 +3,7 @@ from __future__ import annotations
 import pydantic
 import pytest
 
-from xml_to_pydantic import DocModel, DocModelError, XpathField
+from xml_to_pydantic import ConfigDict, DocModel, DocModelError, XpathField
 
 
 def test_nested_models() -> None:
@@ -48,12 +48,18 @@ def test_nested_model_but_multiple_elements() -> None:
         element2a: str = XpathField(query="./element2a/text()")
 
     class MyModel(DocModel):
+        model_config = ConfigDict(strict_matches=True)
         element1: str = XpathField(query="./element1/text()")
         element2: Model2 = XpathField(query="./element2")
 
     with pytest.raises(pydantic.ValidationError):
         MyModel.model_validate_xml(xml_bytes)
 
+    class FirstModel(MyModel):
+        model_config = ConfigDict(strict_matches=False)
+
+    assert FirstModel.model_validate_xml(xml_bytes).element2.element2a == "text1"
+
 
 def test_list_of_nested_models() -> None:
     xml_bytes = b"""<?xml version="1.0" encoding="UTF-8"?>
@@ -211,3 +217,22 @@ def test_union_of_models_with_str() -> None:
     with pytest.raises(DocModelError) as exc_info:
         MyModel.model_validate_xml(xml_bytes)
     assert "Unable to use type" in str(exc_info)
+
+
+def test_query_fields_with_forward_reference() -> None:
+    """
+    The queries are cached on the class, but only once pydantic has
+    resolved the annotations - until then, the inferred xpath can change.
+    """
+
+    class MyModel(DocModel):
+        element1: Model1
+
+    assert MyModel.query_fields()["element1"].query == "./element1/text()"
+
+    class Model1(DocModel):
+        element1a: str
+
+    MyModel.model_rebuild()
+    assert MyModel.query_fields()["element1"].query == "./element1"
+    assert MyModel.query_fields() is MyModel.query_fields()
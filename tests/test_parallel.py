@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from lxml import etree
+from pydantic import ValidationError
+
+from xml_to_pydantic import BatchValidator, DocModel, ModelChunk, XpathField
+from xml_to_pydantic.stream import iter_documents
+
+DATA_FILE = Path(__file__).parent / "endtoend" / "data" / "ipg240109_head.xml"
+N_PATENTS = 102
+
+
+class Part(DocModel):
+    id: int
+
+
+class Record(DocModel):
+    name: str
+    count: int
+    part: list[Part] = []
+
+
+class Patent(DocModel):
+    title: str = XpathField(
+        "/us-patent-grant/us-bibliographic-data-grant/invention-title/text()"
+    )
+
+
+def make_docs(count: int) -> list[bytes]:
+    docs = [
+        b"<record><name>r%d</name><count>%d</count><part><id>%d</id></part></record>"
+        % (i, i, i)
+        for i in range(count)
+    ]
+    docs[3] = b"<record><name>bad</name><count>many</count></record>"
+    docs[5] = b"<record><name>broken</name>"
+    return docs
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_parallel(workers: int) -> None:
+    docs = make_docs(20)
+    validator = BatchValidator(Record)
+    chunks = list(validator.validate_parallel(docs, workers=workers, chunksize=4))
+
+    assert all(isinstance(chunk, ModelChunk) for chunk in chunks)
+    assert [len(chunk) for chunk in chunks] == [3, 3, 4, 4, 4]
+    records = [record for chunk in chunks for record in chunk]
+    assert records == list(BatchValidator(Record).validate(docs))
+    assert records[0] == Record(name="r0", count=0, part=[Part(id=0)])
+
+    assert [(error.index, error.error) for error in validator.errors] == [
+        (3, "ValidationError"),
+        (5, "XMLSyntaxError"),
+    ]
+    assert validator.stats.documents == 20  # noqa: PLR2004
+    assert validator.stats.by_error == {"ValidationError": 1, "XMLSyntaxError": 1}
+
+
+def test_model_chunk_is_lazy() -> None:
+    validator = BatchValidator(Record)
+    (chunk,) = validator.validate_parallel(make_docs(6)[:3], workers=1)
+
+    assert chunk.json[1] == b'{"name":"r1","count":1,"part":[{"id":1}]}'
+    assert chunk._models == [None, None, None]
+    assert chunk[-1].name == "r2"
+    assert chunk._models[:2] == [None, None]
+    # Each model is only validated once
+    assert chunk[2] is chunk[-1]
+    assert [record.count for record in chunk[:2]] == [0, 1]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_parallel_raise(workers: int) -> None:
+    validator = BatchValidator(Record, on_error="raise")
+    chunks = validator.validate_parallel(make_docs(8), workers=workers, chunksize=2)
+    assert len(next(chunks)) == 2  # noqa: PLR2004
+
+    # The exception from the worker is raised again in this process
+    with pytest.raises(ValidationError):
+        next(chunks)
+    assert validator.stats.documents == 4  # noqa: PLR2004
+    assert validator.stats.failed == 1
+
+
+def test_validate_parallel_skip() -> None:
+    validator = BatchValidator(Record, on_error="skip")
+    chunks = validator.validate_parallel(make_docs(6), workers=1)
+    assert sum(len(chunk) for chunk in chunks) == 4  # noqa: PLR2004
+    assert validator.errors == []
+    assert validator.stats.failed == 2  # noqa: PLR2004
+
+
+def test_validate_parallel_interleaved() -> None:
+    # Generators for different models in one thread each use their own
+    # validator
+    records = BatchValidator(Record).validate_parallel(make_docs(6), workers=1)
+    parts = BatchValidator(Part).validate_parallel(
+        [b"<part><id>%d</id></part>" % i for i in range(4)], workers=1, chunksize=2
+    )
+    assert list(next(parts)) == [Part(id=0), Part(id=1)]
+    assert len(next(records)) == 4  # noqa: PLR2004
+    assert list(next(parts)) == [Part(id=2), Part(id=3)]
+
+
+def test_validate_parallel_documents() -> None:
+    validator = BatchValidator(Patent)
+    docs = iter_documents([DATA_FILE])
+    titles = [
+        patent.title
+        for chunk in validator.validate_parallel(docs, workers=2, chunksize=10)
+        for patent in chunk
+    ]
+    assert len(titles) == N_PATENTS
+    assert titles[0] == "Elongated kabob pet treat"
+
+
+def test_validate_parallel_default_workers() -> None:
+    validator = BatchValidator(Part)
+    docs = [b"<part><id>1</id></part>", etree.tostring(etree.Element("part"))]
+    (chunk,) = validator.validate_parallel(docs)
+    assert list(chunk) == [Part(id=1)]
+    assert validator.stats.failed == 1
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_parallel_where(workers: int) -> None:
+    validator = BatchValidator(Record, where="//count mod 2 = 0")
+    chunks = validator.validate_parallel(make_docs(10), workers=workers)
+    records = [record for chunk in chunks for record in chunk]
+    assert [record.count for record in records] == [0, 2, 4, 6, 8]
+    # The broken document can't be parsed to be filtered
+    assert [error.index for error in validator.errors] == [5]
+    assert validator.stats.filtered == 4  # noqa: PLR2004
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import io
+import mmap
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from lxml import etree
+
+from xml_to_pydantic import (
+    BatchValidator,
+    ConfigDict,
+    CssField,
+    DocModel,
+    ResultCache,
+    XpathField,
+)
+from xml_to_pydantic.docs import _BufferReader
+
+XML_BYTES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<root kind="k">
+    <title>hello</title>
+    <value>1</value>
+    <value>2</value>
+</root>
+"""
+
+HTML_BYTES = b"<html><head><title>page</title></head><body><p>a<p>b</body></html>"
+
+
+class Record(DocModel):
+    title: str
+    attr_kind: str
+    value: list[int]
+
+
+class Page(DocModel):
+    title: str = CssField("title")
+    p: list[str] = XpathField("//p/text()")
+
+
+@pytest.fixture()
+def xml_path(tmp_path: Path) -> Path:
+    path = tmp_path / "record.xml"
+    path.write_bytes(XML_BYTES)
+    return path
+
+
+@pytest.fixture()
+def xml_mmap(xml_path: Path) -> Iterator[mmap.mmap]:
+    with xml_path.open("rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        yield mapped
+
+
+EXPECTED = Record(title="hello", attr_kind="k", value=[1, 2])
+
+
+def test_path(xml_path: Path) -> None:
+    assert Record.model_validate_xml(xml_path) == EXPECTED
+
+
+def test_file_object(xml_path: Path) -> None:
+    with xml_path.open("rb") as file:
+        assert Record.model_validate_xml(file) == EXPECTED
+    assert Record.model_validate_xml(io.BytesIO(XML_BYTES)) == EXPECTED
+
+
+def test_buffers(xml_mmap: mmap.mmap) -> None:
+    assert Record.model_validate_xml(xml_mmap) == EXPECTED
+    assert Record.model_validate_xml(memoryview(XML_BYTES)) == EXPECTED
+    assert Record.model_validate_xml(bytearray(XML_BYTES)) == EXPECTED
+
+
+def test_buffer_reader_chunks() -> None:
+    reader = _BufferReader(memoryview(b"abcde"))
+    assert reader.read(2) == b"ab"
+    assert reader.read(2) == b"cd"
+    assert reader.read() == b"e"
+    assert reader.read(2) == b""
+
+
+def test_html_sources(tmp_path: Path) -> None:
+    path = tmp_path / "page.html"
+    path.write_bytes(HTML_BYTES)
+    expected = Page(title="page", p=["a", "b"])
+
+    assert Page.model_validate_html(path) == expected
+    assert Page.model_validate_html(io.BytesIO(HTML_BYTES)) == expected
+    assert Page.model_validate_html(memoryview(HTML_BYTES)) == expected
+
+
+@pytest.mark.parametrize("config", [{"engine": "target"}, {"codegen": True}])
+def test_engines(config: ConfigDict, xml_path: Path, xml_mmap: mmap.mmap) -> None:
+    class Model(Record):
+        model_config = ConfigDict(**config)
+
+    expected = Model(title="hello", attr_kind="k", value=[1, 2])
+    assert Model.model_validate_xml(xml_path) == expected
+    assert Model.model_validate_xml(io.BytesIO(XML_BYTES)) == expected
+    assert Model.model_validate_xml(xml_mmap) == expected
+
+
+def test_parse_errors(tmp_path: Path) -> None:
+    with pytest.raises(etree.XMLSyntaxError):
+        Record.model_validate_xml(io.BytesIO(b"<root>"))
+    with pytest.raises(OSError, match="Error reading file"):
+        Record.model_validate_xml(tmp_path / "missing.xml")
+
+
+def test_cache_only_in_memory_documents(xml_path: Path) -> None:
+    cache = ResultCache()
+
+    class Cached(Record):
+        model_config = ConfigDict(result_cache=cache)
+
+    Cached.model_validate_xml(memoryview(XML_BYTES))
+    Cached.model_validate_xml(XML_BYTES)
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    # Files would have to be read to work out the key
+    Cached.model_validate_xml(xml_path)
+    with xml_path.open("rb") as file:
+        Cached.model_validate_xml(file)
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_batch_paths(tmp_path: Path, xml_path: Path) -> None:
+    bad_path = tmp_path / "bad.xml"
+    bad_path.write_bytes(b"<root>")
+
+    validator = BatchValidator(Record)
+    assert list(validator.validate([xml_path, bad_path, xml_path])) == [
+        EXPECTED,
+        EXPECTED,
+    ]
+    assert [error.index for error in validator.errors] == [1]
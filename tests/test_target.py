@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import pytest
+from lxml import etree
+
+from xml_to_pydantic import ConfigDict, CssField, DocModel, XpathField
+from xml_to_pydantic.docs import FieldQuery
+from xml_to_pydantic.model import _TARGET_PLANS, _target_plan
+from xml_to_pydantic.target import TargetPlan, _parse_query
+
+XML_BYTES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<root id="7">
+    <title>Hello<!-- a comment -->World</title>
+    <item>1</item>
+    <item/>
+    <item>2<b>bold</b>3<?pi data?>4</item>
+    <group><entry value="a"/><entry/><entry value="b"><!-- c --><?pi?>x</entry></group>
+    <unused><nested>not collected</nested></unused>
+    <cdata><![CDATA[<not an element>]]> &amp; more</cdata>
+    tail text
+</root>
+"""
+
+
+class TreeModel(DocModel):
+    model_config = ConfigDict(engine="tree")
+    attr_id: int
+    title: list[str]
+    item: list[str] = []
+    missing: str | None = None
+    cdata: str
+    entries: list[str] = XpathField("./group/entry/@value")
+    entry_text: list[str] = XpathField("group/./entry/text()")
+    absolute: list[str] = XpathField("/root/item/text()", default=[])
+    absolute_other: list[str] = XpathField("/other/item/text()", default=[])
+    text: list[str] = XpathField("text()")
+
+
+class TargetModel(TreeModel):
+    model_config = ConfigDict(engine="target")
+
+
+@pytest.mark.parametrize(
+    "xml",
+    [
+        XML_BYTES,
+        XML_BYTES.decode().split("\n", 1)[1],
+        XML_BYTES.replace(b"<root", b"<other").replace(b"</root", b"</other"),
+    ],
+)
+def test_target_matches_tree(xml: str | bytes) -> None:
+    assert _target_plan(TargetModel) is not None
+    tree = TreeModel.model_validate_xml(xml)
+    target = TargetModel.model_validate_xml(xml)
+    assert target.model_dump() == tree.model_dump()
+
+
+def test_target_text_nodes() -> None:
+    model = TargetModel.model_validate_xml(XML_BYTES)
+    assert model.title == ["Hello", "World"]
+    assert model.item == ["1", "2", "3", "4"]
+    assert model.cdata == "<not an element> & more"
+    assert model.entries == ["a", "b"]
+    assert model.entry_text == ["x"]
+    assert model.absolute == model.item
+    assert model.absolute_other == []
+
+
+def test_target_errors() -> None:
+    with pytest.raises(etree.XMLSyntaxError):
+        TargetModel.model_validate_xml(b"<root><title>x</root>")
+
+
+def test_target_intern() -> None:
+    class Record(DocModel):
+        model_config = ConfigDict(engine="target", intern_strings=True)
+        kind: list[str]
+
+    model = Record.model_validate_xml(
+        b"<record><kind>B2</kind><kind>B2</kind></record>"
+    )
+    assert model.kind == ["B2", "B2"]
+    assert model.kind[0] is model.kind[1]
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "./a/text()",
+        "a/b/text()",
+        "/root/a/text()",
+        "text()",
+        "@id",
+        "./a/@id",
+        " ./a/./b/text() ",
+    ],
+)
+def test_simple_queries(query: str) -> None:
+    assert _parse_query(FieldQuery("xpath", query)) is not None
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "./a",
+        "//a/text()",
+        "./a//b/text()",
+        "./a[1]/text()",
+        "../a/text()",
+        "./ns:a/text()",
+        "./*/text()",
+        "./a/@ns:id",
+        "/text()",
+        "string(./a)",
+        "count(./a)",
+    ],
+)
+def test_complex_queries(query: str) -> None:
+    assert _parse_query(FieldQuery("xpath", query)) is None
+
+
+def test_css_query_not_compiled() -> None:
+    assert _parse_query(FieldQuery("css", "a")) is None
+
+
+def test_fallback_to_tree() -> None:
+    class Child(DocModel):
+        value: str
+
+    class Nested(DocModel):
+        model_config = ConfigDict(engine="target")
+        child: Child
+
+    class Css(DocModel):
+        model_config = ConfigDict(engine="target")
+        title: str = CssField("title")
+
+    class Root(DocModel):
+        model_config = ConfigDict(engine="target", xpath_root="/root/child")
+        value: str
+
+    xml = b"<root><title>t</title><child><value>v</value></child></root>"
+    assert _target_plan(Nested) is None
+    assert _target_plan(Css) is None
+    assert _target_plan(Root) is None
+
+    assert Nested.model_validate_xml(xml).child.value == "v"
+    assert Css.model_validate_xml(xml).title == "t"
+    assert Root.model_validate_xml(xml).value == "v"
+
+
+def test_target_elements_and_html_use_tree() -> None:
+    class Model(DocModel):
+        model_config = ConfigDict(engine="target")
+        body: str
+
+    xml = etree.fromstring(b"<root><body>t</body></root>")
+    assert Model.model_validate_xml(xml).body == "t"
+    assert Model.model_validate_html(b"<html><body>t</body></html>").body == "t"
+
+
+def test_plan_roots_cached() -> None:
+    plan = TargetPlan.compile(
+        {
+            "a": FieldQuery("xpath", "./a/text()"),
+            "b": FieldQuery("xpath", "/root/a/@b"),
+        }
+    )
+    assert plan is not None
+    assert plan.root("root") is plan.root("root")
+    assert plan.root("other") is plan.relative
+    assert plan.extract(b'<root><a b="1">x</a></root>') == [["x"], ["1"]]
+    assert plan.extract(b'<other><a b="1">x</a></other>') == [["x"], []]
+
+
+def test_plan_not_cached_before_model_complete() -> None:
+    class Model(DocModel):
+        model_config = ConfigDict(engine="target")
+        child: Child
+
+    # Until Child is defined, it looks like a text field
+    assert _target_plan(Model) is not None
+    assert Model not in _TARGET_PLANS
+
+    class Child(DocModel):
+        value: str
+
+    Model.model_rebuild()
+    assert _target_plan(Model) is None
+    assert Model in _TARGET_PLANS
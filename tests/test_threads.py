@@ -0,0 +1,207 @@
+"""
+Extraction from several threads at once. These run (and check the results)
+with or without the GIL; on a free-threaded build they also run in parallel.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, List, TypeVar
+
+import pytest
+from lxml import etree
+
+from xml_to_pydantic import (
+    BatchValidator,
+    ConfigDict,
+    CssField,
+    DirectoryStorage,
+    DocAdapter,
+    DocLimits,
+    DocModel,
+    MemoryStorage,
+    ResultCache,
+    XpathField,
+    model,
+)
+from xml_to_pydantic.codegen import Extractor
+from xml_to_pydantic.docs import _LocalXPath
+from xml_to_pydantic.stream import iter_documents
+
+DATA_FILE = Path(__file__).parent / "endtoend" / "data" / "ipg240109_head.xml"
+DOCS = [doc.data for doc in iter_documents([DATA_FILE])][:40]
+THREADS = 8
+
+T = TypeVar("T")
+
+
+def on_threads(function: Callable[[], T], threads: int = THREADS) -> list[T]:
+    """Run a function on each of several threads, all starting together"""
+    barrier = threading.Barrier(threads)
+
+    def run() -> T:
+        barrier.wait()
+        return function()
+
+    with ThreadPoolExecutor(threads) as executor:
+        futures = [executor.submit(run) for _ in range(threads)]
+        return [future.result() for future in futures]
+
+
+def make_model(config: ConfigDict) -> type[DocModel]:
+    """A new model class, so that each test starts without cached queries"""
+
+    class Applicant(DocModel):
+        model_config = ConfigDict(**config, xpath_root="./addressbook")
+        last_name: str | None = XpathField("./last-name/text()", default=None)
+        country: str | None = XpathField("./address/country/text()", default=None)
+
+    class Patent(DocModel):
+        model_config = ConfigDict(
+            **config, xpath_root="/us-patent-grant/us-bibliographic-data-grant"
+        )
+        title: str = XpathField("./invention-title/text()")
+        number: str = XpathField(
+            "./publication-reference/document-id/doc-number/text()"
+        )
+        claims: int = XpathField("./number-of-claims/text()")
+        sections: list[str] = XpathField(".//section/text()", default=[])
+        title_css: str = CssField("invention-title")
+        applicants: list[Applicant] = XpathField(".//us-applicant", default=[])
+
+    return Patent
+
+
+class FlatPatent(DocModel):
+    model_config = ConfigDict(engine="target")
+    title: str = XpathField(
+        "/us-patent-grant/us-bibliographic-data-grant/invention-title/text()"
+    )
+    numbers: list[str] = XpathField("//doc-number/text()")
+
+
+def dump_all(cls: type[DocModel], **kwargs: Any) -> list[dict[str, Any]]:
+    return [cls.model_validate_xml(doc, **kwargs).model_dump() for doc in DOCS]
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        ConfigDict(),
+        ConfigDict(codegen=True),
+        ConfigDict(strict_matches=True),
+        ConfigDict(intern_strings=True, normalize_space=True),
+    ],
+)
+def test_models_on_threads(config: ConfigDict) -> None:
+    expected = dump_all(make_model(config))
+
+    cls = make_model(config)
+    results = on_threads(lambda: dump_all(cls))
+    assert all(result == expected for result in results)
+
+
+def test_target_engine_on_threads() -> None:
+    expected = dump_all(FlatPatent)
+    results = on_threads(lambda: dump_all(FlatPatent))
+    assert all(result == expected for result in results)
+
+
+def test_limits_on_threads() -> None:
+    cls = make_model(ConfigDict())
+    expected = dump_all(cls)
+    limits = DocLimits(max_depth=50, max_results=1000)
+    results = on_threads(lambda: dump_all(cls, limits=limits))
+    assert all(result == expected for result in results)
+
+
+def test_queries_built_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    builds = []
+    build_query_fields = model._build_query_fields
+
+    def slow_build(cls: type[DocModel]) -> Any:
+        builds.append(cls)
+        # Long enough for the other threads to miss the cache too
+        time.sleep(0.05)
+        return build_query_fields(cls)
+
+    monkeypatch.setattr(model, "_build_query_fields", slow_build)
+    cls = make_model(ConfigDict())
+    results = on_threads(cls.query_fields)
+
+    assert builds == [cls]
+    assert all(result is results[0] for result in results)
+
+
+def test_extractor_per_thread() -> None:
+    cls = make_model(ConfigDict(codegen=True))
+    extractor = Extractor(cls)
+
+    def extract() -> tuple[Any, list[dict[str, Any]]]:
+        roots = [etree.fromstring(doc) for doc in DOCS]  # noqa: S320
+        data = [extractor(root) for root in roots]
+        return extractor.local.function, data
+
+    results = on_threads(extract)
+    functions = {function for function, _ in results}
+    assert len(functions) == THREADS
+    assert all(data == results[0][1] for _, data in results)
+
+
+def test_local_xpath() -> None:
+    xpath = _LocalXPath("count(//doc-number)")
+    root = etree.fromstring(DOCS[0])  # noqa: S320
+
+    def evaluate() -> tuple[Any, etree.XPath]:
+        return xpath(root), xpath.local.xpath
+
+    results = on_threads(evaluate, threads=2)
+    assert results[0][0] == results[1][0] == xpath(root)
+    assert results[0][1] is not results[1][1]
+    assert repr(xpath) == "_LocalXPath('count(//doc-number)')"
+
+
+def test_adapter_on_threads() -> None:
+    adapter = DocAdapter(List[str], "//doc-number/text()")
+    expected = [adapter.validate_xml(doc) for doc in DOCS]
+    results = on_threads(lambda: [adapter.validate_xml(doc) for doc in DOCS])
+    assert all(result == expected for result in results)
+
+
+@pytest.mark.parametrize("storage", ["memory", "directory"])
+def test_shared_cache_on_threads(storage: str, tmp_path: Path) -> None:
+    # Fewer entries than documents, so that entries are evicted as well
+    cache = ResultCache(
+        MemoryStorage(max_entries=20)
+        if storage == "memory"
+        else DirectoryStorage(tmp_path, max_entries=20)
+    )
+    cls = make_model(ConfigDict(result_cache=cache))
+    expected = dump_all(make_model(ConfigDict()))
+
+    results = on_threads(lambda: dump_all(cls))
+    assert all(result == expected for result in results)
+    assert cache.stats.hits + cache.stats.misses == THREADS * len(DOCS)
+    assert len(cache.storage) <= 20  # noqa: PLR2004
+
+
+def test_parallel_with_one_worker_on_threads() -> None:
+    first = make_model(ConfigDict())
+    second = FlatPatent
+
+    def validate(cls: type[DocModel]) -> list[dict[str, Any]]:
+        validator = BatchValidator(cls)
+        return [
+            item.model_dump()
+            for chunk in validator.validate_parallel(DOCS, workers=1, chunksize=5)
+            for item in chunk
+        ]
+
+    # Each thread validates in process with its own model
+    with ThreadPoolExecutor(2) as executor:
+        results = list(executor.map(validate, [first, second] * 4))
+    assert results[::2] == [dump_all(first)] * 4
+    assert results[1::2] == [dump_all(second)] * 4
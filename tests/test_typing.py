@@ -1,6 +1,8 @@
 import sys
 from typing import Optional, Union
 
+from typing_extensions import Annotated
+
 from xml_to_pydantic.typing import _is_optional
 
 
@@ -29,3 +31,7 @@ def test_union_two_types_not_optional() -> None:
 
 def test_union_single_type_not_optional() -> None:
     assert (False, str) == _is_optional(Union[str])
+
+
+def test_optional_annotated_is_optional() -> None:
+    assert (True, str) == _is_optional(Optional[Annotated[str, "metadata"]])
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import pytest
+
+from xml_to_pydantic import ConfigDict, DocModel, XpathField
+from xml_to_pydantic.docs import FieldQuery
+
+XML_BYTES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<root kind="  a  b ">
+    <title>
+        A  long
+        title
+    </title>
+    <tag> one </tag>
+    <tag>   </tag>
+    <tag>two</tag>
+    <empty></empty>
+</root>
+"""
+
+
+@pytest.mark.parametrize(
+    ("options", "expected"),
+    [
+        ({}, [" a\n b ", "  ", ""]),
+        ({"strip": True}, ["a\n b", "", ""]),
+        ({"normalize_space": True}, ["a b", "", ""]),
+        ({"drop_blank": True}, [" a\n b "]),
+        ({"strip": True, "drop_blank": True}, ["a\n b"]),
+        ({"normalize_space": True, "strip": False, "drop_blank": True}, ["a b"]),
+    ],
+)
+def test_clean(options: dict[str, bool], expected: list[str]) -> None:
+    query = FieldQuery("xpath", ".", **options)
+    assert query.cleans == bool(options)
+    assert query.clean([" a\n b ", "  ", ""]) == expected
+
+
+def test_field_options() -> None:
+    class MyModel(DocModel):
+        title: str = XpathField(query="./title/text()", normalize_space=True)
+        title_stripped: str = XpathField(query="./title/text()", strip=True)
+        attr_kind: str = XpathField(query="@kind", normalize_space=True)
+        tag: list[str] = XpathField(query="./tag/text()", strip=True, drop_blank=True)
+
+    model = MyModel.model_validate_xml(XML_BYTES)
+    assert model.title == "A long title"
+    assert model.title_stripped == "A  long\n        title"
+    assert model.attr_kind == "a b"
+    assert model.tag == ["one", "two"]
+
+
+def test_model_config_options() -> None:
+    class MyModel(DocModel):
+        model_config = ConfigDict(normalize_space=True, drop_blank=True)
+        title: str
+        tag: list[str] = XpathField(query="./tag/text()")
+        raw_tag: list[str] = XpathField(
+            query="./tag/text()", normalize_space=False, drop_blank=False
+        )
+
+    model = MyModel.model_validate_xml(XML_BYTES)
+    assert model.title == "A long title"
+    assert model.tag == ["one", "two"]
+    assert model.raw_tag == [" one ", "   ", "two"]
+
+
+def test_blank_results_are_missing() -> None:
+    class MyModel(DocModel):
+        model_config = ConfigDict(drop_blank=True, strip=True)
+        empty: str | None = XpathField(query="string(./empty)", default=None)
+        blank: list[str] = XpathField(query="./tag[2]/text()", default=[])
+
+    model = MyModel.model_validate_xml(XML_BYTES)
+    assert model.empty is None
+    assert model.blank == []
+
+
+def test_nested_model_options() -> None:
+    class Tag(DocModel):
+        model_config = ConfigDict(strip=True)
+        value: str = XpathField(query="./text()")
+
+    class MyModel(DocModel):
+        # Only applies to the strings, not the elements for the nested models
+        model_config = ConfigDict(drop_blank=True)
+        tag: list[Tag] = XpathField(query="./tag")
+
+    model = MyModel.model_validate_xml(XML_BYTES)
+    assert [tag.value for tag in model.tag] == ["one", "", "two"]
+
+
+@pytest.mark.parametrize("config", [{"engine": "target"}, {"codegen": True}])
+def test_engines(config: ConfigDict) -> None:
+    class MyModel(DocModel):
+        model_config = ConfigDict(normalize_space=True, drop_blank=True, **config)
+        title: str
+        tag: list[str] = XpathField(query="./tag/text()")
+        missing: list[str] = XpathField(query="./tag[2]/text()", default=[])
+
+    model = MyModel.model_validate_xml(XML_BYTES)
+    assert model.title == "A long title"
+    assert model.tag == ["one", "two"]
+    assert model.missing == []